@@ -47,18 +47,22 @@ from NeoVintageous.nv.goto import goto_next_change
 from NeoVintageous.nv.goto import goto_next_target
 from NeoVintageous.nv.goto import goto_prev_change
 from NeoVintageous.nv.goto import goto_prev_target
+from NeoVintageous.nv.history import history_find
 from NeoVintageous.nv.history import history_get
 from NeoVintageous.nv.history import history_get_type
-from NeoVintageous.nv.history import history_len
+from NeoVintageous.nv.history import history_nr
 from NeoVintageous.nv.history import history_update
 from NeoVintageous.nv.jumplist import jumplist_update
 from NeoVintageous.nv.mappings import Mapping
 from NeoVintageous.nv.mappings import mappings_can_resolve
 from NeoVintageous.nv.mappings import mappings_is_incomplete
 from NeoVintageous.nv.mappings import mappings_resolve
+from NeoVintageous.nv.shell import filter_apply
+from NeoVintageous.nv.shell import filter_cancel
 from NeoVintageous.nv.state import init_state
 from NeoVintageous.nv.state import State
 from NeoVintageous.nv.ui import ui_bell
+from NeoVintageous.nv.ui import ui_bell_count
 from NeoVintageous.nv.ui import ui_cmdline_prompt
 from NeoVintageous.nv.ui import ui_highlight_yank
 from NeoVintageous.nv.ui import ui_highlight_yank_clear
@@ -93,6 +97,7 @@ from NeoVintageous.nv.utils import previous_non_folded_pt
 from NeoVintageous.nv.utils import regions_transform_extend_to_line_count
 from NeoVintageous.nv.utils import regions_transform_to_first_non_blank
 from NeoVintageous.nv.utils import regions_transformer
+from NeoVintageous.nv.utils import regions_transformer_batched
 from NeoVintageous.nv.utils import regions_transformer_indexed
 from NeoVintageous.nv.utils import regions_transformer_reversed
 from NeoVintageous.nv.utils import replace_sel
@@ -126,12 +131,14 @@ from NeoVintageous.nv.vi.search import find_in_range
 from NeoVintageous.nv.vi.search import find_wrapping
 from NeoVintageous.nv.vi.search import reverse_find_wrapping
 from NeoVintageous.nv.vi.search import reverse_search
-from NeoVintageous.nv.vi.search import reverse_search_by_pt
+from NeoVintageous.nv.vi.settings import destroy as destroy_vintage_settings
+from NeoVintageous.nv.vi.settings import sync_vintage_settings
 from NeoVintageous.nv.vi.settings import toggle_ctrl_keys
 from NeoVintageous.nv.vi.settings import toggle_side_bar
 from NeoVintageous.nv.vi.settings import toggle_super_keys
 from NeoVintageous.nv.vi.text_objects import big_word_end_reverse
 from NeoVintageous.nv.vi.text_objects import big_word_reverse
+from NeoVintageous.nv.vi.text_objects import find_balanced_bracket
 from NeoVintageous.nv.vi.text_objects import find_containing_tag
 from NeoVintageous.nv.vi.text_objects import find_sentences_backward
 from NeoVintageous.nv.vi.text_objects import find_sentences_forward
@@ -325,6 +332,7 @@ _log = logging.getLogger(__name__)
 class _nv_cmdline_feed_key(TextCommand):
 
     LAST_HISTORY_ITEM_INDEX = None
+    LAST_HISTORY_PREFIX = None
 
     def run(self, edit, key):
         if self.view.size() == 0:
@@ -337,16 +345,24 @@ class _nv_cmdline_feed_key(TextCommand):
         if key in ('<tab>', '<S-tab>'):
             insert_best_cmdline_completion(self.view, edit)
 
-        elif key in ('<up>', '<C-p>'):
+        elif key == '<up>':
             # Recall older command-line from history, whose beginning matches
             # the current command-line.
             self._next_history(edit, backwards=True)
 
-        elif key in ('<down>', '<C-n>'):
+        elif key == '<down>':
             # Recall more recent command-line from history, whose beginning
             # matches the current command-line.
             self._next_history(edit, backwards=False)
 
+        elif key == '<C-p>':
+            # Recall older command-line from history.
+            self._next_history(edit, backwards=True, match_prefix=False)
+
+        elif key == '<C-n>':
+            # Recall more recent command-line from history.
+            self._next_history(edit, backwards=False, match_prefix=False)
+
         elif key in ('<C-b>', '<home>'):
             # Cursor to beginning of command-line.
             self.view.sel().clear()
@@ -383,7 +399,7 @@ class _nv_cmdline_feed_key(TextCommand):
         else:
             raise NotImplementedError('unknown key')
 
-    def _next_history(self, edit, backwards):
+    def _next_history(self, edit, backwards, match_prefix=True):
         if self.view.size() == 0:
             raise RuntimeError('expected a non-empty command-line')
 
@@ -391,40 +407,37 @@ class _nv_cmdline_feed_key(TextCommand):
         if not history_get_type(firstc):
             raise RuntimeError('expected a valid command-line')
 
-        if _nv_cmdline_feed_key.LAST_HISTORY_ITEM_INDEX is None:
-            _nv_cmdline_feed_key.LAST_HISTORY_ITEM_INDEX = -1 if backwards else 0
-        else:
-            _nv_cmdline_feed_key.LAST_HISTORY_ITEM_INDEX += -1 if backwards else 1
-
-        count = history_len(firstc)
-        if count == 0:
-            _nv_cmdline_feed_key.LAST_HISTORY_ITEM_INDEX = None
-
-            return ui_bell()
-
-        if abs(_nv_cmdline_feed_key.LAST_HISTORY_ITEM_INDEX) > count:
-            _nv_cmdline_feed_key.LAST_HISTORY_ITEM_INDEX = -count
-
-            return ui_bell()
+        index = _nv_cmdline_feed_key.LAST_HISTORY_ITEM_INDEX
+        if index is None:
+            if not backwards:
+                return ui_bell()
 
-        if _nv_cmdline_feed_key.LAST_HISTORY_ITEM_INDEX >= 0:
-            _nv_cmdline_feed_key.LAST_HISTORY_ITEM_INDEX = 0
+            # The command-line typed before recalling any entries. It's the
+            # prefix recalled entries must begin with, and it's restored after
+            # going past the most recent entry.
+            _nv_cmdline_feed_key.LAST_HISTORY_PREFIX = self.view.substr(Region(1, self.view.size()))
+            index = history_nr(firstc) + 1
 
-            if self.view.size() > 1:
-                return self.view.erase(edit, Region(1, self.view.size()))
-            else:
+        prefix = _nv_cmdline_feed_key.LAST_HISTORY_PREFIX if match_prefix else ''
+        index = history_find(firstc, prefix, index, backwards)
+        if index == -1:
+            if backwards:
                 return ui_bell()
 
-        if self.view.size() > 1:
-            self.view.erase(edit, Region(1, self.view.size()))
+            item = _nv_cmdline_feed_key.LAST_HISTORY_PREFIX
+            _nv_cmdline_feed_key.reset_last_history_index()
+        else:
+            item = history_get(firstc, index)
+            _nv_cmdline_feed_key.LAST_HISTORY_ITEM_INDEX = index
 
-        item = history_get(firstc, _nv_cmdline_feed_key.LAST_HISTORY_ITEM_INDEX)
-        if item:
-            self.view.insert(edit, 1, item)
+        self.view.replace(edit, Region(1, self.view.size()), item)
+        self.view.sel().clear()
+        self.view.sel().add(self.view.size())
 
     @staticmethod
     def reset_last_history_index():  # type: () -> None
         _nv_cmdline_feed_key.LAST_HISTORY_ITEM_INDEX = None
+        _nv_cmdline_feed_key.LAST_HISTORY_PREFIX = None
 
 
 class _nv_run_cmds(TextCommand):
@@ -446,7 +459,8 @@ class _nv_feed_key(ViWindowCommandBase):
         _log.info('key evt: %s repeat_count=%s do_eval=%s check_user_mappings=%s', key, repeat_count, do_eval, check_user_mappings)  # noqa: E501
 
         try:
-            self._feed_key(key, repeat_count, do_eval, check_user_mappings)
+            _feed_key(self.window, self.state, key, repeat_count, do_eval, check_user_mappings)
+            sync_vintage_settings(self.view)
         except Exception as e:
             print('NeoVintageous: An error occurred during key press handle:')
             _log.exception(e)
@@ -458,361 +472,381 @@ class _nv_feed_key(ViWindowCommandBase):
                     settings.set('command_mode', False)
                     settings.set('inverse_caret_state', False)
                     settings.erase('vintage')
+                    destroy_vintage_settings(view)
 
         _log.debug('key evt took %ss (key=%s repeat_count=%s do_eval=%s check_user_mappings=%s)', '{:.4f}'.format(time.time() - start_time), key, repeat_count, do_eval, check_user_mappings)  # noqa: E501
 
-    def _feed_key(self, key, repeat_count=None, do_eval=True, check_user_mappings=True):
-        # Args:
-        #   key (str): Key pressed.
-        #   repeat_count (int): Count to be used when repeating through the '.' command.
-        #   do_eval (bool): Whether to evaluate the global state when it's in a
-        #       runnable state. Most of the time, the default value of `True` should
-        #       be used. Set to `False` when you want to manually control the global
-        #       state's evaluation. For example, this is what the _nv_feed_key
-        #       command does.
-        #   check_user_mappings (bool):
-        state = self.state
 
-        mode = state.mode
+def _feed_key(window, state, key, repeat_count=None, do_eval=True, check_user_mappings=True):
+    # Args:
+    #   window (Window):
+    #   state (State): The state of the active view in the window.
+    #   key (str): Key pressed.
+    #   repeat_count (int): Count to be used when repeating through the '.' command.
+    #   do_eval (bool): Whether to evaluate the global state when it's in a
+    #       runnable state. Most of the time, the default value of `True` should
+    #       be used. Set to `False` when you want to manually control the global
+    #       state's evaluation. For example, this is what the _nv_feed_key
+    #       command does.
+    #   check_user_mappings (bool):
+    mode = state.mode
+
+    _log.debug('mode: %s', mode)
+
+    # If the user has made selections with the mouse, we may be in an
+    # inconsistent state. Try to remedy that.
+    if (state.view.has_non_empty_selection_region() and mode not in (VISUAL, VISUAL_LINE, VISUAL_BLOCK, SELECT)):
+        init_state(state.view)
+
+    if key.lower() == '<esc>':
+        filter_cancel(state.view)
+        if mode == SELECT:
+            window.run_command('_vi_select_big_j', {'mode': mode})
+        else:
+            enter_normal_mode(window, mode)
+            state.reset_command_data()
+        return
 
-        _log.debug('mode: %s', mode)
+    state.sequence += key
+    state.display_status()
 
-        # If the user has made selections with the mouse, we may be in an
-        # inconsistent state. Try to remedy that.
-        if (state.view.has_non_empty_selection_region() and mode not in (VISUAL, VISUAL_LINE, VISUAL_BLOCK, SELECT)):
-            init_state(state.view)
+    if state.must_capture_register_name:
+        _log.debug('capturing register name...')
+        state.register = key
+        state.partial_sequence = ''
 
-        if key.lower() == '<esc>':
-            if mode == SELECT:
-                self.window.run_command('_vi_select_big_j', {'mode': mode})
-            else:
-                enter_normal_mode(self.window, mode)
-                state.reset_command_data()
-            return
+        return
 
-        state.sequence += key
-        state.display_status()
+    if state.must_collect_input:
+        _log.debug('collecting input...')
+        state.process_input(key)
+        if state.runnable():
+            _log.debug('state is runnable')
+            if do_eval:
+                _log.debug('evaluating state...')
+                state.eval()
+                state.reset_command_data()
 
-        if state.must_capture_register_name:
-            _log.debug('capturing register name...')
-            state.register = key
-            state.partial_sequence = ''
+        return
 
-            return
+    # If the user has defined any mappings that starts with a number
+    # (count), or " (register character), we need to skip the count handler
+    # and go straight to resolving the mapping, otherwise it won't resolve.
+    # See https://github.com/NeoVintageous/NeoVintageous/issues/434.
+    if not mappings_can_resolve(state.mode, state.partial_sequence + key):
+        if repeat_count:
+            state.action_count = str(repeat_count)
 
-        if state.must_collect_input:
-            _log.debug('collecting input...')
-            state.process_input(key)
-            if state.runnable():
-                _log.debug('state is runnable')
-                if do_eval:
-                    _log.debug('evaluating state...')
-                    state.eval()
-                    state.reset_command_data()
+        if _handle_count(state, key, repeat_count):
+            _log.debug('handled count')
 
             return
 
-        # If the user has defined any mappings that starts with a number
-        # (count), or " (register character), we need to skip the count handler
-        # and go straight to resolving the mapping, otherwise it won't resolve.
-        # See https://github.com/NeoVintageous/NeoVintageous/issues/434.
-        if not mappings_can_resolve(state.mode, state.partial_sequence + key):
-            if repeat_count:
-                state.action_count = str(repeat_count)
+    state.partial_sequence += key
 
-            if self._handle_count(state, key, repeat_count):
-                _log.debug('handled count')
+    if check_user_mappings and mappings_is_incomplete(state.mode, state.partial_sequence):
+        _log.debug('found incomplete mapping')
 
-                return
+        return
 
-        state.partial_sequence += key
+    command = mappings_resolve(state, check_user_mappings=check_user_mappings)
 
-        if check_user_mappings and mappings_is_incomplete(state.mode, state.partial_sequence):
-            _log.debug('found incomplete mapping')
+    if isinstance(command, ViOpenRegister):
+        state.must_capture_register_name = True
+        return
 
-            return
+    if isinstance(command, Mapping):
+        # TODO Review What happens if Mapping + do_eval=False
+        if do_eval:
+            _log.debug('evaluating user mapping (mode=%s)...', state.mode)
 
-        command = mappings_resolve(state, check_user_mappings=check_user_mappings)
+            # TODO Review Why does rhs of mapping need to be resequenced in OPERATOR PENDING mode?
+            rhs = command.rhs
+            if state.mode == OPERATOR_PENDING:
+                rhs = state.sequence[:-len(state.partial_sequence)] + command.rhs
 
-        if isinstance(command, ViOpenRegister):
-            state.must_capture_register_name = True
-            return
+            # TODO Review Why does state need to be reset before running user mapping?
+            reg = state.register
+            acount = state.action_count
+            mcount = state.motion_count
+            state.reset_command_data()
+            state.register = reg
+            state.motion_count = mcount
+            state.action_count = acount
 
-        if isinstance(command, Mapping):
-            # TODO Review What happens if Mapping + do_eval=False
-            if do_eval:
-                _log.debug('evaluating user mapping (mode=%s)...', state.mode)
+            _log.info('user mapping %s -> %s', command.lhs, rhs)
 
-                # TODO Review Why does rhs of mapping need to be resequenced in OPERATOR PENDING mode?
-                rhs = command.rhs
-                if state.mode == OPERATOR_PENDING:
-                    rhs = state.sequence[:-len(state.partial_sequence)] + command.rhs
+            if ':' in rhs:
 
-                # TODO Review Why does state need to be reset before running user mapping?
-                reg = state.register
-                acount = state.action_count
-                mcount = state.motion_count
-                state.reset_command_data()
-                state.register = reg
-                state.motion_count = mcount
-                state.action_count = acount
+                # This hacky piece of code (needs refactoring), is to
+                # support mappings in the format of {seq}:{ex-cmd}<CR>{seq},
+                # where leading and trailing sequences are optional.
+                #
+                # Examples:
+                #
+                # * :sort<CR>
+                # * vi]:sort u<CR>
+                # * vi]:sort u<CR>vi]y<Esc>
 
-                _log.info('user mapping %s -> %s', command.lhs, rhs)
+                colon_pos = rhs.find(':')
+                leading = rhs[:colon_pos]
+                rhs = rhs[colon_pos:]
 
-                if ':' in rhs:
+                cr_pos = rhs.lower().find('<cr>')
+                if cr_pos == -1:
+                    status_message('invalid malformed mapping')
+                    return
 
-                    # This hacky piece of code (needs refactoring), is to
-                    # support mappings in the format of {seq}:{ex-cmd}<CR>{seq},
-                    # where leading and trailing sequences are optional.
-                    #
-                    # Examples:
-                    #
-                    # * :sort<CR>
-                    # * vi]:sort u<CR>
-                    # * vi]:sort u<CR>vi]y<Esc>
+                command = rhs[:cr_pos + 4]
+                trailing = rhs[cr_pos + 4:]
 
-                    colon_pos = rhs.find(':')
-                    leading = rhs[:colon_pos]
-                    rhs = rhs[colon_pos:]
+                _log.debug('parsed user mapping before="%s", cmd="%s", after="%s"', leading, command, trailing)
 
-                    cr_pos = rhs.lower().find('<cr>')
-                    if cr_pos == -1:
-                        status_message('invalid malformed mapping')
-                        return
+                if leading:
+                    _process_notation(window, leading, check_user_mappings=False)
 
-                    command = rhs[:cr_pos + 4]
-                    trailing = rhs[cr_pos + 4:]
+                do_ex_user_cmdline(window, command)
 
-                    _log.debug('parsed user mapping before="%s", cmd="%s", after="%s"', leading, command, trailing)
+                if trailing:
+                    _process_notation(window, trailing, check_user_mappings=False)
 
-                    if leading:
-                        self.window.run_command('_nv_process_notation', {
-                            'keys': leading, 'check_user_mappings': False})
+            else:
+                _process_notation(window, rhs, check_user_mappings=False)
 
-                    do_ex_user_cmdline(self.window, command)
+        return
 
-                    if trailing:
-                        self.window.run_command('_nv_process_notation', {
-                            'keys': trailing, 'check_user_mappings': False})
+    if isinstance(command, ViOpenNameSpace):
+        return
 
-                else:
-                    self.window.run_command('_nv_process_notation', {'keys': rhs, 'check_user_mappings': False})
+    if isinstance(command, ViMissingCommandDef):
 
-            return
+        # TODO We shouldn't need to try resolve the command again. The
+        # resolver should handle commands correctly the first time. The
+        # reason this logic is still needed is because we might be looking
+        # at a command like 'dd', which currently doesn't resolve properly.
+        # The first 'd' is mapped for NORMAL mode, but 'dd' is not mapped in
+        # OPERATOR PENDING mode, so we get a missing command, and here we
+        # try to fix that (user mappings are excluded, since they've already
+        # been given a chance to evaluate).
 
-        if isinstance(command, ViOpenNameSpace):
+        if state.mode == OPERATOR_PENDING:
+            command = mappings_resolve(state, sequence=to_bare_command_name(state.sequence),
+                                       mode=NORMAL, check_user_mappings=False)
+        else:
+            command = mappings_resolve(state, sequence=to_bare_command_name(state.sequence))
+
+        if _handle_missing_command(state, command):
             return
 
-        if isinstance(command, ViMissingCommandDef):
+    if (state.mode == OPERATOR_PENDING and isinstance(command, ViOperatorDef)):
 
-            # TODO We shouldn't need to try resolve the command again. The
-            # resolver should handle commands correctly the first time. The
-            # reason this logic is still needed is because we might be looking
-            # at a command like 'dd', which currently doesn't resolve properly.
-            # The first 'd' is mapped for NORMAL mode, but 'dd' is not mapped in
-            # OPERATOR PENDING mode, so we get a missing command, and here we
-            # try to fix that (user mappings are excluded, since they've already
-            # been given a chance to evaluate).
+        # TODO This should be unreachable code. The mapping resolver should
+        # handle anything that can still reach this point (the first time).
+        # We're expecting a motion, but we could still get an action. For
+        # example, dd, g~g~ or g~~ remove counts. It looks like it might
+        # only be the '>>' command that needs this code.
 
-            if state.mode == OPERATOR_PENDING:
-                command = mappings_resolve(state, sequence=to_bare_command_name(state.sequence),
-                                           mode=NORMAL, check_user_mappings=False)
-            else:
-                command = mappings_resolve(state, sequence=to_bare_command_name(state.sequence))
+        command = mappings_resolve(state, sequence=to_bare_command_name(state.sequence), mode=NORMAL)
+        if _handle_missing_command(state, command):
+            return
 
-            if self._handle_missing_command(state, command):
-                return
+        if not command['motion_required']:
+            state.mode = NORMAL
 
-        if (state.mode == OPERATOR_PENDING and isinstance(command, ViOperatorDef)):
+    state.set_command(command)
 
-            # TODO This should be unreachable code. The mapping resolver should
-            # handle anything that can still reach this point (the first time).
-            # We're expecting a motion, but we could still get an action. For
-            # example, dd, g~g~ or g~~ remove counts. It looks like it might
-            # only be the '>>' command that needs this code.
+    if state.mode == OPERATOR_PENDING:
+        state.reset_partial_sequence()
 
-            command = mappings_resolve(state, sequence=to_bare_command_name(state.sequence), mode=NORMAL)
-            if self._handle_missing_command(state, command):
-                return
+    if do_eval:
+        state.eval()
 
-            if not command['motion_required']:
-                state.mode = NORMAL
 
-        state.set_command(command)
+def _handle_count(state, key, repeat_count):
+    """Return True if the processing of the current key needs to stop."""
+    if not state.action and key.isdigit():
+        if not repeat_count and (key != '0' or state.action_count):
+            _log.debug('action count digit %s', key)
+            state.action_count += key
 
-        if state.mode == OPERATOR_PENDING:
-            state.reset_partial_sequence()
+            return True
 
-        if do_eval:
-            state.eval()
+    if (state.action and (state.mode == OPERATOR_PENDING) and key.isdigit()):
+        if not repeat_count and (key != '0' or state.motion_count):
+            _log.debug('motion count digit %s', key)
+            state.motion_count += key
 
-    def _handle_count(self, state, key, repeat_count):
-        """Return True if the processing of the current key needs to stop."""
-        if not state.action and key.isdigit():
-            if not repeat_count and (key != '0' or state.action_count):
-                _log.debug('action count digit %s', key)
-                state.action_count += key
+            return True
 
-                return True
 
-        if (state.action and (state.mode == OPERATOR_PENDING) and key.isdigit()):
-            if not repeat_count and (key != '0' or state.motion_count):
-                _log.debug('motion count digit %s', key)
-                state.motion_count += key
+def _handle_missing_command(state, command):
+    if isinstance(command, ViMissingCommandDef):
+        if state.mode == OPERATOR_PENDING:
+            state.mode = NORMAL
 
-                return True
+        state.reset_command_data()
+        ui_bell()
 
-    def _handle_missing_command(self, state, command):
-        if isinstance(command, ViMissingCommandDef):
+        return True
+
+    return False
+
+
+def _active_state(window, state):
+    # The active view can change while a key sequence is run, for example by
+    # a mapping that switches buffers, in which case a new state is needed.
+    view = window.active_view()
+    if view and view.id() != state.view.id():
+        return State(view)
+
+    return state
+
+
+def _process_notation(window, keys, repeat_count=None, check_user_mappings=True):
+    # Run a key sequence.
+    #
+    # The keys are fed straight into the feed key logic with a single state
+    # object, rather than dispatching a _nv_feed_key command for each key.
+    #
+    # Args:
+    #   window (Window):
+    #   keys (str): Key sequence to be run.
+    #   repeat_count (int): Count to be applied when repeating through the
+    #       '.' command.
+    #   check_user_mappings (bool): Whether user mappings should be
+    #       consulted to expand key sequences.
+    state = State(window.active_view())
+    initial_mode = state.mode
+    # Disable interactive prompts. For example, to supress interactive
+    # input collection in /foo<CR>.
+    state.non_interactive = True
+
+    _log.debug('process notation keys %s for initial mode %s', keys, initial_mode)
+
+    # First, run any motions coming before the first action. We don't keep
+    # these in the undo stack, but they will still be repeated via '.'.
+    # This ensures that undoing will leave the caret where the  first
+    # editing action started. For example, 'lldl' would skip 'll' in the
+    # undo history, but store the full sequence for '.' to use.
+    leading_motions = ''
+    for key in KeySequenceTokenizer(keys).iter_tokenize():
+        state = _active_state(window, state)
+        _feed_key(window, state, key, repeat_count=repeat_count, do_eval=False,
+                  check_user_mappings=check_user_mappings)
+
+        if state.action:
+            # The last key press has caused an action to be primed. That
+            # means there are  no more leading motions. Break out of here.
+            _log.debug('first action found in %s', state.sequence)
+            state.reset_command_data()
             if state.mode == OPERATOR_PENDING:
                 state.mode = NORMAL
 
-            state.reset_command_data()
-            ui_bell()
-
-            return True
+            break
 
-        return False
+        elif state.runnable():
+            # Run any primed motion.
+            leading_motions += state.sequence
+            state.eval()
+            state.reset_command_data()
 
+        else:
+            state.eval()
 
-class _nv_process_notation(ViWindowCommandBase):
+    if state.must_collect_input:
+        # State is requesting more input, so this is the last command  in
+        # the sequence and it needs more input.
+        _collect_input(window, state)
+        return
 
-    def run(self, keys, repeat_count=None, check_user_mappings=True):
-        # Args:
-        #   keys (str): Key sequence to be run.
-        #   repeat_count (int): Count to be applied when repeating through the
-        #       '.' command.
-        #   check_user_mappings (bool): Whether user mappings should be
-        #       consulted to expand key sequences.
-        state = self.state
-        initial_mode = state.mode
-        # Disable interactive prompts. For example, to supress interactive
-        # input collection in /foo<CR>.
-        state.non_interactive = True
-
-        _log.debug('process notation keys %s for initial mode %s', keys, initial_mode)
-
-        # First, run any motions coming before the first action. We don't keep
-        # these in the undo stack, but they will still be repeated via '.'.
-        # This ensures that undoing will leave the caret where the  first
-        # editing action started. For example, 'lldl' would skip 'll' in the
-        # undo history, but store the full sequence for '.' to use.
-        leading_motions = ''
-        for key in KeySequenceTokenizer(keys).iter_tokenize():
-            self.window.run_command('_nv_feed_key', {
-                'key': key,
-                'do_eval': False,
-                'repeat_count': repeat_count,
-                'check_user_mappings': check_user_mappings
-            })
+    # Strip the already run commands
+    if leading_motions:
+        if ((len(leading_motions) == len(keys)) and (not state.must_collect_input)):
+            state.non_interactive = False
+            return
 
-            if state.action:
-                # The last key press has caused an action to be primed. That
-                # means there are  no more leading motions. Break out of here.
-                _log.debug('first action found in %s', state.sequence)
-                state.reset_command_data()
-                if state.mode == OPERATOR_PENDING:
-                    state.mode = NORMAL
+        keys = keys[len(leading_motions):]
 
-                break
-
-            elif state.runnable():
-                # Run any primed motion.
-                leading_motions += state.sequence
-                state.eval()
-                state.reset_command_data()
+    if not (state.motion and not state.action):
+        with gluing_undo_groups(window.active_view(), state):
+            try:
+                for key in KeySequenceTokenizer(keys).iter_tokenize():
+                    if key.lower() == '<esc>':
+                        # XXX: We should pass a mode here?
+                        enter_normal_mode(window, None)
+                        continue
 
-            else:
-                state.eval()
+                    state = _active_state(window, state)
+                    if state.mode not in (INSERT, REPLACE):
+                        _feed_key(window, state, key, repeat_count=repeat_count,
+                                  check_user_mappings=check_user_mappings)
+                    else:
+                        window.run_command('insert', {
+                            'characters': translate_char(key)
+                        })
 
-        if state.must_collect_input:
-            # State is requesting more input, so this is the last command  in
-            # the sequence and it needs more input.
-            self.collect_input()
-            return
+                if not state.must_collect_input:
+                    return
 
-        # Strip the already run commands
-        if leading_motions:
-            if ((len(leading_motions) == len(keys)) and (not state.must_collect_input)):
+            finally:
                 state.non_interactive = False
-                return
+                # Ensure we set the full command for "." to use, but don't
+                # store "." alone.
+                if (leading_motions + keys) not in ('.', 'u', '<C-r>'):
+                    state.repeat_data = ('vi', (leading_motions + keys), initial_mode, None)
 
-            keys = keys[len(leading_motions):]
-
-        if not (state.motion and not state.action):
-            with gluing_undo_groups(self.window.active_view(), state):
-                try:
-                    for key in KeySequenceTokenizer(keys).iter_tokenize():
-                        if key.lower() == '<esc>':
-                            # XXX: We should pass a mode here?
-                            enter_normal_mode(self.window, None)
-                            continue
-
-                        elif state.mode not in (INSERT, REPLACE):
-                            self.window.run_command('_nv_feed_key', {
-                                'key': key,
-                                'repeat_count': repeat_count,
-                                'check_user_mappings': check_user_mappings
-                            })
-                        else:
-                            self.window.run_command('insert', {
-                                'characters': translate_char(key)
-                            })
+    # We'll reach this point if we have a command that requests input whose
+    # input parser isn't satistied. For example, `/foo`. Note that
+    # `/foo<CR>`, on the contrary, would have satisfied the parser.
 
-                    if not state.must_collect_input:
-                        return
+    _log.debug('unsatisfied parser action = %s, motion=%s', state.action, state.motion)
 
-                finally:
-                    state.non_interactive = False
-                    # Ensure we set the full command for "." to use, but don't
-                    # store "." alone.
-                    if (leading_motions + keys) not in ('.', 'u', '<C-r>'):
-                        state.repeat_data = ('vi', (leading_motions + keys), initial_mode, None)
+    if (state.action and state.motion):
+        # We have a parser an a motion that can collect data. Collect data
+        # interactively.
+        motion_data = state.motion.translate(state) or None
 
-        # We'll reach this point if we have a command that requests input whose
-        # input parser isn't satistied. For example, `/foo`. Note that
-        # `/foo<CR>`, on the contrary, would have satisfied the parser.
+        if motion_data is None:
+            state.reset_command_data()
+            ui_bell()
+            return
 
-        _log.debug('unsatisfied parser action = %s, motion=%s', state.action, state.motion)
+        run_motion(window, motion_data)
+        return
 
-        if (state.action and state.motion):
-            # We have a parser an a motion that can collect data. Collect data
-            # interactively.
-            motion_data = state.motion.translate(state) or None
+    _collect_input(window, state)
 
-            if motion_data is None:
-                state.reset_command_data()
-                ui_bell()
-                return
 
-            run_motion(self.window, motion_data)
-            return
+def _collect_input(window, state):
+    try:
+        motion = state.motion
+        action = state.action
 
-        self.collect_input()
+        command = None
 
-    def collect_input(self):
-        try:
-            motion = self.state.motion
-            action = self.state.action
+        if motion and action:
+            if motion.accept_input:
+                command = motion
+            else:
+                command = action
+        else:
+            command = action or motion
 
-            command = None
+        if command.input_parser and command.input_parser.is_interactive():
+            command.input_parser.run_interactive_command(window, command.inp)
 
-            if motion and action:
-                if motion.accept_input:
-                    command = motion
-                else:
-                    command = action
-            else:
-                command = action or motion
+    except IndexError:
+        _log.debug('could not find a command to collect more user input')
+        ui_bell()
+    finally:
+        state.non_interactive = False
 
-            if command.input_parser and command.input_parser.is_interactive():
-                command.input_parser.run_interactive_command(self.window, command.inp)
 
-        except IndexError:
-            _log.debug('could not find a command to collect more user input')
-            ui_bell()
-        finally:
-            self.state.non_interactive = False
+class _nv_process_notation(ViWindowCommandBase):
+
+    def run(self, keys, repeat_count=None, check_user_mappings=True):
+        _process_notation(self.window, keys, repeat_count, check_user_mappings)
+        sync_vintage_settings(self.view)
 
 
 class _nv_replace_line(TextCommand):
@@ -822,6 +856,15 @@ class _nv_replace_line(TextCommand):
         self.view.replace(edit, Region(pt, self.view.line(pt).b), with_what)
 
 
+class _nv_filter_apply(TextCommand):
+
+    # Applies a shell filter that has finished in the background. See
+    # filter_thru_shell().
+
+    def run(self, edit):
+        filter_apply(self.view, edit)
+
+
 class _nv_ex_cmd_edit_wrap(TextCommand):
 
     # This command is required to wrap ex commands that need a Sublime Text edit
@@ -1216,6 +1259,7 @@ class _enter_normal_mode(ViTextCommandBase):
         self.view.set_overwrite_status(False)
 
         state.enter_normal_mode()
+        sync_vintage_settings(self.view)
 
         # XXX: st bug? if we don't do this, selections won't be redrawn
         self.view.run_command('_enter_normal_mode_impl', {'mode': mode})
@@ -1367,6 +1411,7 @@ class _enter_insert_mode(ViTextCommandBase):
         self.state.enter_insert_mode()
         self.state.normal_insert_count = str(count)
         self.state.display_status()
+        sync_vintage_settings(self.view)
 
 
 class _enter_visual_mode(ViTextCommandBase):
@@ -1498,6 +1543,7 @@ class _enter_replace_mode(ViTextCommandBase):
         regions_transformer(self.view, f)
         state.display_status()
         state.reset()
+        sync_vintage_settings(self.view)
 
 
 class _vi_dot(ViWindowCommandBase):
@@ -1529,7 +1575,7 @@ class _vi_dot(ViWindowCommandBase):
             return ui_bell()
 
         if type_ == 'vi':
-            self.window.run_command('_nv_process_notation', {'keys': seq_or_cmd, 'repeat_count': count})
+            _process_notation(self.window, seq_or_cmd, repeat_count=count)
         elif type_ == 'native':
             sels = list(self.window.active_view().sel())
             # FIXME: We're not repeating as we should. It's the motion that
@@ -2256,6 +2302,31 @@ def _indent_text(view, text, sel):
     )
 
 
+# Counted pastes are inserted in chunks of about this many characters, see
+# _insert_repeated().
+_PASTE_CHUNK_SIZE = 1048576
+
+
+def _insert_repeated(view, edit, pt, text, count):
+    # type: (...) -> int
+    # Insert text count times at pt, without building the whole repeated text,
+    # which can be very large.
+    #
+    # Returns:
+    #   int: The size of the text inserted.
+    repeat = max(1, min(count, _PASTE_CHUNK_SIZE // max(len(text), 1)))
+    chunks, rest = divmod(count, repeat)
+
+    chunk = text * repeat
+    for i in range(chunks):
+        view.insert(edit, pt, chunk)
+
+    if rest:
+        view.insert(edit, pt, text * rest)
+
+    return len(text) * count
+
+
 class _vi_paste(ViTextCommandBase):
 
     def run(self, edit, before_cursor, mode=None, count=1, register=None, adjust_indent=False, adjust_cursor=False):
@@ -2290,8 +2361,6 @@ class _vi_paste(ViTextCommandBase):
 
                     linewise = True
 
-                text *= count
-
                 # If register content is from a linewise operation, then the cursor
                 # is put on the first non-blank character of the first line of the
                 # content after the content is inserted.
@@ -2303,10 +2372,10 @@ class _vi_paste(ViTextCommandBase):
                     else:
                         pt = self.view.text_point(row + 1, 0)
 
-                    self.view.insert(edit, pt, text)
+                    size = _insert_repeated(self.view, edit, pt, text, count)
 
                     if adjust_cursor:
-                        pt += len(text) + 1
+                        pt += size + 1
                     else:
                         pt = next_non_blank(self.view, pt)
 
@@ -2322,12 +2391,12 @@ class _vi_paste(ViTextCommandBase):
                     else:
                         pt = min(sel.a + 1, self.view.size())
 
-                    self.view.insert(edit, pt, text)
+                    size = _insert_repeated(self.view, edit, pt, text, count)
 
                     if adjust_cursor:
-                        pt += len(text)
+                        pt += size
                     elif '\n' not in text:
-                        pt += len(text) - 1
+                        pt += size - 1
 
                     self.view.sel().add(pt)
 
@@ -2797,27 +2866,29 @@ class _vi_at(IrreversibleTextCommand):
         if not macros.is_valid_readable_register(name):
             return ui_bell("E354: Invalid register name: '" + name + "'")
 
-        cmds = macros.get_recorded(window, name)
-        if not cmds:
+        plan = macros.get_replay_plan(window, name)
+        if not plan:
             return
 
         macros.set_last_used_register_name(window, name)
 
         state = State(self.view)
-        for i in range(count):
-            for cmd, args in cmds:
-                if 'xpos' in args:
-                    state.update_xpos(force=True)
-                    args['xpos'] = State(self.view).xpos
-                elif args.get('motion'):
-                    motion = args.get('motion')
-                    if motion and 'motion_args' in motion and 'xpos' in motion['motion_args']:
+        bell_count = ui_bell_count()
+
+        # The steps are Sublime Text commands, so they are dispatched rather
+        # than run in-process, and their edits are glued into one undo group.
+        with gluing_undo_groups(self.view, state):
+            for i in range(count):
+                for cmd, args, with_xpos in plan:
+                    if with_xpos is not None:
                         state.update_xpos(force=True)
-                        motion = args.get('motion')
-                        motion['motion_args']['xpos'] = State(self.view).xpos
-                        args['motion'] = motion
+                        args = with_xpos(args, state.xpos)
 
-                self.view.window().run_command(cmd, args)
+                    window.run_command(cmd, args)
+
+                    # Like Vim, stop at the first command that fails.
+                    if ui_bell_count() != bell_count:
+                        return
 
 
 class _enter_visual_block_mode(ViTextCommandBase):
@@ -3322,7 +3393,7 @@ class _vi_slash_impl(ViMotionCommand, BufferSearchBase):
             return
 
         regions_transformer(self.view, f)
-        self.hilite(search_string)
+        self.hilite(search_string, match)
 
 
 class _vi_slash_on_parser_done(WindowCommand):
@@ -3366,7 +3437,7 @@ class _vi_l(ViMotionCommand):
 
             return s
 
-        regions_transformer(self.view, f)
+        regions_transformer_batched(self.view, f)
 
 
 class _vi_h(ViMotionCommand):
@@ -3380,7 +3451,7 @@ class _vi_h(ViMotionCommand):
             elif mode in (VISUAL, VISUAL_BLOCK):
 
                 if s.a < s.b:
-                    if mode == VISUAL_BLOCK and self.view.rowcol(s.b - 1)[1] == baseline:
+                    if mode == VISUAL_BLOCK and view.rowcol(s.b - 1)[1] == baseline:
                         return s
 
                     x_limit = max(view.line(s.b - 1).a + 1, s.b - count)
@@ -3416,7 +3487,7 @@ class _vi_h(ViMotionCommand):
                 if any(self.view.rowcol(r.b - 1)[1] != min_ for r in self.view.sel()):
                     baseline = min_
 
-        regions_transformer(self.view, f)
+        regions_transformer_batched(self.view, f)
 
 
 class _vi_j(ViMotionCommand):
@@ -3447,7 +3518,7 @@ class _vi_j(ViMotionCommand):
                 target_row = min(current_row + count, view.rowcol(view.size())[0])
                 target_pt = view.text_point(target_row, 0)
                 _, xpos = calculate_xpos(view, target_pt, xpos)
-                end = min(self.view.line(target_pt).b, target_pt + xpos)
+                end = min(view.line(target_pt).b, target_pt + xpos)
 
                 if s.a < s.b:
                     s = Region(s.a, end + 1)
@@ -3486,7 +3557,7 @@ class _vi_j(ViMotionCommand):
             visual_block.transform_target(next_line_target_pt)
             return
 
-        regions_transformer(self.view, f)
+        regions_transformer_batched(self.view, f)
 
 
 class _vi_k(ViMotionCommand):
@@ -3516,9 +3587,9 @@ class _vi_k(ViMotionCommand):
                 target_row = max(current_row - count, 0)
                 target_pt = view.text_point(target_row, 0)
                 _, xpos = calculate_xpos(view, target_pt, xpos)
-                end = min(self.view.line(target_pt).b, target_pt + xpos)
+                end = min(view.line(target_pt).b, target_pt + xpos)
                 if s.b >= s.a:
-                    if (self.view.line(s.a).contains(s.b - 1) and not self.view.line(s.a).contains(target_pt)):
+                    if (view.line(s.a).contains(s.b - 1) and not view.line(s.a).contains(target_pt)):
                         s = Region(s.a + 1, end)
                     else:
                         if (target_pt + xpos) < s.a:
@@ -3558,7 +3629,7 @@ class _vi_k(ViMotionCommand):
             visual_block.transform_target(prev_line_target_pt)
             return
 
-        regions_transformer(self.view, f)
+        regions_transformer_batched(self.view, f)
 
 
 class _vi_gg(ViMotionCommand):
@@ -3671,7 +3742,7 @@ class _vi_w(ViMotionCommand):
 
             return s
 
-        regions_transformer(self.view, f)
+        regions_transformer_batched(self.view, f)
 
 
 class _vi_big_w(ViMotionCommand):
@@ -3695,7 +3766,7 @@ class _vi_big_w(ViMotionCommand):
 
             return s
 
-        regions_transformer(self.view, f)
+        regions_transformer_batched(self.view, f)
 
 
 class _vi_e(ViMotionCommand):
@@ -3726,7 +3797,7 @@ class _vi_e(ViMotionCommand):
 
             return s
 
-        regions_transformer(self.view, f)
+        regions_transformer_batched(self.view, f)
 
 
 class _vi_zero(ViMotionCommand):
@@ -3857,10 +3928,18 @@ class _vi_percent(ViMotionCommand):
                     if not bracket:
                         return
 
+                    # An escaped bracket is matched by an escaped bracket,
+                    # otherwise escaped brackets are ignored.
+                    escaped = self.view.substr(bracket_pt - 1) == '\\'
+                    patterns = (re.escape(brackets[0]), re.escape(brackets[1]))
+
                     if bracket == brackets[0]:
-                        return self.find_balanced_closing_bracket(bracket_pt + 1, brackets)
+                        found = find_balanced_bracket(self.view, bracket_pt + 1, patterns, escaped=escaped)
                     else:
-                        return self.find_balanced_opening_bracket(bracket_pt, brackets)
+                        found = find_balanced_bracket(self.view, bracket_pt, patterns, forward=False, escaped=escaped)
+
+                    if found:
+                        return found.a
 
                 if mode == VISUAL:
                     found = find_bracket_location(s)
@@ -3975,89 +4054,6 @@ class _vi_percent(ViMotionCommand):
         return (found_brackets[1], (bracket_a, bracket_b),
                 self.view.text_point(caret_row, caret_col + found_brackets[0]))
 
-    def find_balanced_closing_bracket(self, start, brackets, unbalanced=0):
-        # Returns:
-        #   Region|None
-        new_start = start
-        for i in range(unbalanced or 1):
-            next_closing_bracket = find_in_range(
-                self.view,
-                brackets[1],
-                start=new_start,
-                end=self.view.size(),
-                flags=LITERAL
-            )
-
-            if next_closing_bracket is None:  # Unbalanced brackets; nothing we can do.
-                return
-
-            new_start = next_closing_bracket.end()
-
-        nested = 0
-        while True:
-            next_opening_bracket = find_in_range(
-                self.view,
-                brackets[0],
-                start=start,
-                end=next_closing_bracket.end(),
-                flags=LITERAL
-            )
-
-            if not next_opening_bracket:
-                break
-
-            nested += 1
-            start = next_opening_bracket.end()
-
-        if nested > 0:
-            return self.find_balanced_closing_bracket(
-                next_closing_bracket.end(),
-                brackets,
-                nested
-            )
-        else:
-            return next_closing_bracket.begin()
-
-    def find_balanced_opening_bracket(self, start, brackets, unbalanced=0):
-        new_start = start
-        for i in range(unbalanced or 1):
-            prev_opening_bracket = reverse_search_by_pt(
-                self.view, brackets[0],
-                start=0,
-                end=new_start,
-                flags=LITERAL
-            )
-
-            # Unbalanced brackets; nothing we can do.
-            if prev_opening_bracket is None:
-                return
-
-            new_start = prev_opening_bracket.begin()
-
-        nested = 0
-        while True:
-            next_closing_bracket = reverse_search_by_pt(
-                self.view, brackets[1],
-                start=prev_opening_bracket.a,
-                end=start,
-                flags=LITERAL
-            )
-
-            if not next_closing_bracket:
-                break
-
-            nested += 1
-            start = next_closing_bracket.begin()
-
-        if nested > 0:
-            return self.find_balanced_opening_bracket(
-                prev_opening_bracket.begin(),
-                brackets,
-                nested
-            )
-        else:
-            return prev_opening_bracket.begin()
-
 
 class _vi_big_h(ViMotionCommand):
     def run(self, mode=None, count=None):
@@ -4131,6 +4127,7 @@ class _vi_star(ViMotionCommand, ExactWordBufferSearchBase):
             )
 
             if match:
+                matches.append(match)
                 if mode == NORMAL:
                     s = Region(match.begin())
                 elif mode == VISUAL:
@@ -4144,13 +4141,14 @@ class _vi_star(ViMotionCommand, ExactWordBufferSearchBase):
 
         state = self.state
         query = search_string or self.get_query()
+        matches = []
 
         jumplist_update(self.view)
         regions_transformer(self.view, f)
         jumplist_update(self.view)
 
         if query:
-            self.hilite(query)
+            self.hilite(query, matches[0] if matches else None)
             state.last_buffer_search = query
 
         if not search_string:
@@ -4174,6 +4172,7 @@ class _vi_octothorp(ViMotionCommand, ExactWordBufferSearchBase):
             )
 
             if match:
+                matches.append(match)
                 if mode == NORMAL:
                     s = Region(match.begin())
                 elif mode == VISUAL:
@@ -4187,6 +4186,7 @@ class _vi_octothorp(ViMotionCommand, ExactWordBufferSearchBase):
 
         state = self.state
         query = search_string or self.get_query()
+        matches = []
 
         jumplist_update(self.view)
         start_sel = self.view.sel()[0]
@@ -4194,7 +4194,7 @@ class _vi_octothorp(ViMotionCommand, ExactWordBufferSearchBase):
         jumplist_update(self.view)
 
         if query:
-            self.hilite(query)
+            self.hilite(query, matches[0] if matches else None)
             state.last_buffer_search = query
 
         if not search_string:
@@ -4221,7 +4221,7 @@ class _vi_b(ViMotionCommand):
 
             return s
 
-        regions_transformer(self.view, f)
+        regions_transformer_batched(self.view, f)
 
 
 class _vi_big_b(ViMotionCommand):
@@ -4243,7 +4243,7 @@ class _vi_big_b(ViMotionCommand):
 
             return s
 
-        regions_transformer(self.view, f)
+        regions_transformer_batched(self.view, f)
 
 
 class _vi_underscore(ViMotionCommand):
@@ -4465,7 +4465,7 @@ class _vi_ge(ViMotionCommand):
 
             return s
 
-        regions_transformer(self.view, f)
+        regions_transformer_batched(self.view, f)
 
 
 class _vi_g_big_e(ViMotionCommand):
@@ -4486,7 +4486,7 @@ class _vi_g_big_e(ViMotionCommand):
 
             return s
 
-        regions_transformer(self.view, f)
+        regions_transformer_batched(self.view, f)
 
 
 class _vi_left_paren(ViMotionCommand):
@@ -4570,7 +4570,7 @@ class _vi_question_mark_impl(ViMotionCommand, BufferSearchBase):
             return status_message('Pattern not found')
 
         regions_transformer(self.view, f)
-        self.hilite(search_string)
+        self.hilite(search_string, found)
 
 
 class _vi_question_mark(ViMotionCommand, BufferSearchBase):
@@ -4757,7 +4757,7 @@ class _vi_big_e(ViMotionCommand):
 
             return s
 
-        regions_transformer(self.view, f)
+        regions_transformer_batched(self.view, f)
 
 
 class _vi_ctrl_f(ViMotionCommand):
@@ -20,11 +20,15 @@ from sublime import OP_NOT_EQUAL
 from sublime_plugin import EventListener
 
 from NeoVintageous.nv.modeline import do_modeline
+from NeoVintageous.nv.shell import filter_cancel
 from NeoVintageous.nv.state import init_state
 from NeoVintageous.nv.state import State
 from NeoVintageous.nv.utils import fix_eol_cursor
 from NeoVintageous.nv.utils import is_view
 from NeoVintageous.nv.vi import settings
+from NeoVintageous.nv.vi.marks import marks_destroy
+from NeoVintageous.nv.vi.search import search_index_destroy
+from NeoVintageous.nv.vi.units import line_index_destroy
 from NeoVintageous.nv.vim import enter_normal_mode
 from NeoVintageous.nv.vim import is_ex_mode
 from NeoVintageous.nv.vim import NORMAL
@@ -220,8 +224,16 @@ class NeoVintageousEvents(EventListener):
         # TODO Kill State dependency
         fix_eol_cursor(view, State(view).mode)
 
+    def on_pre_close(self, view):
+        # The marks are read from the view, so they must be released before it
+        # is closed.
+        marks_destroy(view)
+
     def on_close(self, view):
         settings.destroy(view)
+        search_index_destroy(view)
+        line_index_destroy(view)
+        filter_cancel(view)
 
     def on_activated(self, view):
 
@@ -15,6 +15,8 @@
 # You should have received a copy of the GNU General Public License
 # along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
 
+from collections import OrderedDict
+import copy
 import logging
 
 from NeoVintageous.nv.ex.nodes import CommandLineNode
@@ -36,6 +38,14 @@ from NeoVintageous.nv.ex.tokens import TokenSemicolon
 
 _log = logging.getLogger(__name__)
 
+# Parsed command lines keyed by source, least recently used first. The cached
+# nodes are templates: they must never be handed out, only copies of them, see
+# _copy_command_line().
+_cache = OrderedDict()  # type: OrderedDict
+_cache_maxsize = 128
+_cache_hits = 0
+_cache_misses = 0
+
 
 class _ParserState:
 
@@ -57,6 +67,65 @@ class _ParserState:
 def parse_command_line(source):
     # type: (str) -> CommandLineNode
 
+    # Parsed command lines are cached by source. Callers always receive a copy
+    # of the cached node, so they are free to mutate its command params, for
+    # example :global adds "global_lines" to them. Sources that fail to parse
+    # are not cached.
+
+    global _cache_hits, _cache_misses
+
+    try:
+        template = _cache[source]
+    except KeyError:
+        _cache_misses += 1
+        template = _parse_command_line(source)
+        _cache[source] = template
+        if len(_cache) > _cache_maxsize:
+            _cache.popitem(last=False)
+    else:
+        _cache_hits += 1
+        _cache.move_to_end(source)
+
+    return _copy_command_line(template)
+
+
+def _copy_command_line(command_line):
+    # type: (CommandLineNode) -> CommandLineNode
+
+    # The command params are the only part of a parsed command line that is
+    # mutated, so the copy shares the rest with the cached node. A deep copy
+    # would cost more than parsing the source again.
+
+    command_line = copy.copy(command_line)
+    if command_line.command:
+        command_line.command = copy.copy(command_line.command)
+        command_line.command.params = dict(command_line.command.params)
+
+    return command_line
+
+
+def parse_command_line_cache_info():
+    # type: () -> dict
+    return {
+        'hits': _cache_hits,
+        'misses': _cache_misses,
+        'maxsize': _cache_maxsize,
+        'size': len(_cache),
+    }
+
+
+def parse_command_line_cache_clear():
+    # type: () -> None
+    global _cache_hits, _cache_misses
+
+    _cache.clear()
+    _cache_hits = 0
+    _cache_misses = 0
+
+
+def _parse_command_line(source):
+    # type: (str) -> CommandLineNode
+
     # The parser works its way through the command line by passing the current
     # state to the next parsing function. It stops when no parsing funcion is
     # returned from the previous one.
@@ -28,7 +28,7 @@ from NeoVintageous.nv.ex.tokens import TokenPercent
 from NeoVintageous.nv.ex.tokens import TokenSearchBackward
 from NeoVintageous.nv.ex.tokens import TokenSearchForward
 from NeoVintageous.nv.ex.tokens import TokenSemicolon
-from NeoVintageous.nv.ex_routes import ex_routes
+from NeoVintageous.nv.ex_routes import match_ex_route
 
 
 class _ScannerState:
@@ -329,14 +329,14 @@ def _scan_command(state):
     #
     # Returns:
     #   Tuple[None, list(TokenEof)]
-    for route, command in ex_routes.items():
-        if state.match(route):
-            state.ignore()
+    command = match_ex_route(state)
+    if command:
+        state.ignore()
 
-            cmd = command(state)
+        cmd = command(state)
 
-            state.expect_eof(lambda: Exception("E492: Not an editor command: %s" % state.source))
+        state.expect_eof(lambda: Exception("E492: Not an editor command: %s" % state.source))
 
-            return None, [cmd, TokenEof()]
+        return None, [cmd, TokenEof()]
 
     raise Exception("E492: Not an editor command: %s" % state.source)
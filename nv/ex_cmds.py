@@ -15,8 +15,10 @@
 # You should have received a copy of the GNU General Public License
 # along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
 
+from bisect import bisect_right
 from functools import wraps
 import inspect
+from itertools import accumulate
 import logging
 import os
 import re
@@ -57,7 +59,7 @@ from NeoVintageous.nv.utils import next_non_blank
 from NeoVintageous.nv.utils import regions_transformer
 from NeoVintageous.nv.utils import replace_sel
 from NeoVintageous.nv.utils import row_at
-from NeoVintageous.nv.vi.search import view_find_all_in_range
+from NeoVintageous.nv.vi.search import view_find
 from NeoVintageous.nv.vi.settings import get_cache_value
 from NeoVintageous.nv.vi.settings import get_cmdline_cwd
 from NeoVintageous.nv.vi.settings import get_ex_global_last_pattern
@@ -254,52 +256,34 @@ def ex_cquit(window, **kwargs):
 
 
 def ex_delete(view, edit, register, line_range, global_lines=None, **kwargs):
-    r = line_range.resolve(view)
-    if r == Region(-1, -1):
-        r = view.full_line(0)
-
-    rs = [r]
-
     # If :global called us, ignore the parsed range.
     if global_lines:
-        rs = [Region(a, b) for (a, b) in global_lines]
-
-    def _select(view, regions, register):
-        view.sel().clear()
-        to_store = []
-        for r in regions:
-            view.sel().add(r)
-            if register:
-                to_store.append(view.substr(view.full_line(r)))
-
-        if register:
-            text = ''.join(to_store)
-            if not text.endswith('\n'):
-                text = text + '\n'
+        rs = _join_adjacent_regions(global_lines)
+        text = ''.join(view.substr(r) for r in rs)
+    else:
+        r = line_range.resolve(view)
+        if r == Region(-1, -1):
+            r = view.full_line(0)
 
-            state = State(view)
-            state.registers[register] = [text]
+        rs = [r]
+        text = view.substr(view.full_line(r))
 
     # Save stuff to be deleted in register
-    if global_lines:
-        _select(view, [Region(r.a, r.b - 1) for r in rs], register)
-    else:
-        _select(view, [Region(r.a, r.b) for r in rs], register)
+    if register:
+        if not text.endswith('\n'):
+            text = text + '\n'
+
+        state = State(view)
+        state.registers[register] = [text]
 
-    # Build regions to be selected after deletion
-    deleted_so_far = 0
-    new_sel_pos = []
-    for r in rs:
-        new_sel_pos.append(r.a - deleted_so_far)
-        size_of_region = r.b - r.a
-        deleted_so_far += size_of_region
+    # The cursor ends up where the last deleted region started, less the size
+    # of the regions deleted before it.
+    new_sel = rs[-1].a - sum(r.size() for r in rs[:-1])
 
     # Delete
     for r in reversed(rs):
         view.erase(edit, r)
 
-    new_sel = view.sel()[-1].b
-
     view.sel().clear()
     view.sel().add(new_sel)
     enter_normal_mode(view, None)
@@ -395,7 +379,7 @@ def ex_file(view, **kwargs):
     status_message('%s' % msg)
 
 
-def ex_global(window, view, pattern, line_range, cmd='print', **kwargs):
+def ex_global(window, view, edit, pattern, line_range, cmd='print', **kwargs):
     if not pattern:
         pattern = get_ex_global_last_pattern()
         if not pattern:
@@ -413,19 +397,81 @@ def ex_global(window, view, pattern, line_range, cmd='print', **kwargs):
     else:
         region = line_range.resolve(view)
 
-    matches = view_find_all_in_range(view, pattern, region.a, region.b - 1)
-    if not matches:
+    global_lines = _find_global_lines(view, pattern, region)
+    if not global_lines:
         return status_message('Pattern not found: %s', pattern)
 
-    matches = [view.full_line(r.begin()) for r in matches]
-    matches = [[r.a, r.b] for r in matches]
-
-    cmd.params['global_lines'] = matches
+    # The lines are passed to the command as they are, rather than through a
+    # Sublime Text command, so they don't need to be serialized.
+    args = cmd.params
+    args['global_lines'] = global_lines
+    _get_ex_cmd(cmd.target)(window=window, view=view, edit=edit, line_range=RangeNode(), **args)
 
-    do_ex_command(window, cmd.target, cmd.params)
     set_ex_global_last_pattern(pattern)
 
 
+def _find_global_lines(view, pattern, region):
+    # type: (...) -> list
+    #
+    # Find the lines in the region that match the pattern. The region text is
+    # read once into a table of line starts, and the matches are mapped to
+    # their lines by bisecting it, so a line with several matches is only found
+    # once.
+    #
+    # A region that covers most of the buffer is searched with a single
+    # view.find_all() call. A smaller region is searched with view.find(),
+    # resuming at the start of the line after each match and stopping at the
+    # end of the region, so the rest of the buffer isn't searched.
+    #
+    # Args:
+    #   view (View):
+    #   pattern (str):
+    #   region (Region): A region of full lines.
+    #
+    # Returns:
+    #   list[Region]: The full lines matched, in buffer order.
+    starts = list(accumulate([region.a] + [len(line) + 1 for line in view.substr(region).split('\n')]))
+    lines = []
+
+    def _add_line(pt):
+        # type: (int) -> int
+        i = bisect_right(starts, pt) - 1
+        lines.append(Region(starts[i], min(starts[i + 1], region.b)))
+
+        return starts[i + 1]
+
+    if region.size() * 2 > view.size():
+        end = region.a
+        for match in view.find_all(pattern):
+            if match.a >= region.b:
+                break
+
+            if match.a >= end:
+                end = _add_line(match.a)
+    else:
+        pt = region.a
+        while pt < region.b:
+            match = view_find(view, pattern, pt)
+            if match is None or match.a >= region.b:
+                break
+
+            pt = _add_line(match.a)
+
+    return lines
+
+
+def _join_adjacent_regions(regions):
+    # type: (list) -> list
+    joined = []
+    for region in regions:
+        if joined and joined[-1].b == region.a:
+            joined[-1] = Region(joined[-1].a, region.b)
+        else:
+            joined.append(region)
+
+    return joined
+
+
 def ex_help(window, subject=None, forceit=False, **kwargs):
     if not subject:
         subject = 'help.txt'
@@ -668,7 +714,7 @@ def ex_print(window, view, line_range, flags=None, global_lines=None, **kwargs):
     def _get_lines(view, parsed_range, global_lines):
         # If :global called us, ignore the parsed range.
         if global_lines:
-            return [(view.substr(Region(a, b)), row_at(view, a)) for (a, b) in global_lines]
+            return [(view.substr(r), row_at(view, r.a)) for r in global_lines]
 
         to_display = []
         for line in view.lines(parsed_range):
@@ -685,18 +731,18 @@ def ex_print(window, view, line_range, flags=None, global_lines=None, **kwargs):
     if 'l' in flags:
         display.settings().set('draw_white_space', 'all')
 
+    characters = []
     for i, (text, row) in enumerate(lines):
-        characters = ''
         if '#' in flags:
-            characters = "{} {}".format(row, text).lstrip()
+            characters.append("{} {}".format(row, text).lstrip())
         else:
-            characters = text.lstrip()
+            characters.append(text.lstrip())
 
         if not global_lines:
             if i < len(lines) - 1:
-                characters += '\n'
+                characters.append('\n')
 
-        display.run_command('append', {'characters': characters})
+    display.run_command('append', {'characters': ''.join(characters)})
 
 
 @_init_cwd
@@ -1026,44 +1072,107 @@ def ex_substitute(view, edit, line_range, pattern=None, replacement='', flags=No
 
         return _replace_confirming(view, edit, pattern, compiled_pattern, replacement, replace_count, target_region)
 
-    lines = view.lines(target_region)
-    if not lines:
-        return status_message('E486: Pattern not found: {}'.format(pattern))
+    changes, match_count, line_count, last_line = _find_substitutions(
+        view, compiled_pattern, replacement, target_region, replace_count)
 
-    new_lines = []
-    dirty = False
-    for line in lines:
-        line_str = view.substr(line)
-        new_line_str = re.sub(compiled_pattern, replacement, line_str, count=replace_count)
-        new_lines.append(new_line_str)
-        if new_line_str != line_str:
-            dirty = True
-
-    new_region_text = '\n'.join(new_lines)
-    if view.size() > line.end():
-        new_region_text += '\n'
-
-    if not dirty:
+    if not match_count:
         return status_message('E486: Pattern not found: {}'.format(pattern))
 
-    # Reposition cursor before replacing target region so that the cursor
-    # will auto adjust in sync with the replacement.
-    view.sel().clear()
-    view.sel().add(line.begin())
+    if 'n' in flags:
+        return status_message(_substitute_report(match_count, line_count, count_only=True))
 
-    view.replace(edit, target_region, new_region_text)
+    # Replace in reverse order so that the positions of the remaining changes
+    # are not invalidated by the ones already made.
+    shift = 0
+    for begin, end, text in reversed(changes):
+        view.replace(edit, Region(begin, end), text)
+        if begin < last_line:
+            shift += len(text) - (end - begin)
 
     # TODO Refactor set position cursor after operation into reusable api.
-    # Put cursor on first non-whitespace char of current line.
-    line = view.line(view.sel()[0].b)
+    # Put cursor on first non-whitespace char of last substituted line.
+    line = view.line(last_line + shift)
+    pt = line.begin()
     if line.size() > 0:
         pt = view.find('^\\s*', line.begin()).end()
-        view.sel().clear()
-        view.sel().add(pt)
+
+    view.sel().clear()
+    view.sel().add(pt)
+
+    if match_count > _SUBSTITUTE_REPORT:
+        status_message(_substitute_report(match_count, line_count))
 
     enter_normal_mode(view, None)
 
 
+# Substitutions are reported when they exceed this number. Same as Vim's
+# default for the 'report' option. See :h 'report'.
+_SUBSTITUTE_REPORT = 2
+
+
+def _find_substitutions(view, compiled_pattern, replacement, region, count):
+    # type: (...) -> tuple
+    #
+    # Find the substitutions for every line in the region. The region text is
+    # scanned line by line in place, using the pos and endpos arguments of the
+    # pattern so that matches never span lines, and only the spans that
+    # actually change are kept.
+    #
+    # Args:
+    #   view (View):
+    #   compiled_pattern (Pattern):
+    #   replacement (str): A replacement template, see re.sub().
+    #   region (Region): A region of full lines.
+    #   count (int): The maximum number of substitutions per line, 0 means
+    #       no limit.
+    #
+    # Returns:
+    #   tuple[list, int, int, int]: A list of changes as (begin, end, text)
+    #       tuples in buffer order, the number of matches, the number of lines
+    #       matched, and the start point of the last line matched.
+    text = view.substr(region)
+    offset = region.begin()
+    size = len(text)
+    changes = []
+    match_count = 0
+    line_count = 0
+    last_line = -1
+    pos = 0
+    while pos < size:
+        eol = text.find('\n', pos)
+        if eol == -1:
+            eol = size
+
+        line_matches = 0
+        for match in compiled_pattern.finditer(text, pos, eol):
+            line_matches += 1
+            new_text = match.expand(replacement)
+            if new_text != match.group(0):
+                changes.append((offset + match.start(), offset + match.end(), new_text))
+
+            if line_matches == count:
+                break
+
+        if line_matches:
+            match_count += line_matches
+            line_count += 1
+            last_line = offset + pos
+
+        pos = eol + 1
+
+    return changes, match_count, line_count, last_line
+
+
+def _substitute_report(match_count, line_count, count_only=False):
+    # type: (int, int, bool) -> str
+    if count_only:
+        what = 'match' if match_count == 1 else 'matches'
+    else:
+        what = 'substitution' if match_count == 1 else 'substitutions'
+
+    return '{} {} on {} {}'.format(match_count, what, line_count, 'line' if line_count == 1 else 'lines')
+
+
 def ex_sunmap(lhs, **kwargs):
     try:
         mappings_remove(SELECT, lhs)
@@ -16,6 +16,7 @@
 # along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
 
 from collections import OrderedDict
+import re
 
 from NeoVintageous.nv.ex.tokens import TokenCommand
 
@@ -703,7 +704,6 @@ def _ex_route_yank(state):
     return command
 
 
-# TODO: compile regexes. ??
 ex_routes = OrderedDict()  # type: dict
 ex_routes[r'!(?=.+)'] = _ex_route_shell_out
 ex_routes[r'&&?'] = _ex_route_double_ampersand
@@ -771,3 +771,31 @@ ex_routes[r'wq(?=[^a-zA-Z]|$)?'] = _ex_route_wq
 ex_routes[r'xa(?:ll)?'] = _ex_route_wqall
 ex_routes[r'x(?:it)?'] = _ex_route_exit
 ex_routes[r'y(?:ank)?'] = _ex_route_yank
+
+
+def _compile_routes(routes):
+    # Compile the routes into a single regular expression, an alternation of
+    # named groups in route order. The regex engine tries the alternatives in
+    # order, so the first route to match wins, exactly as if the routes were
+    # tried one after the other, but without a Python level loop over them.
+    pattern = '|'.join('(?P<r{}>{})'.format(i, route) for i, route in enumerate(routes))
+    commands = {'r{}'.format(i): command for i, command in enumerate(routes.values())}
+
+    return re.compile(pattern), commands
+
+
+_ex_routes_pattern, _ex_routes_commands = _compile_routes(ex_routes)
+
+
+def match_ex_route(state):
+    # Match a route at the current scanner position.
+    #
+    # Args:
+    #   :state (_ScannerState):
+    #
+    # Returns:
+    #   The route function, or None if no route matches. The scanner position
+    #   advances as many characters as the route match's length.
+    m = state.match(_ex_routes_pattern)
+    if m:
+        return _ex_routes_commands[m.lastgroup]
@@ -15,9 +15,21 @@
 # You should have received a copy of the GNU General Public License
 # along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
 
+from bisect import bisect_left
+from bisect import bisect_right
+from collections import OrderedDict
+from itertools import islice
 
-# TODO Implement 'history' option so that the number of history entries
-# remembered can be configured.
+from sublime import load_settings
+
+from NeoVintageous.nv.shada import shada_append
+from NeoVintageous.nv.shada import shada_get
+from NeoVintageous.nv.shada import shada_remove
+from NeoVintageous.nv.shada import shada_set
+
+
+# The default number of entries remembered in each history. The 'history'
+# option overrides it, see _get_max_items().
 _MAX_ITEMS = 10000
 
 
@@ -49,28 +61,148 @@ _NAME2TYPE = {
 }
 
 
-_storage = {
-    _HIST_CMD: {
-        'num': 0,
-        'items': {}
-    },
-    _HIST_SEARCH: {
-        'num': 0,
-        'items': {}
-    },
-    _HIST_EXPR: {
-        'num': 0,
-        'items': {}
-    },
-    _HIST_INPUT: {
-        'num': 0,
-        'items': {}
-    },
-    _HIST_DEBUG: {
-        'num': 0,
-        'items': {}
-    }
-}  # type: dict
+_TYPE2NAME = {history_type: name for name, history_type in _NAME2TYPE.items()}
+
+
+# The histories, by type. Each history is a dict with the following keys:
+#
+#   num (int): The number of the newest entry.
+#   items (OrderedDict[int, str]): The entries by number, oldest first.
+#   index (dict[str, int]): The numbers of the entries, by entry.
+#   cache (dict): Lookups built on demand and reset when the history changes,
+#       see _keys() and _prefix_keys().
+#
+# The histories are loaded from the shada file on first use, see
+# _get_storage().
+_storage = None  # type: dict
+
+# The storage loaded from the shada file. Only changes to that storage are
+# written back.
+_disk_storage = None  # type: dict
+
+
+def _new_history():
+    # type: () -> dict
+    return {'num': 0, 'items': OrderedDict(), 'index': {}, 'cache': {}}
+
+
+def _new_storage():
+    # type: () -> dict
+    return {history_type: _new_history() for history_type in _NAME2TYPE.values()}
+
+
+def _get_storage():
+    # type: () -> dict
+    global _storage, _disk_storage
+    if _storage is None:
+        _storage = _disk_storage = _load()
+
+    return _storage
+
+
+def _get_max_items():
+    # type: () -> int
+    try:
+        return max(0, int(load_settings('Preferences.sublime-settings').get('vintageous_history', _MAX_ITEMS)))
+    except (TypeError, ValueError):
+        return _MAX_ITEMS
+
+
+def _add(hist, item, max_items):
+    # type: (dict, str, int) -> None
+    num = hist['index'].pop(item, None)
+    if num is not None:
+        del hist['items'][num]
+
+    hist['num'] += 1
+    hist['items'][hist['num']] = item
+    hist['index'][item] = hist['num']
+
+    while len(hist['items']) > max_items:
+        del hist['index'][hist['items'].popitem(last=False)[1]]
+
+    hist['cache'] = {}
+
+
+def _keys(hist):
+    # type: (dict) -> list
+    # The numbers of the entries, oldest first.
+    try:
+        return hist['cache']['keys']
+    except KeyError:
+        keys = hist['cache']['keys'] = list(hist['items'])
+
+        return keys
+
+
+def _nth_key(hist, index):
+    # type: (dict, int) -> int
+    # The number of the entry at {index} of the entries, oldest first. A
+    # negative index counts from the newest entry. The entries are walked from
+    # the nearest end, so the newest ones, which are recalled the most, are
+    # found in constant time.
+    items = hist['items']
+    size = len(items)
+    if index < 0:
+        index += size
+
+    if not 0 <= index < size:
+        raise IndexError(index)
+
+    if index < size // 2:
+        return next(islice(items, index, None))
+
+    return next(islice(reversed(items), size - 1 - index, None))
+
+
+def _prefix_keys(hist, prefix):
+    # type: (dict, str) -> list
+    # The numbers of the entries beginning with {prefix}, oldest first.
+    #
+    # The entries are kept sorted so that the ones beginning with the prefix
+    # can be found by bisection. Only the last prefix is kept, because it
+    # doesn't change while recalling entries from the command-line.
+    if not prefix:
+        return _keys(hist)
+
+    cache = hist['cache']
+    if cache.get('prefix') == prefix:
+        return cache['prefix_keys']
+
+    try:
+        entries = cache['sorted']
+    except KeyError:
+        entries = cache['sorted'] = sorted(hist['index'])
+
+    begin = bisect_left(entries, prefix)
+    end = begin
+    if ord(prefix[-1]) < 0x10ffff:
+        end = bisect_left(entries, prefix[:-1] + chr(ord(prefix[-1]) + 1), begin)
+
+    cache['prefix'] = prefix
+    cache['prefix_keys'] = sorted(hist['index'][entry] for entry in entries[begin:end])
+
+    return cache['prefix_keys']
+
+
+def _load():
+    # type: () -> dict
+    storage = _new_storage()
+    max_items = _get_max_items()
+    for name, items in shada_get('history').items():
+        history_type = _name2type(name)
+        if history_type != _HIST_INVALID:
+            for item in items:
+                _add(storage[history_type], item, max_items)
+
+    return storage
+
+
+def _is_persistent():
+    # type: () -> bool
+    # Don't persist a storage that replaced the one loaded from disk e.g. by
+    # tests.
+    return _storage is not None and _storage is _disk_storage
 
 
 def _char2type(char):
@@ -137,28 +269,27 @@ def history_add(history, item):
     # Returns:
     #   int: 1 for a successful operation, otherwise 0
 
-    if _MAX_ITEMS == 0:
+    max_items = _get_max_items()
+    if max_items == 0:
         return 0
 
     history_type = history_get_type(history)
+    _add(_get_storage()[history_type], item, max_items)
 
-    pending_deletes = [k for k, v in _storage[history_type]['items'].items() if v == item]
-    for pending_delete in pending_deletes:
-        del _storage[history_type]['items'][pending_delete]
-
-    _storage[history_type]['num'] += 1
-    _storage[history_type]['items'][_storage[history_type]['num']] = item
-
-    if len(_storage[history_type]['items']) > _MAX_ITEMS:
-        del _storage[history_type]['items'][min(_storage[history_type]['items'].keys())]
+    if _is_persistent():
+        shada_append('history', _TYPE2NAME[history_type], item, max_items)
 
     return 1
 
 
 def history_clear():
     # type: () -> None
-    for key in _storage:
-        _storage[key] = {'num': 0, 'items': {}}
+    storage = _get_storage()
+    for key in storage:
+        storage[key] = _new_history()
+
+        if _is_persistent():
+            shada_set('history', _TYPE2NAME[key], None)
 
 
 def history_del(history, item=None):
@@ -182,27 +313,34 @@ def history_del(history, item=None):
     if history_type == _HIST_INVALID:
         return 0
 
+    storage = _get_storage()
     if item is None:
-        _storage[history_type]['num'] = 0
-        _storage[history_type]['items'] = {}
-        ret = 1
-    else:
-        if isinstance(item, int):
-            try:
-                if item >= 0:
-                    del _storage[history_type]['items'][item]
-                    ret = 1
-                else:
-                    keys = sorted(_storage[history_type]['items'].keys())
-                    key_index = keys[item]
-                    del _storage[history_type]['items'][key_index]
-                    ret = 1
-            except (KeyError, IndexError):
-                ret = 0
-        else:
-            raise NotImplementedError('history_del(history, item) where item is regular expression')
+        storage[history_type] = _new_history()
 
-    return ret
+        if _is_persistent():
+            shada_set('history', _TYPE2NAME[history_type], None)
+
+        return 1
+
+    if isinstance(item, int):
+        hist = storage[history_type]
+        try:
+            if item < 0:
+                item = _nth_key(hist, item)
+
+            entry = hist['items'].pop(item)
+        except (KeyError, IndexError):
+            return 0
+
+        del hist['index'][entry]
+        hist['cache'] = {}
+
+        if _is_persistent():
+            shada_remove('history', _TYPE2NAME[history_type], entry)
+
+        return 1
+
+    raise NotImplementedError('history_del(history, item) where item is regular expression')
 
 
 def history_get(history, index=-1):
@@ -224,14 +362,14 @@ def history_get(history, index=-1):
     if history_type == _HIST_INVALID:
         return ''
 
+    hist = _get_storage()[history_type]
+
     try:
         # A positive int represents the absolute index of an entry.
         if index >= 0:
-            ret = _storage[history_type]['items'][index]
+            ret = hist['items'][index]
         else:
-            keys = sorted(_storage[history_type]['items'].keys())
-            key_index = keys[index]
-            ret = _storage[history_type]['items'][key_index]
+            ret = hist['items'][_nth_key(hist, index)]
 
     except Exception:
         ret = ''
@@ -239,9 +377,47 @@ def history_get(history, index=-1):
     return ret
 
 
+def history_find(history, prefix, index, backwards=True):
+    # type: (str, str, int, bool) -> int
+    # Find the entry nearest to {index} whose beginning matches {prefix}.
+    #
+    # Args:
+    #   :history (str): See |hist-names| for the possible values of history.
+    #   :prefix (str): An empty prefix matches any entry.
+    #   :index (int): The absolute index to search from, excluded.
+    #   :backwards (bool): Search older entries, otherwise newer ones.
+    #
+    # Returns:
+    #   int: The absolute index of the entry, or -1 if there is none.
+    history_type = history_get_type(history)
+    if history_type == _HIST_INVALID:
+        return -1
+
+    hist = _get_storage()[history_type]
+
+    # Recalling starts past the newest entry. Find it without building the
+    # lookups, which every added entry resets.
+    if not prefix and hist['items']:
+        newest = next(reversed(hist['items']))
+        if index > newest:
+            return newest if backwards else -1
+
+    keys = _prefix_keys(hist, prefix)
+    if backwards:
+        i = bisect_left(keys, index) - 1
+        if i >= 0:
+            return keys[i]
+    else:
+        i = bisect_right(keys, index)
+        if i < len(keys):
+            return keys[i]
+
+    return -1
+
+
 def history_len(history):
     # type: (str) -> int
-    return len(_storage[history_get_type(history)]['items'])
+    return len(_get_storage()[history_get_type(history)]['items'])
 
 
 def history_nr(history):
@@ -258,9 +434,10 @@ def history_nr(history):
     if history_type == _HIST_INVALID:
         return -1
 
-    items = _storage[history_type]['items'].keys()
+    items = _get_storage()[history_type]['items']
     if len(items) > 0:
-        num = max(items)
+        # The entries are in the order they were numbered.
+        num = next(reversed(items))
     else:
         num = -1
 
@@ -276,8 +453,8 @@ def history(name):
     # Returns:
     #   str:
 
-    # TODO use 'history' option (default=50)
-    # TODO if 'history' option is 0 then print message "'history' option is zero"
+    if _get_max_items() == 0:
+        return "'history' option is zero"
 
     if name == 'all':
         history_types = sorted([_HIST_CMD, _HIST_EXPR, _HIST_INPUT, _HIST_DEBUG, _HIST_SEARCH])
@@ -300,12 +477,12 @@ def history(name):
 
     for history_type in history_types:
         name = type2name[history_type]
-        contents = _storage[history_type]['items']
+        contents = _get_storage()[history_type]['items']
         count = len(contents)
 
         # TODO initial padding should be size of max history width
         buf.append('%6s  %s history' % ('#', name))
-        for i, number in enumerate(sorted(contents, reverse=False), start=1):
+        for i, number in enumerate(contents, start=1):
             if i == count:
                 buf.append('>%5d  %s' % (number, contents[number]))
             else:
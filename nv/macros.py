@@ -15,11 +15,19 @@
 # You should have received a copy of the GNU General Public License
 # along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
 
+from copy import deepcopy
+
 from NeoVintageous.nv.polyfill import erase_window_status
 from NeoVintageous.nv.polyfill import set_window_status
+from NeoVintageous.nv.shada import shada_get
+from NeoVintageous.nv.shada import shada_set
 
 _state = {}  # type: dict
 
+# Macros are written to and read from the shada file, unless the state was
+# reset by _reset_data(), e.g. by tests.
+_persistent = True
+
 
 def _get(window, key=None, default=None):
     try:
@@ -36,6 +44,12 @@ def _get(window, key=None, default=None):
         return default
 
 
+def _reset_data():
+    global _persistent
+    _persistent = False
+    _state.clear()
+
+
 def is_valid_writable_register(name):
     return name in tuple('0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"')
 
@@ -66,6 +80,12 @@ def stop_recording(window):
             state['recorded'] = {}
 
         state['recorded'][name] = _get_steps(window)
+        state.get('plans', {}).pop(name, None)
+
+        # The steps are replayed with updated arguments, so a copy is
+        # persisted.
+        if _persistent:
+            shada_set('macro', name, deepcopy(state['recorded'][name]))
 
     state['recording'] = False
     state['recording_steps'] = []
@@ -80,8 +100,73 @@ def get_recorded(window, name):
     try:
         return state['recorded'][name]
     except KeyError:
+        pass
+
+    # Macros recorded in previous sessions.
+    if not _persistent:
+        return None
+
+    try:
+        steps = [(cmd, args) for cmd, args in deepcopy(shada_get('macro')[name])]
+    except (KeyError, TypeError, ValueError):
+        return None
+
+    state.setdefault('recorded', {})[name] = steps
+
+    return steps
+
+
+def _with_xpos(args, xpos):
+    # type: (dict, int) -> dict
+    return dict(args, xpos=xpos)
+
+
+def _with_motion_xpos(args, xpos):
+    # type: (dict, int) -> dict
+    motion = args['motion']
+
+    return dict(args, motion=dict(motion, motion_args=dict(motion['motion_args'], xpos=xpos)))
+
+
+def _compile(steps):
+    # type: (list) -> tuple
+    # Compile recorded steps into a replay plan of (cmd, args, with_xpos)
+    # steps. For steps that carry an xpos, with_xpos(args, xpos) returns a copy
+    # of the arguments with the xpos updated, otherwise it's None. The args are
+    # shared with the recorded steps, so they must not be mutated.
+    plan = []
+    for cmd, args in steps:
+        with_xpos = None
+        if 'xpos' in args:
+            with_xpos = _with_xpos
+        elif args.get('motion'):
+            motion_args = args['motion'].get('motion_args')
+            if motion_args and 'xpos' in motion_args:
+                with_xpos = _with_motion_xpos
+
+        plan.append((cmd, args, with_xpos))
+
+    return tuple(plan)
+
+
+def get_replay_plan(window, name):
+    # type: (...) -> tuple
+    # Get the replay plan of a recorded macro, see _compile(). The plan is
+    # compiled once and kept until the macro is recorded again.
+    plans = _get(window).setdefault('plans', {})
+    try:
+        return plans[name]
+    except KeyError:
+        pass
+
+    steps = get_recorded(window, name)
+    if not steps:
         return None
 
+    plan = plans[name] = _compile(steps)
+
+    return plan
+
 
 def get_last_used_register_name(window):
     return _get(window, 'last_used_register_name')
@@ -42,6 +42,81 @@ _mappings = {
 }  # type: dict
 
 
+class _MappingsTrie:
+
+    # A prefix tree of mapping lhs sequences. Partial match lookups walk the
+    # tree one character at a time, so they cost time proportional to the
+    # length of the sequence rather than the number of mappings. Each node
+    # tracks the number of sequences beneath it so that empty branches can be
+    # pruned on removal.
+
+    __slots__ = ('children', 'size')
+
+    def __init__(self):
+        self.children = {}  # type: dict
+        self.size = 0
+
+    def add(self, lhs):
+        # type: (str) -> None
+        node = self
+        node.size += 1
+        for char in lhs:
+            node = node.children.setdefault(char, _MappingsTrie())
+            node.size += 1
+
+    def remove(self, lhs):
+        # type: (str) -> None
+        node = self
+        node.size -= 1
+        for char in lhs:
+            child = node.children[char]
+            child.size -= 1
+            if child.size == 0:
+                del node.children[char]
+                return
+
+            node = child
+
+    def find(self, lhs):
+        node = self
+        for char in lhs:
+            try:
+                node = node.children[char]
+            except KeyError:
+                return None
+
+        return node
+
+    def sequences(self, prefix):
+        # type: (str) -> list
+        node = self.find(prefix)
+        if not node:
+            return []
+
+        sequences = []
+        stack = [(prefix, node)]
+        while stack:
+            seq, node = stack.pop()
+            terminal_count = node.size - sum(child.size for child in node.children.values())
+            if terminal_count:
+                sequences.append(seq)
+
+            for char, child in node.children.items():
+                stack.append((seq + char, child))
+
+        return sequences
+
+
+def _new_mappings_index():
+    # type: () -> dict
+    return {mode: _MappingsTrie() for mode in _mappings}
+
+
+# Prefix index of the lhs sequences in _mappings, keyed by mode. It must be
+# kept in sync with _mappings by the add, remove, and clear functions.
+_mappings_index = _new_mappings_index()  # type: dict
+
+
 class Mapping:
 
     def __init__(self, lhs, rhs):
@@ -51,7 +126,14 @@ class Mapping:
 
 def _find_partial_matches(mode, lhs):
     # type: (str, str) -> list
-    return [x for x in _mappings[mode] if x.startswith(lhs)]
+    return _mappings_index[mode].sequences(lhs)
+
+
+def _has_partial_match(mode, lhs):
+    # type: (str, str) -> bool
+    node = _mappings_index[mode].find(lhs)
+
+    return bool(node and node.size)
 
 
 def _find_full_match(mode, lhs):
@@ -66,18 +148,26 @@ def _normalise_lhs(lhs):
 
 def mappings_add(mode, lhs, rhs):
     # type: (str, str, str) -> None
-    _mappings[mode][_normalise_lhs(lhs)] = rhs
+    mappings = _mappings[mode]
+    lhs = _normalise_lhs(lhs)
+    if lhs not in mappings:
+        _mappings_index[mode].add(lhs)
+
+    mappings[lhs] = rhs
 
 
 def mappings_remove(mode, lhs):
     # type: (str, str) -> None
-    del _mappings[mode][_normalise_lhs(lhs)]
+    lhs = _normalise_lhs(lhs)
+    del _mappings[mode][lhs]
+    _mappings_index[mode].remove(lhs)
 
 
 def mappings_clear():
     # type: () -> None
     for mode in _mappings:
         _mappings[mode] = {}
+        _mappings_index[mode] = _MappingsTrie()
 
 
 def _seq_to_mapping(mode, seq):
@@ -92,11 +182,7 @@ def mappings_is_incomplete(mode, seq):
     if full_match:
         return False
 
-    partial_matches = _find_partial_matches(mode, seq)
-    if partial_matches:
-        return True
-
-    return False
+    return _has_partial_match(mode, seq)
 
 
 def mappings_can_resolve(mode, sequence):
@@ -104,11 +190,7 @@ def mappings_can_resolve(mode, sequence):
     if full_match:
         return True
 
-    partial_matches = _find_partial_matches(mode, sequence)
-    if partial_matches:
-        return True
-
-    return False
+    return _has_partial_match(mode, sequence)
 
 
 def mappings_resolve(state, sequence=None, mode=None, check_user_mappings=True):
@@ -0,0 +1,356 @@
+# Copyright (C) 2018 The NeoVintageous Team (NeoVintageous).
+#
+# This file is part of NeoVintageous.
+#
+# NeoVintageous is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# NeoVintageous is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
+
+# The state that persists between sessions: registers, marks, macros and
+# histories. See https://neovim.io/doc/user/starting.html#shada.
+#
+# The state is kept in a JSON lines file. The first line is a header holding
+# the version of the format, and each following line is a record:
+#
+#   ["=", kind, name, value]    Set {name} to {value}, or delete it if {value}
+#                               is null.
+#   ["+", kind, name, entry]    Append {entry} to the list {name}. An equal
+#                               entry already in the list is removed first.
+#   ["-", kind, name, entry]    Remove {entry} from the list {name}.
+#
+# Changes are appended to the file as records, so a record supersedes the ones
+# before it. The file is read on first use, and rewritten without superseded
+# records once it has doubled in size since the last rewrite.
+
+from collections import OrderedDict
+import json
+import logging
+import os
+from threading import Lock
+from threading import Timer
+
+from sublime import load_settings
+from sublime import packages_path
+
+
+_log = logging.getLogger(__name__)
+
+
+_VERSION = 1
+
+# The interval, in seconds, over which changes are collected before being
+# written to the file in a background thread.
+_WRITE_INTERVAL = 2.0
+
+# The file is not rewritten until it's at least this size, in bytes.
+_MIN_REWRITE_SIZE = 262144
+
+# The default maximum size of a record, in KiB. Values that are larger, such as
+# very large yanks, are not written. The 'vintageous_shada_max_item_size'
+# setting overrides it, see _get_max_item_size().
+_MAX_ITEM_SIZE = 100
+
+
+# The values by kind and name. Lists of entries are kept as OrderedDict keys.
+# Loaded from the file on first use, see _get_data().
+_data = None  # type: dict
+
+# Guards _data and _pending, which are changed on the main thread and written
+# to the file in a background thread.
+_lock = Lock()
+
+# Serialises writes to the file.
+_write_lock = Lock()
+
+# The records waiting to be written.
+_pending = []  # type: list
+
+_timer = None  # type: Timer
+
+# The size of the file and its size after the last rewrite, in bytes. A size of
+# zero means the file needs to be (re)written from scratch.
+_file_size = 0
+_rewrite_size = 0
+
+
+def _file_path():
+    # type: () -> str
+    return os.path.join(packages_path(), 'User', '.neovintageous_shada')
+
+
+def _get_max_item_size():
+    # type: () -> int
+    # A size of zero disables the file.
+    try:
+        size = int(load_settings('Preferences.sublime-settings').get('vintageous_shada_max_item_size', _MAX_ITEM_SIZE))
+    except (TypeError, ValueError):
+        size = _MAX_ITEM_SIZE
+
+    return max(0, size) * 1024
+
+
+def _estimate_size(value):
+    # type: (object) -> int
+    # A lower bound of the size of a value encoded as JSON, worked out without
+    # encoding it.
+    if isinstance(value, str):
+        return len(value) + 2
+
+    if isinstance(value, (list, tuple)):
+        return sum(_estimate_size(item) + 1 for item in value) + 1
+
+    if isinstance(value, dict):
+        return sum(_estimate_size(key) + _estimate_size(item) + 2 for key, item in value.items()) + 1
+
+    return 1
+
+
+def _get_data():
+    # type: () -> dict
+    global _data
+    if _data is None:
+        with _lock:
+            if _data is None:
+                _data = _load()
+
+    return _data
+
+
+def _apply(data, record):
+    # type: (dict, list) -> None
+    op, kind, name, value = record
+    values = data.setdefault(kind, {})
+    if op == '=':
+        if value is None:
+            values.pop(name, None)
+        else:
+            values[name] = value
+    elif op == '+':
+        entries = values.get(name)
+        if not isinstance(entries, OrderedDict):
+            entries = values[name] = OrderedDict()
+
+        entries.pop(value, None)
+        entries[value] = None
+    elif op == '-':
+        entries = values.get(name)
+        if isinstance(entries, OrderedDict):
+            entries.pop(value, None)
+    else:
+        raise ValueError('unknown record: ' + str(op))
+
+
+def _load():
+    # type: () -> dict
+    global _file_size, _rewrite_size
+    data = {}  # type: dict
+    _file_size = _rewrite_size = 0
+
+    file = _file_path()
+    max_size = _get_max_item_size()
+    if not file or not max_size:
+        return data
+
+    try:
+        with open(file, 'r', encoding='utf-8') as f:
+            header = f.readline()
+            if not header:
+                return data
+
+            header = json.loads(header)
+            if not isinstance(header, dict) or header.get('version') != _VERSION:
+                _log.warning('ignoring shada file %s: unsupported version', file)
+                return data
+
+            line = ''
+            for line in f:
+                # Records over the size cap are skipped without being decoded.
+                if len(line) > max_size:
+                    continue
+
+                try:
+                    _apply(data, json.loads(line))
+                except (TypeError, ValueError):
+                    _log.warning('ignoring invalid record in shada file %s', file)
+
+        # A write that was interrupted leaves a partial last line. Appending to
+        # it would corrupt the next record, so the file is rewritten instead.
+        if line.endswith('\n') or not line:
+            _file_size = os.path.getsize(file)
+
+    except FileNotFoundError:
+        pass
+    except Exception:
+        _log.exception('could not load shada file %s', file)
+
+    return data
+
+
+def _queue(record, max_size):
+    # type: (list, int) -> None
+    # Must be called with _lock held.
+    global _timer
+    if not max_size:
+        return
+
+    if record[0] == '=':
+        _pending[:] = [r for r in _pending if r[1] != record[1] or r[2] != record[2]]
+
+    _pending.append(record)
+
+    if _timer is None:
+        _timer = Timer(_WRITE_INTERVAL, shada_write)
+        _timer.daemon = True
+        _timer.start()
+
+
+def _encode(records, max_size):
+    # type: (list, int) -> str
+    lines = []
+    for record in records:
+        # Values over the size cap are not encoded.
+        if _estimate_size(record) < max_size:
+            line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+        else:
+            line = ''
+
+        if not line or len(line) >= max_size:
+            if record[0] != '=' or record[3] is None:
+                continue
+
+            line = json.dumps(['=', record[1], record[2], None], ensure_ascii=False, separators=(',', ':'))
+
+        lines.append(line + '\n')
+
+    return ''.join(lines)
+
+
+def _snapshot():
+    # type: () -> list
+    # Must be called with _lock held.
+    records = []
+    for kind, values in _data.items():
+        for name, value in values.items():
+            if isinstance(value, OrderedDict):
+                records.extend(['+', kind, name, entry] for entry in value)
+            else:
+                records.append(['=', kind, name, value])
+
+    return records
+
+
+def shada_get(kind):
+    # type: (str) -> dict
+    # Get the values of a kind of state.
+    #
+    # Args:
+    #   :kind (str): e.g. "register", "mark", "macro", or "history".
+    #
+    # Returns:
+    #   dict: The values by name. Lists of entries are returned as lists.
+    values = _get_data().get(kind, {})
+    with _lock:
+        return {name: list(value) if isinstance(value, OrderedDict) else value for name, value in values.items()}
+
+
+def shada_fits(value):
+    # type: (object) -> bool
+    # Whether a value is likely to be within the size cap of an item. Values
+    # that aren't are not written, so callers can set None instead and avoid
+    # queueing a large value only for it to be dropped.
+    return _estimate_size(value) < _get_max_item_size()
+
+
+def shada_set(kind, name, value):
+    # type: (str, str, object) -> None
+    # Set a value. A value of None deletes it.
+    #
+    # The value must be serialisable as JSON and must not be changed after it
+    # is set, because it's written to the file later in a background thread.
+    data = _get_data()
+    max_size = _get_max_item_size()
+    with _lock:
+        record = ['=', kind, name, value]
+        _apply(data, record)
+        _queue(record, max_size)
+
+
+def shada_append(kind, name, entry, max_entries=None):
+    # type: (str, str, str, int) -> None
+    # Append a string entry to a list, removing an equal entry already in it
+    # and, when max_entries is given, the oldest entries over it.
+    data = _get_data()
+    max_size = _get_max_item_size()
+    with _lock:
+        record = ['+', kind, name, entry]
+        _apply(data, record)
+        _queue(record, max_size)
+
+        if max_entries is not None:
+            entries = data[kind][name]
+            while len(entries) > max_entries:
+                _queue(['-', kind, name, entries.popitem(last=False)[0]], max_size)
+
+
+def shada_remove(kind, name, entry):
+    # type: (str, str, str) -> None
+    # Remove an entry from a list.
+    data = _get_data()
+    max_size = _get_max_item_size()
+    with _lock:
+        record = ['-', kind, name, entry]
+        _apply(data, record)
+        _queue(record, max_size)
+
+
+def shada_write():
+    # type: () -> None
+    # Write the pending changes to the file.
+    #
+    # Called in a background thread after the write interval, and when the
+    # plugin is unloaded.
+    global _timer, _file_size, _rewrite_size
+    with _write_lock:
+        with _lock:
+            if _timer is not None:
+                _timer.cancel()
+                _timer = None
+
+            if not _pending:
+                return
+
+            rewrite = _file_size == 0 or _file_size > max(2 * _rewrite_size, _MIN_REWRITE_SIZE)
+            records = _snapshot() if rewrite else list(_pending)
+            del _pending[:]
+
+        file = _file_path()
+        if not file:
+            return
+
+        text = _encode(records, _get_max_item_size())
+
+        try:
+            if rewrite:
+                text = json.dumps({'version': _VERSION}) + '\n' + text
+                with open(file + '.tmp', 'w', encoding='utf-8') as f:
+                    f.write(text)
+
+                os.replace(file + '.tmp', file)
+                _file_size = _rewrite_size = len(text.encode('utf-8'))
+            else:
+                with open(file, 'a', encoding='utf-8') as f:
+                    f.write(text)
+
+                _file_size += len(text.encode('utf-8'))
+
+        except Exception:
+            _log.exception('could not write shada file %s', file)
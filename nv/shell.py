@@ -15,10 +15,17 @@
 # You should have received a copy of the GNU General Public License
 # along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
 
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
 import sys
+from threading import Lock
+from threading import Timer
 
 from sublime import platform
 from sublime import Region
+from sublime import set_timeout
+
+from NeoVintageous.nv.vim import status_message
 
 _PLATFORM = platform()
 
@@ -43,17 +50,123 @@ def run_and_read(view, cmd):
     return _shell.run_and_read(view, cmd)
 
 
-def filter_thru_shell(view, edit, regions, cmd):
+# The maximum number of filter processes that run at the same time.
+_MAX_WORKERS = 4
+
+# How long, in seconds, a filter is waited for before it continues in the
+# background. Filters that finish in time are applied in the same edit as the
+# command that started them.
+_SYNC_TIMEOUT = 0.5
+
+# The default time limit, in seconds, of a filter. The
+# 'vintageous_shell_filter_timeout' setting overrides it.
+_TIMEOUT = 60
+
+# The interval, in milliseconds, at which a background filter is checked for
+# completion and its progress shown in the status bar.
+_POLL_INTERVAL = 100
+
+_executor = None  # type: ThreadPoolExecutor
+
+# The filters running in the background by view id.
+_filters = {}  # type: dict
+
+
+def _get_executor():
+    # type: () -> ThreadPoolExecutor
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=_MAX_WORKERS)
+
+    return _executor
+
+
+def _get_timeout(view):
+    # type: (...) -> float
+    try:
+        return float(view.settings().get('vintageous_shell_filter_timeout', _TIMEOUT))
+    except (TypeError, ValueError):
+        return _TIMEOUT
+
+
+class _Filter:
+
+    # Filters the text of some regions through a command, a process per region.
+    #
+    # The processes run in a thread pool, and the text is streamed to and from
+    # them through pipes. The filter is stopped, and its processes killed, when
+    # it's cancelled or times out.
+
+    def __init__(self, view, regions, cmd):
+        self.view = view
+        self.regions = regions
+        self.cmd = cmd
+        self.change_count = view.change_count()
+        self.error = None  # type: str
+        self._lock = Lock()
+        self._processes = []  # type: list
+        self._futures = [_get_executor().submit(self._run, view.substr(r)) for r in regions]
+        self._timer = Timer(_get_timeout(view), self.cancel, ('timed out',))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _run(self, text):
+        # type: (str) -> str
+        return _shell.filter_region(self.view, text, self.cmd, self._on_start).rstrip() + '\n'
+
+    def _on_start(self, process):
+        with self._lock:
+            self._processes.append(process)
+            if self.error:
+                _shell.kill_process(process)
+
+    def cancel(self, reason='cancelled'):
+        # type: (str) -> None
+        self._timer.cancel()
+        for future in self._futures:
+            future.cancel()
+
+        with self._lock:
+            if self.error is None:
+                self.error = reason
+
+            for process in self._processes:
+                if process.poll() is None:
+                    _shell.kill_process(process)
+
+    def done(self):
+        # type: () -> int
+        return sum(1 for future in self._futures if future.done())
+
+    def wait(self, timeout):
+        # type: (float) -> bool
+        return not wait(self._futures, timeout).not_done
+
+    def results(self):
+        # type: () -> list
+        self._timer.cancel()
+
+        return [future.result() for future in self._futures]
+
+
+def _apply(view, edit, f):
     # type: (...) -> None
-    filter_func = _shell.filter_region
+    view.erase_status('vim-filter')
+
+    if f.error:
+        return status_message('filter %s: %s', f.error, f.cmd)
+
+    if view.change_count() != f.change_count:
+        return status_message('filter discarded, the buffer has changed: %s', f.cmd)
+
+    replacements = f.results()
 
     # Maintain text size delta as we replace each selection going forward. We
     # can't simply go in reverse because cursor positions will be incorrect.
     accumulated_delta = 0
     new_points = []
-    for r in regions:
+    for r, rv in zip(f.regions, replacements):
         r_shifted = Region(r.begin() + accumulated_delta, r.end() + accumulated_delta)
-        rv = filter_func(view, view.substr(r_shifted), cmd).rstrip() + '\n'
         view.replace(edit, r_shifted, rv)
         new_points.append(r_shifted.a)
         accumulated_delta += len(rv) - r_shifted.size()
@@ -62,3 +175,53 @@ def filter_thru_shell(view, edit, regions, cmd):
     view.run_command('_enter_normal_mode')
     view.sel().clear()
     view.sel().add_all(new_points)
+
+
+def _poll(view, f):
+    # type: (...) -> None
+    if _filters.get(view.id()) is not f:
+        return
+
+    done = f.done()
+    if f.error or done == len(f.regions):
+        view.run_command('_nv_filter_apply')
+    else:
+        view.set_status('vim-filter', 'filtering %d of %d: %s' % (done, len(f.regions), f.cmd))
+        set_timeout(lambda: _poll(view, f), _POLL_INTERVAL)
+
+
+def filter_thru_shell(view, edit, regions, cmd):
+    # type: (...) -> None
+    # Filter regions through a shell command, replacing them with its output.
+    #
+    # The regions are filtered concurrently. Filters that finish quickly are
+    # applied in the given edit, otherwise they continue in the background and
+    # are applied in a new edit by the _nv_filter_apply command when they have
+    # all finished. A filter in the background can be cancelled, e.g. by
+    # pressing Esc, see filter_cancel().
+    filter_cancel(view)
+
+    f = _Filter(view, regions, cmd)
+    if f.wait(_SYNC_TIMEOUT):
+        _apply(view, edit, f)
+    else:
+        _filters[view.id()] = f
+        _poll(view, f)
+
+
+def filter_apply(view, edit):
+    # type: (...) -> None
+    # Apply a filter that has finished in the background.
+    f = _filters.pop(view.id(), None)
+    if f:
+        _apply(view, edit, f)
+
+
+def filter_cancel(view):
+    # type: (...) -> None
+    # Cancel a filter running in the background, if any.
+    f = _filters.pop(view.id(), None)
+    if f:
+        f.cancel()
+        view.erase_status('vim-filter')
+        status_message('filter cancelled: %s', f.cmd)
@@ -28,6 +28,11 @@ def run_and_read(view, cmd):
     return shell_unixlike.run_and_read(view, cmd)
 
 
-def filter_region(view, text, command):
+def filter_region(view, text, command, on_start=None):
     # type: (...) -> str
-    return shell_unixlike.filter_region(view, text, command, 'VintageousEx_osx_shell')
+    return shell_unixlike.filter_region(view, text, command, 'VintageousEx_osx_shell', on_start)
+
+
+def kill_process(process):
+    # type: (...) -> None
+    shell_unixlike.kill_process(process)
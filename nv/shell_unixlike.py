@@ -16,6 +16,7 @@
 # along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
 
 import os
+import signal
 import subprocess
 
 
@@ -43,7 +44,7 @@ def run_and_read(view, cmd):
         return ''
 
 
-def filter_region(view, text, command, shell_setting_name):
+def filter_region(view, text, command, shell_setting_name, on_start=None):
     # type: (...) -> str
     shell = view.settings().get(shell_setting_name)
     shell = shell or os.path.expandvars("$SHELL")
@@ -53,9 +54,25 @@ def filter_region(view, text, command, shell_setting_name):
     p = subprocess.Popen([shell, '-c', command],
                          stdin=subprocess.PIPE,
                          stdout=subprocess.PIPE,
-                         stderr=subprocess.STDOUT)
+                         stderr=subprocess.STDOUT,
+                         start_new_session=True)
+
+    # Lets the caller kill the process, see kill_process().
+    if on_start:
+        on_start(p)
 
     # Pass in text as input: saves having to deal with quoting stuff.
     out, _ = p.communicate(text.encode('utf-8'))
 
     return out.decode('utf-8', errors='backslashreplace')
+
+
+def kill_process(process):
+    # type: (...) -> None
+    # Kill a filter process and the processes it started. The filter runs in a
+    # new session, which makes it the leader of a process group. Killing only
+    # the shell would leave its children holding the output pipe open.
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except OSError:
+        pass
@@ -62,7 +62,7 @@ def run_and_read(view, cmd):
         return ''
 
 
-def filter_region(view, txt, command):
+def filter_region(view, txt, command, on_start=None):
     # type: (...) -> str
     try:
         contents = tempfile.NamedTemporaryFile(suffix='.txt', delete=False)
@@ -78,9 +78,22 @@ def filter_region(view, txt, command):
                              stderr=subprocess.PIPE,
                              startupinfo=get_startup_info())
 
+        # Lets the caller kill the process, see kill_process().
+        if on_start:
+            on_start(p)
+
         out, err = p.communicate()
 
         return (out or err).decode(get_oem_cp()).replace('\r\n', '\n')[:-1].strip()
     finally:
         os.remove(script.name)
         os.remove(contents.name)
+
+
+def kill_process(process):
+    # type: (...) -> None
+    # Kill a filter process and the processes it started.
+    subprocess.call(['taskkill', '/F', '/T', '/PID', str(process.pid)],
+                    stdout=subprocess.DEVNULL,
+                    stderr=subprocess.DEVNULL,
+                    startupinfo=get_startup_info())
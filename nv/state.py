@@ -58,6 +58,14 @@ from NeoVintageous.nv.vim import VISUAL_LINE
 _log = logging.getLogger(__name__)
 
 
+def _copy_command(command):
+    # type: (ViCommandDefBase) -> ViCommandDefBase
+    # Command definitions resolved from key sequences are shared instances, so
+    # the state holds its own copy, otherwise input accepted by the command
+    # would leak into the next use of it.
+    return command.__class__.from_json(command.serialize()['data'])
+
+
 class State(object):
     """
     Manage global Vim state. Accumulates command data, etc.
@@ -70,7 +78,9 @@ class State(object):
 
           state = State(view)
 
-    Note: `State` internally uses view.settings() and window.settings() to persist data.
+    Note: `State` internally uses view.settings() and window.settings() to
+    persist data. The vi settings are kept in memory and only written to the
+    view settings by settings.sync_vintage_settings().
     """
 
     registers = Registers()
@@ -279,33 +289,44 @@ class State(object):
 
     @property
     def action(self):
+        # The command definition is cached as a live object. It's only
+        # deserialized when it was persisted to the view settings, for example
+        # by a previous session.
         action = self.settings.vi['action'] or None
-        if action:
+        if isinstance(action, dict):
             cls = getattr(cmd_defs, action['name'], None)
             if cls is None:
                 cls = plugin.classes.get(action['name'], None)
             if cls is None:
                 ValueError('unknown action: %s' % action)
-            return cls.from_json(action['data'])
+            action = cls.from_json(action['data'])
+            self.settings.vi['action'] = action
+
+        return action
 
     @action.setter
     def action(self, value):
-        serialized = value.serialize() if value else None
-        self.settings.vi['action'] = serialized
+        if value and value is not self.settings.vi['action']:
+            value = _copy_command(value)
+
+        self.settings.vi['action'] = value
 
     @property
     def motion(self):
         motion = self.settings.vi['motion'] or None
-
-        if motion:
+        if isinstance(motion, dict):
             cls = getattr(cmd_defs, motion['name'])
+            motion = cls.from_json(motion['data'])
+            self.settings.vi['motion'] = motion
 
-            return cls.from_json(motion['data'])
+        return motion
 
     @motion.setter
     def motion(self, value):
-        serialized = value.serialize() if value else None
-        self.settings.vi['motion'] = serialized
+        if value and value is not self.settings.vi['motion']:
+            value = _copy_command(value)
+
+        self.settings.vi['motion'] = value
 
     @property
     def motion_count(self):
@@ -930,3 +951,4 @@ def init_state(view):
         view.window().run_command('_enter_normal_mode', {'mode': mode, 'from_init': True})
 
     state.reset_command_data()
+    settings.sync_vintage_settings(view)
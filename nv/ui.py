@@ -27,7 +27,20 @@ from sublime import set_timeout
 from NeoVintageous.nv.vim import status_message
 
 
+# The number of times the bell has been rung, including when it's turned off.
+# Replaying a macro stops at the first command that rings it, as in Vim.
+_bell_count = 0
+
+
+def ui_bell_count():
+    # type: () -> int
+    return _bell_count
+
+
 def ui_bell(msg=None):
+    global _bell_count
+    _bell_count += 1
+
     if msg:
         status_message(msg)
 
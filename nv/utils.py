@@ -128,6 +128,149 @@ def regions_transformer_reversed(view, f):
     _regions_transformer(reversed(list(view.sel())), view, f, False)
 
 
+# The number of selections from which regions_transformer_batched() uses a
+# snapshot of the view. Taking one reads the whole buffer when it has changed,
+# which costs more than the API calls of a few selections in a large buffer.
+_BATCH_MIN_SELECTIONS = 100
+
+
+def regions_transformer_batched(view, f):
+    # type: (...) -> None
+    # Like regions_transformer(), but with many selections f is passed a
+    # snapshot of the view, see ViewSnapshot, so that the number of API calls
+    # doesn't grow with the number of selections. For motions, which don't
+    # change the buffer.
+    sels = list(view.sel())
+    if len(sels) >= _BATCH_MIN_SELECTIONS:
+        view = ViewSnapshot(view)
+
+    _regions_transformer(sels, view, f, False)
+
+
+class _SettingsSnapshot():
+
+    # The settings of a view, with the values that are read kept for the life
+    # of the snapshot. Values that are set are passed through to the view.
+
+    def __init__(self, settings):
+        self._settings = settings
+        self._values = {}  # type: dict
+
+    def __getattr__(self, name):
+        return getattr(self._settings, name)
+
+    def get(self, key, default=None):
+        try:
+            value = self._values[key]
+        except KeyError:
+            value = self._values[key] = self._settings.get(key)
+
+        return default if value is None else value
+
+    def set(self, key, value):
+        self._values.pop(key, None)
+        self._settings.set(key, value)
+
+
+class ViewSnapshot():
+
+    # A view as it is when a command starts, for code that runs once for each
+    # of many selections, e.g. a motion with thousands of cursors after a
+    # "find all".
+    #
+    # The text and lines are read from the line index of the buffer, which is
+    # built in one call and reused until the buffer changes. The folds and the
+    # settings are fetched once. It implements the part of the View API the
+    # motions use: size(), substr(), line(), full_line(), rowcol(),
+    # text_point(), folded_regions() and settings(). Anything else is passed
+    # through to the view.
+    #
+    # The snapshot doesn't see changes to the buffer made after it's taken.
+
+    def __init__(self, view):
+        self.view = view
+        self._index = None
+        self._folds = None  # type: list
+        self._settings = None  # type: _SettingsSnapshot
+
+    def __getattr__(self, name):
+        return getattr(self.view, name)
+
+    def _get_index(self):
+        if self._index is None:
+            # Imported here because the units module depends on this one.
+            from NeoVintageous.nv.vi.units import get_line_index
+            self._index = get_line_index(self.view)
+
+        return self._index
+
+    def size(self):
+        # type: () -> int
+        return self._get_index().size
+
+    def substr(self, x):
+        index = self._get_index()
+        if isinstance(x, int):
+            if x < 0 or x >= index.size:
+                return '\x00'
+
+            return index.text[x]
+
+        return index.text[max(0, x.begin()):max(0, x.end())]
+
+    def _line(self, x, full):
+        # type: (...) -> Region
+        index = self._get_index()
+        if isinstance(x, int):
+            begin = end = x
+        else:
+            begin, end = x.begin(), x.end()
+
+        row = index.last_row if end > index.size else index.row(end)
+        end = index.line_end(row)
+        if full and end < index.size:
+            end += 1
+
+        return Region(index.starts[index.row(begin)], end)
+
+    def line(self, x):
+        # type: (...) -> Region
+        return self._line(x, full=False)
+
+    def full_line(self, x):
+        # type: (...) -> Region
+        return self._line(x, full=True)
+
+    def rowcol(self, pt):
+        # type: (int) -> tuple
+        index = self._get_index()
+        pt = max(0, min(pt, index.size))
+        row = index.row(pt)
+
+        return row, pt - index.starts[row]
+
+    def text_point(self, row, col):
+        # type: (int, int) -> int
+        index = self._get_index()
+        row = max(0, min(row, index.last_row))
+
+        return max(0, min(index.starts[row] + col, index.size))
+
+    def folded_regions(self):
+        # type: () -> list
+        if self._folds is None:
+            self._folds = self.view.folded_regions()
+
+        return self._folds
+
+    def settings(self):
+        # type: () -> _SettingsSnapshot
+        if self._settings is None:
+            self._settings = _SettingsSnapshot(self.view.settings())
+
+        return self._settings
+
+
 def _transform_first_non_blank(view, s):
     return Region(next_non_blank(view, view.line(s.begin()).a))
 
@@ -15,13 +15,146 @@
 # You should have received a copy of the GNU General Public License
 # along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
 
+from sublime import HIDDEN
 from sublime import Region
 
 from NeoVintageous.nv.jumplist import jumplist_back
+from NeoVintageous.nv.shada import shada_get
+from NeoVintageous.nv.shada import shada_set
 
-# store: window, view, rowcol
 
-_MARKS = {}
+# Marks are kept as regions in the view they are set in, so that they move with
+# the text as the buffer is edited. Marks A-Z are global, the others are local
+# to the view.
+#
+# The global marks are indexed by name, and by the id of the view that holds
+# them so that they can be released when the view is closed. Closed views with
+# a file name leave their global marks behind as file marks.
+#
+#   _global (dict[str, View]): The view by mark.
+#   _global_by_view (dict[int, set]): The global marks by view id.
+_global = {}  # type: dict
+_global_by_view = {}  # type: dict
+
+
+def _region_key(name):
+    # type: (str) -> str
+    return 'vi_mark_' + name
+
+
+def _get_pt(view, name):
+    # type: (...) -> int
+    regions = view.get_regions(_region_key(name))
+    if regions:
+        return regions[0].b
+
+
+# File marks persist between sessions as (file name, row, col).
+def _get_file_mark(name):
+    if name.isupper():
+        try:
+            fname, row, col = shada_get('mark')[name]
+            return fname, (int(row), int(col))
+        except (KeyError, TypeError, ValueError):
+            pass
+
+    return None, None
+
+
+def _set_file_mark(view, name, pt):
+    # type: (...) -> None
+    if view.file_name():
+        row, col = view.rowcol(pt)
+        shada_set('mark', name, [view.file_name(), row, col])
+
+
+def _encode_address(fname, buffer_id, rowcol):
+    # type: (str, int, tuple) -> str
+    rowcol_encoded = ':'.join(str(i) for i in rowcol)
+    if fname:
+        return "{0}:{1}".format(fname, rowcol_encoded)
+    else:
+        return "<untitled {0}>:{1}".format(buffer_id, rowcol_encoded)
+
+
+def add_mark(view, name):
+    # type: (...) -> None
+    # TODO: support multiple selections
+    pt = view.sel()[0].b
+    view.add_regions(_region_key(name), [Region(pt)], '', '', HIDDEN)
+
+    if name.isupper():
+        old_view = _global.get(name)
+        if old_view and old_view.id() != view.id():
+            old_view.erase_regions(_region_key(name))
+            _global_by_view[old_view.id()].discard(name)
+
+        _global[name] = view
+        _global_by_view.setdefault(view.id(), set()).add(name)
+        _set_file_mark(view, name, pt)
+
+
+def get_mark_address(view, name, exact=False):
+    # Return an address for the mark {name}.
+    #
+    # Marks in {view} are returned as regions. Marks in other views are
+    # returned as encoded addresses that Sublime Text understands.
+    #
+    # Args:
+    #   view (View): The view the mark is looked up from.
+    #   name (str): The name of the mark to be retrieved.
+    #   exact (bool): If true, the exact position of the mark is returned.
+    #       Otherwise, the relevant row's 0 column is returned.
+    #
+    # Returns:
+    #   Region|str|None
+    if name == "'" or name == "`":
+        # Note: We might get a selection outside the current view, which
+        # deviates from vim behaviour.
+        mark_view, selections = jumplist_back(view)
+        # TODO: support multiple selections
+        pt = selections[0].b if selections else None
+    elif name.isupper():
+        mark_view = _global.get(name)
+        pt = _get_pt(mark_view, name) if mark_view else None
+        if pt is None:
+            fname, rowcol = _get_file_mark(name)
+            if not fname:
+                return None
+
+            if not exact:
+                rowcol = (rowcol[0], 0)
+
+            if fname == view.file_name():
+                return Region(view.text_point(*rowcol))
+
+            return _encode_address(fname, None, rowcol)
+    else:
+        mark_view = view
+        pt = _get_pt(view, name)
+
+    if pt is None:
+        return None
+
+    if not exact:
+        pt = mark_view.line(pt).a
+
+    if mark_view.id() == view.id():
+        return Region(pt)
+
+    return _encode_address(mark_view.file_name(), mark_view.buffer_id(), mark_view.rowcol(pt))
+
+
+def marks_destroy(view):
+    # type: (...) -> None
+    # Release the global marks held by a view that is closing. Marks in files
+    # are kept as file marks.
+    for name in _global_by_view.pop(view.id(), ()):
+        pt = _get_pt(view, name)
+        if pt is not None:
+            _set_file_mark(view, name, pt)
+
+        del _global[name]
 
 
 class Marks(object):
@@ -32,51 +165,7 @@ class Marks(object):
         return self
 
     def add(self, name, view):
-        # TODO: support multiple selections
-        # TODO: Use id attribute; references might change.
-        win, view, rowcol = view.window(), view, view.rowcol(view.sel()[0].b)
-        _MARKS[name] = win, view, rowcol
+        add_mark(view, name)
 
     def get_as_encoded_address(self, name, exact=False):
-        """
-        Return an address for the mark @name.
-
-        @name
-          The name of the mark to be retrieved.
-        @exact
-          If `true`, the exact position of the mark is returned. Otherwise,
-          the relevant row's 0 column is returned.
-        """
-        win, view, rowcol = None, None, None
-        if name == "'" or name == "`":
-            # Note: We might get a selection outside the current view, which
-            # deviates from vim behaviour.
-            view, selections = jumplist_back(self.state.view)
-            if len(selections) > 0:
-                win = view.window()
-                # TODO: support multiple selections
-                rowcol = view.rowcol(selections[0].b)
-        else:
-            win, view, rowcol = _MARKS.get(name, (None,) * 3)
-
-        if win:
-            if exact:
-                rowcol_encoded = ':'.join(str(i) for i in rowcol)
-            else:
-                rowcol_encoded = ':'.join(str(i) for i in (rowcol[0], 0))
-
-            fname = view.file_name()
-
-            # Marks set in the same view as the current one are returned as regions. Marks in other
-            # views are returned as encoded addresses that Sublime Text understands.
-            if view and view.view_id == self.state.view.view_id:
-                if not exact:
-                    rowcol = (rowcol[0], 0)
-
-                return Region(view.text_point(*rowcol))
-            else:
-                # FIXME: Remove buffers when they are closed.
-                if fname:
-                    return "{0}:{1}".format(fname, rowcol_encoded)
-                else:
-                    return "<untitled {0}>:{1}".format(view.buffer_id(), rowcol_encoded)
+        return get_mark_address(self.state.view, name, exact)
@@ -20,6 +20,7 @@ import itertools
 
 from sublime import get_clipboard
 from sublime import set_clipboard
+from sublime import set_timeout
 
 try:
     from Default.paste_from_history import g_clipboard_history as _clipboard_history
@@ -36,6 +37,9 @@ except Exception:
     def update_clipboard_history(text):
         print('NeoVintageous: could not update clipboard history: import error')
 
+from NeoVintageous.nv.shada import shada_fits
+from NeoVintageous.nv.shada import shada_get
+from NeoVintageous.nv.shada import shada_set
 from NeoVintageous.nv.vim import is_visual_mode
 from NeoVintageous.nv.vim import VISUAL
 from NeoVintageous.nv.vim import VISUAL_LINE
@@ -114,33 +118,143 @@ _SPECIAL = (
 
 _ALL = _SPECIAL + _NUMBERED + _NAMED
 
+# The registers that persist between sessions, see _load_data().
+_PERSISTENT = _NAMED + _NUMBERED + (_SMALL_DELETE, _UNNAMED)
+
+# Values larger than this, in characters, are not copied to the system
+# clipboard by the 'vintageous_use_sys_clipboard' setting. Values set in the
+# clipboard registers "+ and "* are always copied.
+_MAX_CLIPBOARD_SYNC_SIZE = 8388608
+
+
+class _Value(list):
+
+    # The contents of a register, one per selection.
+    #
+    # Values are immutable so that one value can be shared by reference
+    # between the named, unnamed and numbered registers, however large the
+    # text is.
+
+    __slots__ = ()
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError('register values are immutable')
+
+    __delitem__ = __iadd__ = __imul__ = __setitem__ = _immutable
+    append = clear = extend = insert = pop = remove = reverse = sort = _immutable
+
+
+def _value(values):
+    # type: (list) -> _Value
+    if isinstance(values, _Value):
+        return values
+
+    return _Value(v if isinstance(v, str) else str(v) for v in values)
+
 
 _data = {'0': None, '1-9': deque([None] * 9, maxlen=9)}  # type: dict
 _linewise = {}  # type: dict
 
+# The registers are loaded from the shada file on first use. Registers reset
+# by _reset_data(), e.g. by tests, are not written back.
+_loaded = False
+_persistent = False
+
+
+def _load_data():
+    global _loaded, _persistent
+    if _loaded:
+        return
+
+    _loaded = _persistent = True
+
+    for name, value in shada_get('register').items():
+        if name not in _PERSISTENT:
+            continue
+
+        try:
+            values, linewise = value['values'], value['linewise']
+        except (KeyError, TypeError):
+            continue
+
+        if name.isdigit() and name != '0':
+            _data['1-9'][int(name) - 1] = _value(values)
+        else:
+            _data[name] = _value(values)
+
+        _linewise[name] = linewise
+
+
+def _persist(*names):
+    if not _persistent:
+        return
+
+    for name in names:
+        if name not in _PERSISTENT:
+            continue
+
+        if name.isdigit() and name != '0':
+            values = _get_numbered_register(name)
+        else:
+            values = _data.get(name)
+
+        # Values over the size cap of the shada file are not queued, so that a
+        # large yank isn't encoded only to be dropped.
+        if not values or not shada_fits(values):
+            shada_set('register', name, None)
+        else:
+            shada_set('register', name, {'values': values, 'linewise': _linewise.get(name, False)})
+
 
 def _set_register_linewise(name, linewise):
     _linewise[name] = linewise
 
 
 def _reset_data():
+    global _loaded, _persistent, _clipboard_pending, _clipboard_skipped
+    _loaded = True
+    _persistent = False
+    _clipboard_pending = None
+    _clipboard_skipped = None
     _data.clear()
     _data['0'] = None
     _data['1-9'] = deque([None] * 9, maxlen=9)
 
 
 def _shift_numbered_register(content):
-    _data['1-9'].appendleft(content)
+    _data['1-9'].appendleft(_value(content))
+    _persist(*_NUMBERED[1:])
 
 
 def _set_numbered_register(number, values):
-    _data['1-9'][int(number) - 1] = values
+    _data['1-9'][int(number) - 1] = _value(values)
+    _persist(str(number))
 
 
 def _get_numbered_register(number):
     return _data['1-9'][int(number) - 1]
 
 
+# The value waiting to be copied to the system clipboard, see _sync_clipboard().
+_clipboard_pending = None  # type: _Value
+
+# The value that was too large to be copied to the system clipboard, and the
+# clipboard text at the time. The value stands in for the clipboard until the
+# clipboard changes.
+_clipboard_skipped = None  # type: tuple
+
+
+def _sync_clipboard():
+    # Copy the pending value to the system clipboard.
+    global _clipboard_pending
+    value = _clipboard_pending
+    if value is not None:
+        _clipboard_pending = None
+        text = '\n'.join(value)
+        set_clipboard(text)
+        update_clipboard_history(text)
+
+
 def _is_register_linewise(register):
     return _linewise.get(register, False)
 
@@ -199,16 +313,39 @@ def _is_writable_register(register):
 class Registers:
 
     def __get__(self, instance, owner):
+        _load_data()
         self.view = instance.view
         self.settings = instance.settings
 
         return self
 
     def _maybe_set_sys_clipboard(self, name, value):
-        if (name in _CLIPBOARD or self.settings.view['vintageous_use_sys_clipboard'] is True):
-            value = '\n'.join(value)
-            set_clipboard(value)
-            update_clipboard_history(value)
+        # Values set in the clipboard registers are copied straight away. Other
+        # values are copied after the command has finished, and only the last
+        # value is copied when a command sets several registers.
+        global _clipboard_pending, _clipboard_skipped
+        if name in _CLIPBOARD:
+            _clipboard_pending = value
+            _clipboard_skipped = None
+            _sync_clipboard()
+        elif self.settings.view['vintageous_use_sys_clipboard'] is True:
+            if sum(map(len, value)) > _MAX_CLIPBOARD_SYNC_SIZE:
+                _sync_clipboard()
+                _clipboard_skipped = (value, get_clipboard())
+            else:
+                if _clipboard_pending is None:
+                    set_timeout(_sync_clipboard, 0)
+
+                _clipboard_pending = value
+                _clipboard_skipped = None
+
+    def _get_sys_clipboard(self):
+        _sync_clipboard()
+        clipboard = get_clipboard()
+        if _clipboard_skipped and _clipboard_skipped[1] == clipboard:
+            return _clipboard_skipped[0]
+
+        return [clipboard]
 
     # Set a register.
     # In order to honor multiple selections in Sublime Text, we need to store
@@ -228,13 +365,14 @@ class Registers:
 
         assert isinstance(values, list), "Register values must be inside a list."
 
-        values = [str(v) for v in values]
+        values = _value(values)
 
         if name.isdigit() and name != '0':
             _set_numbered_register(name, values)
         else:
             _data[name] = values
             _linewise[name] = linewise
+            _persist(name)
 
         if name not in (_EXPRESSION,):
             self._set_unnamed(values, linewise)
@@ -242,12 +380,13 @@ class Registers:
 
     def _set_unnamed(self, values, linewise=False):
         assert isinstance(values, list)
-        _data[_UNNAMED] = [str(v) for v in values]
+        _data[_UNNAMED] = _value(values)
         _linewise[_UNNAMED] = linewise
+        _persist(_UNNAMED)
 
     def set_expression(self, values):
         # Coerce all values into strings.
-        _data[_EXPRESSION] = [str(v) for v in values]
+        _data[_EXPRESSION] = _value(values)
 
     def _append(self, name, suffixes):
         assert len(name) == 1, "Register names must be 1 char long."
@@ -255,9 +394,10 @@ class Registers:
 
         existing_values = _data.get(name.lower(), '')
         new_values = itertools.zip_longest(existing_values, suffixes, fillvalue='')
-        new_values = [(prefix + suffix) for (prefix, suffix) in new_values]
+        new_values = _Value((prefix + suffix) for (prefix, suffix) in new_values)
 
         _data[name.lower()] = new_values
+        _persist(name.lower())
 
         self._set_unnamed(new_values)
         self._maybe_set_sys_clipboard(name, new_values)
@@ -279,6 +419,7 @@ class Registers:
                 return ''
 
         if name in _CLIPBOARD:
+            _sync_clipboard()
             return [get_clipboard()]
 
         if ((name not in (_UNNAMED, _SMALL_DELETE)) and (name in _SPECIAL)):
@@ -286,7 +427,7 @@ class Registers:
 
         # Special case lumped among these --user always wants the sys clipboard
         if ((name == _UNNAMED) and (self.settings.view['vintageous_use_sys_clipboard'] is True)):
-            return [get_clipboard()]
+            return self._get_sys_clipboard()
 
         # If the expression register holds a value and we're requesting the
         # unnamed register, return the expression register and clear it
@@ -327,7 +468,7 @@ class Registers:
         else:
             linewise_if_multiline = False
 
-        selected_text = self._get_selected_text(linewise=linewise)
+        selected_text = _value(self._get_selected_text(linewise=linewise))
 
         multiline = False
         for fragment in selected_text:
@@ -15,15 +15,20 @@
 # You should have received a copy of the GNU General Public License
 # along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
 
+from bisect import bisect_left
+from bisect import bisect_right
 import re
+import time
 
 from sublime import IGNORECASE
 from sublime import LITERAL
 from sublime import Region
+from sublime import set_timeout
 import sublime_plugin
 
 from NeoVintageous.nv.ui import ui_region_flags
 from NeoVintageous.nv.utils import clear_search_highlighting
+from NeoVintageous.nv.vim import status_message
 
 
 # Polyfill to workaround Sublime view.find() return value issue:
@@ -90,26 +95,108 @@ def find_all_in_range(view, term, start, end, flags=0):
         start = m.end()
 
 
+# The maximum number of patterns indexed per buffer, see _get_search_index().
+_SEARCH_INDEX_MAX_PATTERNS = 8
+
+# The match positions of searches, by buffer id.
+_search_index = {}  # type: dict
+
+
+def _get_search_index(view, pattern, flags):
+    # type: (...) -> tuple
+    #
+    # The matches of a search pattern in the buffer, found once and reused
+    # until the buffer changes. Empty matches are not included because they
+    # are never found by the searches either, see find_in_range().
+    #
+    # Returns:
+    #   tuple[list[Region], list[int], list[int]]: The matches, and their begin
+    #       and end points. The matches don't overlap, so all three are sorted.
+    entry = _get_search_index_entry(view, pattern, flags)
+    if entry is None:
+        matches = [r for r in view.find_all(pattern, flags) if r.size() > 0]
+        entry = _set_search_index_entry(view, pattern, flags, matches)
+
+    return entry
+
+
+def _get_search_index_entry(view, pattern, flags):
+    # type: (...) -> tuple
+    #
+    # Returns:
+    #   tuple|None: The indexed matches of the pattern, see _get_search_index(),
+    #       or None if the pattern isn't indexed for the current buffer.
+    index = _search_index.get(view.buffer_id())
+    if index is not None and index['change_count'] == view.change_count():
+        return index['patterns'].get((pattern, flags))
+
+
+def _set_search_index_entry(view, pattern, flags, matches):
+    # type: (...) -> tuple
+    buffer_id = view.buffer_id()
+    change_count = view.change_count()
+
+    index = _search_index.get(buffer_id)
+    if index is None or index['change_count'] != change_count or len(index['patterns']) >= _SEARCH_INDEX_MAX_PATTERNS:
+        index = _search_index[buffer_id] = {'change_count': change_count, 'patterns': {}}
+
+    entry = index['patterns'][(pattern, flags)] = (matches, [r.a for r in matches], [r.b for r in matches])
+
+    return entry
+
+
+def search_index_destroy(view):
+    # type: (...) -> None
+    _search_index.pop(view.buffer_id(), None)
+    _hilite_jobs.pop(view.id(), None)
+
+
+def get_search_count(view, term, match, flags=0):
+    # type: (...) -> tuple
+    #
+    # The position of a match among all the matches in the buffer, like the
+    # "[3/120]" Vim shows when searching.
+    #
+    # Returns:
+    #   tuple[int, int]: The position of the match, starting at 1, and the
+    #       number of matches.
+    matches, begins, _ = _get_search_index(view, term, flags)
+
+    return bisect_left(begins, match.a) + 1, len(matches)
+
+
 def find_wrapping(view, term, start, end, flags=0, times=1):
     try:
         current_sel = view.sel()[0]
     except IndexError:
         return
 
-    for x in range(times):
+    # A single search doesn't need the whole buffer to be indexed. The index is
+    # built in the background when the matches are highlighted, see
+    # hilite_search().
+    if times == 1 and _get_search_index_entry(view, term, flags) is None:
         match = find_in_range(view, term, start, end, flags)
-        # make sure we wrap around the end of the buffer
         if not match:
-            start = 0
+            match = find_in_range(view, term, 0, view.word(current_sel.a).b, flags)
+
+        return match
+
+    matches, begins, _ = _get_search_index(view, term, flags)
+    if not matches:
+        return
+
+    for x in range(times):
+        i = bisect_left(begins, start)
+        # make sure we wrap around the end of the buffer
+        if i == len(matches) or matches[i].b > end:
             # Extend the end of search to the end of current word, because
             # otherwise the current word would be excluded and not found.
             # See https://github.com/NeoVintageous/NeoVintageous/issues/223.
-            end = current_sel.a
-            end = view.word(current_sel.a).b
-            match = find_in_range(view, term, start, end, flags)
-            if not match:
+            i = 0
+            if matches[i].b > view.word(current_sel.a).b:
                 return
 
+        match = matches[i]
         start = match.b
 
     return match
@@ -121,17 +208,33 @@ def reverse_find_wrapping(view, term, start, end, flags=0, times=1):
     except IndexError:
         return
 
+    # See find_wrapping().
+    if times == 1 and _get_search_index_entry(view, term, flags) is None:
+        match = reverse_search(view, term, start, end, flags)
+        if not match and start <= current_sel.b:
+            match = reverse_search(view, term, view.word(current_sel.b).a, view.size(), flags)
+
+        return match
+
+    matches, _, ends = _get_search_index(view, term, flags)
+    if not matches:
+        return
+
+    def _reverse_search(start, end):
+        # The last match before the end point, see reverse_search().
+        i = bisect_right(ends, end) - 1
+        if i >= 0 and matches[i].a >= view.full_line(start).a:
+            return matches[i]
+
     # Search wrapping around the end of the buffer.
     for x in range(times):
-        match = reverse_search(view, term, start, end, flags)
+        match = _reverse_search(start, end)
         # Start searching in the lower half of the buffer if we aren't doing it yet.
         if not match and start <= current_sel.b:
             # Extend the start of search to start of current word, because
             # otherwise the current word would be excluded and not found.
             # See https://github.com/NeoVintageous/NeoVintageous/issues/223.
-            start = view.word(current_sel.b).a
-            end = view.size()
-            match = reverse_search(view, term, start, end, flags)
+            match = _reverse_search(view.word(current_sel.b).a, view.size())
             if not match:
                 return
         # No luck in the whole buffer.
@@ -143,16 +246,81 @@ def reverse_find_wrapping(view, term, start, end, flags=0, times=1):
     return match
 
 
-def find_last_in_range(view, term, start, end, flags=0):
-    found = find_in_range(view, term, start, end, flags)
-    last_found = found
-    while found:
-        found = find_in_range(view, term, found.b, end, flags)
-        if not found or found.b > end:
-            break
-        last_found = found if found else last_found
+# The number of characters searched at first by view_reverse_find_in_range().
+_REVERSE_FIND_CHUNK_SIZE = 65536
+
+
+# Returns the last non-empty match that starts at or after @pos and ends at or
+# before @endpos, or None if there is no match.
+#
+# The range is scanned backwards from @endpos in chunks of whole lines and the
+# scan stops at the first chunk that contains a match. view.find() can't be
+# bounded, so a chunk without a match is searched on to the next match after
+# it; each chunk is twice the size of the previous one to keep those searches
+# few. In the chunk that holds the match, the last match is found by bisecting
+# the positions where matches start, see _find_last_match_start().
+def view_reverse_find_in_range(view, pattern, pos, endpos, flags=0):
+    chunk_size = _REVERSE_FIND_CHUNK_SIZE
+    hi = endpos
+    while hi > pos:
+        lo = pos
+        if hi - chunk_size > pos:
+            lo = max(view.line(hi - chunk_size).a, pos)
+
+        first_match = view_find(view, pattern, lo, flags)
+        end = hi
+        while first_match is not None and first_match.a < end:
+            match = _find_last_match_start(view, pattern, first_match, end, flags)
+            if match.size() == 0:
+                return _find_last_match(view, pattern, first_match, end, endpos, flags)
+
+            if match.b <= endpos:
+                return match
+
+            end = match.a
+
+        hi = lo
+        chunk_size *= 2
+
+    return None
+
+
+def _find_last_match_start(view, pattern, match, end, flags):
+    # type: (...) -> Region
+    # Returns the match at the last position before @end where a match starts,
+    # given a @match that starts before @end. The positions are searched by
+    # galloping forward from @match and then bisecting, so the number of
+    # view.find() calls is logarithmic in the distance to the last match.
+    low = match.a + 1
+    step = 1
+    while low < end:
+        pt = min(low + step - 1, end - 1) if step else (low + end) // 2
+        found = view_find(view, pattern, pt, flags)
+        if found is not None and found.a < end:
+            match = found
+            low = found.a + 1
+            if step:
+                step *= 2
+        else:
+            end = pt
+            step = 0
 
-    return last_found
+    return match
+
+
+def _find_last_match(view, pattern, match, end, endpos, flags):
+    # type: (...) -> Region
+    # Returns the last non-empty match that starts before @end and ends at or
+    # before @endpos, walking forward from @match. Patterns that match the
+    # empty string can match at every position, so they can't be bisected.
+    last_match = None
+    while match is not None and match.a < end:
+        if match.size() > 0 and match.b <= endpos:
+            last_match = match
+
+        match = view_find(view, pattern, match.b if match.size() > 0 else match.b + 1, flags)
+
+    return last_match
 
 
 # The @start position is linewise.
@@ -186,28 +354,7 @@ def reverse_search(view, term, start, end, flags=0):
     if start < 0 or end > view.size():
         return None
 
-    lo_line = view.full_line(start)
-    hi_line = view.full_line(end)
-
-    while True:
-        low_row, hi_row = view.rowcol(lo_line.a)[0], view.rowcol(hi_line.a)[0]
-        middle_row = (low_row + hi_row) // 2
-
-        middle_line = view.full_line(view.text_point(middle_row, 0))
-
-        lo_region = Region(lo_line.a, middle_line.b)
-        hi_region = Region(middle_line.b, min(hi_line.b, end))
-
-        if find_in_range(view, term, hi_region.a, hi_region.b, flags):
-            lo_line = view.full_line(middle_line.b)
-        elif find_in_range(view, term, lo_region.a, lo_region.b, flags):
-            hi_line = view.full_line(middle_line.a)
-        else:
-            return None
-
-        if lo_line == hi_line:
-            # we found the line we were looking for, now extract the match.
-            return find_last_in_range(view, term, hi_line.a, min(hi_line.b, end), flags)
+    return view_reverse_find_in_range(view, term, view.full_line(start).a, end, flags)
 
 
 def reverse_search_by_pt(view, term, start, end, flags=0):
@@ -220,28 +367,165 @@ def reverse_search_by_pt(view, term, start, end, flags=0):
     if start < 0 or end > view.size():
         return None
 
-    lo_line = view.full_line(start)
-    hi_line = view.full_line(end)
+    return view_reverse_find_in_range(view, term, start, end, flags)
 
-    while True:
-        low_row, hi_row = view.rowcol(lo_line.a)[0], view.rowcol(hi_line.a)[0]
-        middle_row = (low_row + hi_row) // 2
 
-        middle_line = view.full_line(view.text_point(middle_row, 0))
+# The number of characters either side of the visible region that are
+# highlighted straight away, see hilite_search().
+_HILITE_VISIBLE_MARGIN = 10000
+
+# The time, in seconds, that each slice of the full buffer search may run for
+# before yielding to the UI, see hilite_search().
+_HILITE_SLICE_TIME = 0.01
+
+# The pending full buffer searches, by view id.
+_hilite_jobs = {}  # type: dict
+
+
+def hilite_search(view, pattern, flags=0, match=None):
+    # type: (...) -> None
+    #
+    # Highlights the matches of a search pattern when hlsearch is enabled, and
+    # shows the search count of @match, if given, see get_search_count().
+    #
+    # If the pattern isn't indexed yet, the matches in and around the visible
+    # region are highlighted straight away, and the whole buffer is then
+    # indexed in timed slices via set_timeout() so that the UI doesn't block on
+    # large buffers. Starting a search for another pattern, or changing the
+    # buffer, cancels the pending slices.
+    hlsearch = view.settings().get('vintageous_hlsearch')
+    if not hlsearch:
+        clear_search_highlighting(view)
+
+    entry = _get_search_index_entry(view, pattern, flags)
+    if entry is not None:
+        _hilite_jobs.pop(view.id(), None)
+        _hilite_search_done(view, entry, hlsearch, match)
+        return
+
+    if hlsearch:
+        visible_region = view.visible_region()
+        matches, _ = _find_matches(
+            view,
+            pattern,
+            flags,
+            view.line(max(visible_region.begin() - _HILITE_VISIBLE_MARGIN, 0)).a,
+            min(visible_region.end() + _HILITE_VISIBLE_MARGIN, view.size())
+        )
+
+        _add_search_regions(view, matches, [r.a for r in matches])
+    elif match is None:
+        _hilite_jobs.pop(view.id(), None)
+        return
+
+    job = _hilite_jobs.get(view.id())
+    if job and job['pattern'] == pattern and job['flags'] == flags and job['change_count'] == view.change_count():
+        # The same search is already pending e.g. "n" pressed repeatedly.
+        job['match'] = match
+        return
+
+    job = _hilite_jobs[view.id()] = {
+        'pattern': pattern,
+        'flags': flags,
+        'change_count': view.change_count(),
+        'match': match,
+        'matches': []
+    }
+
+    _hilite_search_slice(view, job, 0)
+
+
+def _hilite_search_slice(view, job, pos):
+    # type: (...) -> None
+    def _next_slice():
+        # Superseded by another search, or the buffer has changed.
+        if _hilite_jobs.get(view.id()) is not job or view.change_count() != job['change_count']:
+            return
+
+        deadline = time.time() + _HILITE_SLICE_TIME
+        matches, next_pos = _find_matches(view, job['pattern'], job['flags'], pos, view.size(), deadline)
+        job['matches'].extend(matches)
+
+        if next_pos is not None:
+            _hilite_search_slice(view, job, next_pos)
+            return
+
+        del _hilite_jobs[view.id()]
+        entry = _set_search_index_entry(view, job['pattern'], job['flags'], job['matches'])
+        _hilite_search_done(view, entry, view.settings().get('vintageous_hlsearch'), job['match'])
+
+    set_timeout(_next_slice, 0)
+
 
-        lo_region = Region(lo_line.a, middle_line.b)
-        hi_region = Region(middle_line.b, min(hi_line.b, end))
+def _hilite_search_done(view, entry, hlsearch, match):
+    # type: (...) -> None
+    matches, begins, _ = entry
+
+    if hlsearch:
+        _add_search_regions(view, matches, begins)
+
+    if match is not None and matches:
+        status_message('[%s/%s]', bisect_left(begins, match.a) + 1, len(matches))
+
+
+def _find_matches(view, pattern, flags, pos, endpos, deadline=None):
+    # type: (...) -> tuple
+    #
+    # Finds the non-empty matches that begin in the range @pos to @endpos.
+    #
+    # Returns:
+    #   tuple[list[Region], int|None]: The matches, and the point to resume the
+    #       search from if the @deadline was reached, otherwise None.
+    matches = []
+    while pos <= endpos:
+        match = view.find(pattern, pos, flags)
+        if match is None or match.b == -1 or match.a >= endpos:
+            break
 
-        if find_in_range(view, term, hi_region.a, hi_region.b, flags):
-            lo_line = view.full_line(middle_line.b)
-        elif find_in_range(view, term, lo_region.a, lo_region.b, flags):
-            hi_line = view.full_line(middle_line.a)
+        if match.size() > 0:
+            matches.append(match)
+            pos = match.b
         else:
-            return None
+            pos = match.b + 1
+
+        if deadline is not None and time.time() > deadline:
+            return matches, pos
+
+    return matches, None
+
 
-        if lo_line == hi_line:
-            # we found the line we were looking for, now extract the match.
-            return find_last_in_range(view, term, max(hi_line.a, start), min(hi_line.b, end), flags)
+def _add_search_regions(view, matches, begins):
+    # type: (...) -> None
+    if not matches:
+        clear_search_highlighting(view)
+        return
+
+    # The current matches are the ones containing a selection. The matches
+    # don't overlap, so only the last two beginning at or before a selection
+    # can contain it; two when an empty selection is where they meet.
+    current_matches = []
+    for sel in view.sel():
+        i = bisect_right(begins, sel.begin())
+        for match in matches[max(i - 2, 0):i]:
+            if match.contains(sel) and match not in current_matches[-2:]:
+                current_matches.append(match)
+
+    # The scopes are prefixed with common color scopes so that color schemes
+    # have sane default colors. Color schemes can progressively enhance
+    # support by using the nv_* scopes.
+    view.add_regions(
+        'vi_search',
+        matches,
+        scope='string neovintageous_search_occ',
+        flags=ui_region_flags(view.settings().get('neovintageous_search_occ_style'))
+    )
+
+    view.add_regions(
+        'vi_search_current',
+        current_matches,
+        scope='support.function neovintageous_search_cur',
+        flags=ui_region_flags(view.settings().get('neovintageous_search_cur_style'))
+    )
 
 
 # TODO [refactor] Move to commands module
@@ -276,40 +560,8 @@ class BufferSearchBase(sublime_plugin.TextCommand):
     def build_pattern(self, query):
         return query
 
-    def hilite(self, query):
-        regions = self.view.find_all(
-            self.build_pattern(query),
-            self.calculate_flags(query)
-        )
-
-        if not regions:
-            clear_search_highlighting(self.view)
-            return
-
-        sels = self.view.sel()
-        regions_current = []
-        for region in regions:
-            for sel in sels:
-                if region.contains(sel):
-                    regions_current.append(region)
-
-        # The scopes are prefixed with common color scopes so that color schemes
-        # have sane default colors. Color schemes can progressively enhance
-        # support by using the nv_* scopes.
-        if self.view.settings().get('vintageous_hlsearch'):
-            self.view.add_regions(
-                'vi_search',
-                regions,
-                scope='string neovintageous_search_occ',
-                flags=ui_region_flags(self.view.settings().get('neovintageous_search_occ_style'))
-            )
-
-            self.view.add_regions(
-                'vi_search_current',
-                regions_current,
-                scope='support.function neovintageous_search_cur',
-                flags=ui_region_flags(self.view.settings().get('neovintageous_search_cur_style'))
-            )
+    def hilite(self, query, match=None):
+        hilite_search(self.view, self.build_pattern(query), self.calculate_flags(query), match)
 
 
 # TODO [refactor] Move to commands module
@@ -108,6 +108,23 @@ def destroy(view):
     except KeyError:
         pass
 
+    try:
+        del _VintageSettings._states[view.id()]
+    except KeyError:
+        pass
+
+
+def sync_vintage_settings(view):
+    # Write any pending vintage state for the view to the view settings.
+    #
+    # The in-memory state is the source of truth for the vintage settings,
+    # writes are batched and only persisted to the view settings when this is
+    # called e.g. at the end of a key event, or when the mode changes.
+    try:
+        _VintageSettings._states[view.id()].sync(view)
+    except KeyError:
+        pass
+
 
 def _set_generic_view_setting(view, name, value, opt, globally=False):
     if opt.scope == _SCOPE_VI_VIEW:
@@ -130,6 +147,11 @@ def _set_auto_indent(view, name, value, opt, globally=False):
     save_settings('Preferences.sublime-settings')
 
 
+def _set_history(view, name, value, opt, globally=False):
+    # The histories are shared by all views, so like Vim the option is global.
+    _set_generic_view_setting(view, name, value, opt, globally=True)
+
+
 def _set_minimap(view, name, value, opt, globally=False):
     view.window().run_command('toggle_minimap')
 
@@ -153,6 +175,14 @@ def _opt_bool_parser(value):
         return False
 
 
+def _opt_history_parser(value):
+    value = int(value)
+    if value < 0 or value > 10000:
+        raise ValueError
+
+    return value
+
+
 def _opt_rulers_parser(value):
     try:
         converted = json.loads(value)
@@ -168,6 +198,7 @@ def _opt_rulers_parser(value):
 
 _VI_OPTIONS = {
     'autoindent': _vi_user_setting(scope=_SCOPE_VI_VIEW, values=(True, False, '0', '1'), default=True, parser=_opt_bool_parser, action=_set_auto_indent, negatable=True),  # noqa: E501
+    'history': _vi_user_setting(scope=_SCOPE_VI_VIEW, values=None, default=10000, parser=_opt_history_parser, action=_set_history, negatable=False),  # noqa: E501
     'hlsearch': _vi_user_setting(scope=_SCOPE_VI_VIEW, values=(True, False, '0', '1'), default=True, parser=_opt_bool_parser, action=_set_generic_view_setting, negatable=True),  # FIXME # noqa: E501
     'ignorecase': _vi_user_setting(scope=_SCOPE_VI_VIEW, values=(True, False, '0', '1'), default=False, parser=_opt_bool_parser, action=_set_generic_view_setting, negatable=True),  # FIXME # noqa: E501
     'incsearch': _vi_user_setting(scope=_SCOPE_VI_VIEW, values=(True, False, '0', '1'), default=True, parser=_opt_bool_parser, action=_set_generic_view_setting, negatable=True),  # FIXME # noqa: E501
@@ -182,6 +213,7 @@ _VI_OPTIONS = {
 
 _VI_OPTION_ALIASES = {
     'ai': 'autoindent',
+    'hi': 'history',
     'hls': 'hlsearch',
     'ic': 'ignorecase',
 }
@@ -333,22 +365,65 @@ class _SublimeSettings():
         self.settings.set(key, value)
 
 
+class _VintageState():
+
+    # In-memory copy of a view's "vintage" settings. Reading and writing the
+    # view settings means copying the whole "vintage" dict in and out of
+    # Sublime Text, so the copy here is used instead and written back in one
+    # batch by sync().
+
+    __slots__ = ('values', 'dirty')
+
+    def __init__(self, values):
+        self.values = values  # type: dict
+        self.dirty = False
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value):
+        self.values[key] = value
+        self.dirty = True
+
+    def sync(self, view):
+        if self.dirty:
+            # Values such as command definitions are kept as live objects and
+            # only serialized when they are written to the view settings.
+            view.settings().set('vintage', {
+                k: v.serialize() if hasattr(v, 'serialize') else v for k, v in self.values.items()
+            })
+            self.dirty = False
+
+
 class _VintageSettings():
 
     _volatile_settings = []  # type: list
 
     _volatile = defaultdict(dict)  # type: dict
 
+    # The in-memory vintage state, keyed by view id.
+    _states = {}  # type: dict
+
     def __init__(self, view):
         self.view = view
 
-        if view is not None:
-            if not isinstance(view.settings().get('vintage'), dict):
-                view.settings().set('vintage', dict())
+    def _get_state(self):
+        # type: () -> _VintageState
+        try:
+            return _VintageSettings._states[self.view.id()]
+        except KeyError:
+            pass
 
-            window = view.window()
-            if window is not None and not isinstance(window.settings().get('vintage'), dict):
-                window.settings().set('vintage', dict())
+        # The state is loaded from the view settings the first time it's
+        # needed, which restores the state persisted from a previous session.
+        values = self.view.settings().get('vintage')
+        if not isinstance(values, dict):
+            values = {}
+            self.view.settings().set('vintage', values)
+
+        state = _VintageSettings._states[self.view.id()] = _VintageState(values)
+
+        return state
 
     def __getitem__(self, key):
         try:
@@ -361,7 +436,7 @@ class _VintageSettings():
                 try:
                     return self._get_volatile(key)
                 except KeyError:
-                    value = self.view.settings().get('vintage').get(key)
+                    value = self._get_state().get(key)
             else:
                 value = self.view.window().settings().get('vintage').get(key)
 
@@ -375,12 +450,16 @@ class _VintageSettings():
             if key in _VintageSettings._volatile_settings:
                 self._set_volatile(key, value)
                 return
-            setts, target = self.view.settings().get('vintage'), self.view
+
+            self._get_state().set(key, value)
         else:
-            setts, target = self.view.window().settings().get('vintage'), self.view.window()
+            window = self.view.window()
+            setts = window.settings().get('vintage')
+            if not isinstance(setts, dict):
+                setts = {}
 
-        setts[key] = value
-        target.settings().set('vintage', setts)
+            setts[key] = value
+            window.settings().set('vintage', setts)
 
     def _get_volatile(self, key):
         try:
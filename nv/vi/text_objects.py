@@ -15,6 +15,8 @@
 # You should have received a copy of the GNU General Public License
 # along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
 
+from bisect import bisect_left
+from bisect import bisect_right
 import re
 
 from sublime import CLASS_EMPTY_LINE
@@ -29,9 +31,10 @@ from sublime import Region
 
 from NeoVintageous.nv.utils import next_non_blank
 from NeoVintageous.nv.utils import prev_non_blank
-from NeoVintageous.nv.utils import prev_non_ws
 from NeoVintageous.nv.vi.search import find_in_range
 from NeoVintageous.nv.vi.search import reverse_search_by_pt
+from NeoVintageous.nv.vi.units import ChunkedText
+from NeoVintageous.nv.vi.units import get_line_index
 from NeoVintageous.nv.vi.units import word_starts
 
 
@@ -43,6 +46,7 @@ RXC_ANY_TAG = re.compile(r'</?([0-9A-Za-z]+).*?>')
 # for example.
 RX_ANY_START_TAG = r'<([0-9A-Za-z]+)(.*?)>'
 RX_ANY_END_TAG = r'</([0-9A-Za-z-]+).*?>'
+_RXC_TAG = re.compile(RX_ANY_TAG)
 
 
 ANCHOR_NEXT_WORD_BOUNDARY = CLASS_WORD_START | CLASS_PUNCTUATION_START | CLASS_LINE_END
@@ -366,23 +370,16 @@ def get_text_object_region(view, s, text_object, inclusive=False, count=1):
         return Region(s.a, w.b)
 
     if type_ == SENTENCE:
-        # FIXME: This doesn't work well.
-        # TODO: Improve this.
-        sentence_start = view.find_by_class(s.b, forward=False, classes=CLASS_EMPTY_LINE)
-        sentence_start_2 = reverse_search_by_pt(view, r'[.?!:]\s+|[.?!:]$', start=0, end=s.b)
-        if sentence_start_2:
-            sentence_start = (sentence_start + 1 if (sentence_start > sentence_start_2.b) else sentence_start_2.b)
-        else:
-            sentence_start = sentence_start + 1
-
-        sentence_end = find_in_range(view, r'([.?!:)](?=\s))|([.?!:)]$)', start=s.b, end=view.size())
-        if not sentence_end:
+        starts, ends, _ = get_line_index(view).sentences()
+        i = bisect_right(starts, s.b - 1 if s.b > s.a else s.b) - 1
+        if i < 0:
             return s
 
-        if inclusive:
-            return Region(sentence_start, sentence_end.b)
-        else:
-            return Region(sentence_start, sentence_end.b)
+        # "as" includes the white space after the sentence, up to the next one.
+        if inclusive and i + count < len(starts):
+            return Region(starts[i], starts[i + count])
+
+        return Region(starts[i], ends[min(i + count, len(ends)) - 1])
 
     # Support for a port of the Indent Object plugin:
     # https://github.com/michaeljsmith/vim-indent-object
@@ -399,110 +396,87 @@ def get_text_object_region(view, s, text_object, inclusive=False, count=1):
     return s
 
 
-def find_next_lone_bracket(view, start, items, unbalanced=0):
-    # TODO: Extract common functionality from here and the % motion instead of
-    # duplicating code.
-    new_start = start
-    for i in range(unbalanced or 1):
-        next_closing_bracket = find_in_range(
-            view,
-            items[1],
-            start=new_start,
-            end=view.size(),
-            flags=IGNORECASE
-        )
-
-        if next_closing_bracket is None:
-            # Unbalanced items; nothing we can do.
-            return
-
-        while view.substr(next_closing_bracket.begin() - 1) == '\\':
-            next_closing_bracket = find_in_range(view, items[1],
-                                                 start=next_closing_bracket.end(),
-                                                 end=view.size(),
-                                                 flags=IGNORECASE)
-            if next_closing_bracket is None:
-                return
-
-        new_start = next_closing_bracket.end()
+# The number of characters read from the view by the first step of a bracket
+# scan. Each following step reads twice as many, so matches close to the start
+# are found after reading very little of the buffer.
+_BRACKET_SCAN_CHUNK_SIZE = 4096
 
-    if view.substr(start) == items[0][-1]:
-        start += 1
 
-    nested = 0
-    while True:
-        next_opening_bracket = find_in_range(view, items[0],
-                                             start=start,
-                                             end=next_closing_bracket.b,
-                                             flags=IGNORECASE)
-        if not next_opening_bracket:
-            break
-
-        nested += 1
-        start = next_opening_bracket.end()
-
-    if nested > 0:
-        return find_next_lone_bracket(view, next_closing_bracket.end(),
-                                      items,
-                                      nested)
+def find_balanced_bracket(view, start, brackets, forward=True, count=1, escaped=False):
+    # type: (...) -> Region
+    #
+    # Find the closing bracket (forward) or opening bracket (backward) of the
+    # pair enclosing the start point. Brackets in between are balanced with a
+    # depth counter, in one pass over the text. The scan is not recursive, so
+    # there is no limit on how deep the brackets can be nested.
+    #
+    # Args:
+    #   view (View):
+    #   start (int): Forward, the scan starts at this point. Backward, the scan
+    #       starts at the point before it.
+    #   brackets (tuple[str, str]): The opening and closing brackets as regular
+    #       expressions that match a single character e.g. ('\\{', '\\}').
+    #   forward (bool):
+    #   count (int): The number of unbalanced brackets to skip, 1 means the
+    #       innermost one.
+    #   escaped (bool): Brackets preceded by a backslash are ignored. If true,
+    #       only those brackets are matched instead.
+    #
+    # Returns:
+    #   Region|None: The bracket found, or None if the brackets are unbalanced.
+    pattern = re.compile('{}(?:({})|({}))'.format(
+        '(?<=\\\\)' if escaped else '(?<!\\\\)', brackets[0], brackets[1]))
+
+    depth = count
+    chunk_size = _BRACKET_SCAN_CHUNK_SIZE
+
+    if forward:
+        size = view.size()
+        pos = start
+        while pos < size:
+            end = min(pos + chunk_size, size)
+
+            # Read one extra character so that a bracket at the start of the
+            # chunk can be checked for a backslash.
+            offset = max(pos - 1, 0)
+            for match in pattern.finditer(view.substr(Region(offset, end)), pos - offset):
+                depth += 1 if match.group(1) else -1
+                if depth == 0:
+                    return Region(offset + match.start(), offset + match.end())
+
+            pos = end
+            chunk_size *= 2
     else:
-        return next_closing_bracket
+        pos = start
+        while pos > 0:
+            begin = max(pos - chunk_size, 0)
+            offset = max(begin - 1, 0)
+            for match in reversed(list(pattern.finditer(view.substr(Region(offset, pos)), begin - offset))):
+                depth += 1 if match.group(2) else -1
+                if depth == 0:
+                    return Region(offset + match.start(), offset + match.end())
 
+            pos = begin
+            chunk_size *= 2
 
-def find_prev_lone_bracket(view, start, tags, unbalanced=0):
-    # TODO: Extract common functionality from here and the % motion instead of
-    # duplicating code.
-
-    # XXX: refactor this
-    if view.substr(start) == (tags[0][1] if len(tags[0]) > 1 else tags[0]):
-        if not unbalanced and view.substr(start - 1) != '\\':
-            return Region(start, start + 1)
+    return None
 
-    new_start = start
-    for i in range(unbalanced or 1):
-        prev_opening_bracket = reverse_search_by_pt(view, tags[0],
-                                                    start=0,
-                                                    end=new_start,
-                                                    flags=IGNORECASE)
-
-        if prev_opening_bracket is None:
-            # Unbalanced tags; nothing we can do.
-            return
-
-        while view.substr(prev_opening_bracket.begin() - 1) == '\\':
-            prev_opening_bracket = reverse_search_by_pt(
-                view,
-                tags[0],
-                start=0,
-                end=prev_opening_bracket.begin(),
-                flags=IGNORECASE
-            )
 
-            if prev_opening_bracket is None:
-                return
+def find_next_lone_bracket(view, start, items, unbalanced=0):
+    # type: (...) -> Region
+    if view.substr(start) == items[0][-1]:
+        start += 1
 
-        new_start = prev_opening_bracket.begin()
+    return find_balanced_bracket(view, start, items, count=unbalanced or 1)
 
-    nested = 0
-    while True:
-        next_closing_bracket = reverse_search_by_pt(view,
-                                                    tags[1],
-                                                    start=prev_opening_bracket.a,
-                                                    end=start,
-                                                    flags=IGNORECASE)
-        if not next_closing_bracket:
-            break
 
-        nested += 1
-        start = next_closing_bracket.begin()
+def find_prev_lone_bracket(view, start, tags, unbalanced=0):
+    # type: (...) -> Region
+    if view.substr(start) == tags[0][-1]:
+        if not unbalanced and view.substr(start - 1) != '\\':
+            return Region(start, start + 1)
 
-    if nested > 0:
-        return find_prev_lone_bracket(view,
-                                      prev_opening_bracket.begin(),
-                                      tags,
-                                      nested)
-    else:
-        return prev_opening_bracket
+    return find_balanced_bracket(view, start, tags, forward=False, count=unbalanced or 1)
 
 
 def find_paragraph_text_object(view, s, inclusive=True, count=1):
@@ -526,63 +500,22 @@ def find_paragraph_text_object(view, s, inclusive=True, count=1):
 
 
 def find_sentences_forward(view, start, count=1):
-    def _find_sentence_forward(view, start):
-        char = view.substr(start)
-        if char == '\n':
-            next_sentence = view.find('\\s+', start)
-        else:
-            next_sentence = view.find('[\\.\\?\\!][\\)\\]"\']*\\s', start)
-
-        if next_sentence:
-            return next_non_blank(view, next_sentence.b)
-
     start = start.b if isinstance(start, Region) else start
 
-    new_start = start
-    for i in range(count):
-        next_sentence = _find_sentence_forward(view, new_start)
-        if not next_sentence:
-            break
-
-        new_start = next_sentence
-
-    if new_start != start:
-        return Region(new_start)
+    starts = get_line_index(view).sentences()[0]
+    i = min(bisect_right(starts, start) + count, len(starts)) - 1
+    if i >= 0 and starts[i] > start:
+        return Region(starts[i])
 
 
 def find_sentences_backward(view, start_pt, count=1):
     if isinstance(start_pt, Region):
         start_pt = start_pt.a
 
-    pt = prev_non_ws(view, start_pt)
-    sen = Region(pt)
-    prev = sen
-    while True:
-        sen = view.expand_by_class(sen, CLASS_LINE_END | CLASS_PUNCTUATION_END)
-        if sen.a <= 0 or view.substr(sen.begin() - 1) in ('.', '\n', '?', '!'):
-            if view.substr(sen.begin() - 1) == '.' and not view.substr(sen.begin()) == ' ':
-                continue
-
-            if prev == sen:
-                break
-
-            prev = sen
-
-            if sen:
-                pt = next_non_blank(view, sen.a)
-                if pt < sen.b and pt != start_pt:
-                    if view.substr(pt) == '\n':
-                        if pt + 1 != start_pt:
-                            pt += 1
-
-                    return Region(pt)
-
-                if pt > 0:
-                    continue
-
-            return sen
-
-    return sen
+    starts = get_line_index(view).sentences()[2]
+    i = max(bisect_left(starts, start_pt) - count, 0)
+    if i < len(starts) and starts[i] < start_pt:
+        return Region(starts[i])
 
 
 def find_inner_paragraph(view, initial_loc):
@@ -594,131 +527,97 @@ def find_inner_paragraph(view, initial_loc):
     contiguous lines all having the same whitespace status (a line either
     consists entirely of whitespace characters or it does not).
     """
-    # Determine whether the initial point lies in an all-whitespace line.
-    def is_whitespace(region):
-        return len(view.substr(region).strip()) == 0
+    index = get_line_index(view)
+    row = index.row(initial_loc)
 
-    iws = is_whitespace(view.line(initial_loc))
-
-    # Search backward finding all lines with similar whitespace status.
-    # This will give use the value for begin.
-    p = initial_loc
-    while True:
-        line = view.line(p)
-        if is_whitespace(line) != iws:
-            break
-        elif line.begin() == 0:
-            p = 0
-            break
-
-        p = line.begin() - 1
+    # The lines around the initial point with the same whitespace status.
+    _, first, last = index.run(index.blank, row)
 
+    p = index.starts[first] - 1 if first > 0 else 0
     begin = p + 1 if p > 0 else p
 
-    # To get the value for end, we do the same thing, this time searching forward.
-    p = initial_loc
-    while True:
-        line = view.line(p)
-        if is_whitespace(line) != iws:
-            break
-
-        p = line.end() + 1
-
-        if p >= view.size():
-            break
+    # The end stops short of an empty last line.
+    if index.last_row > 0 and index.starts[index.last_row] == index.size:
+        last = min(last, index.last_row - 1)
 
-    end = p
+    end = index.line_end(max(row, last)) + 1
 
     return (begin, end)
 
 
 def find_indent_text_object(view, s, inclusive=True):
     """Implement the indent text object as specified at http://vim.wikia.com/wiki/Indent_text_object."""
-    begin = view.line(s)
-    end = view.line(s)
-
-    start_line = view.line(s)
-    start_line_content = view.substr(start_line)
+    index = get_line_index(view)
+    indents = index.indents(view.settings().get('tab_size', 4))
+
+    # The indent of the first non-blank line of the selection.
+    indent = None
+    for row in range(index.row(s.begin()), index.row(s.end()) + 1):
+        if indents[row] is not None:
+            indent = indents[row]
+            break
 
     # Do nothing when the line is whitespace-only
-    if re.match("^\\s*$", start_line_content):
+    if indent is None:
         return (s.a, s.b)
 
-    whitespace = re.match("\\s*", start_line_content).group(0)
-    whitespace_length = len(whitespace)
-
     # From http://vim.wikia.com/wiki/Indent_text_object:
     if inclusive:
         # "a"
-        if whitespace_length == 0:
+        if indent == 0:
             # When the cursor is on a line with zero indent,
             # the selection will be delimited by blank lines
             # (that may or may not contain whitespaces).
-            pattern = None
             break_on_empty_lines = True
         else:
             # When the cursor is on a line with a non-zero indent,
             # the selection will be delimited by lines with
             # an indent that is less than the original line;
             # blank lines will be SELECTED.
-            pattern = "\\s{0," + str(whitespace_length - 1) + "}\\S"
             break_on_empty_lines = False
     else:
         # "i"
-        if whitespace_length == 0:
-            # When the cursor is on a line with zero indent,
-            # the selection will be delimited by blank lines
-            # (that may or may not contain whitespaces).
-            pattern = None
-            break_on_empty_lines = True
-        else:
-            # When the cursor is on a line with a non-zero indent,
-            # the selection will be delimited by lines with
-            # an indent that is less than the original line;
-            # blank lines will be IGNORED and thus,
-            # become the delimiter if one is encountered.
-            pattern = "\\s{0," + str(whitespace_length - 1) + "}\\S"
-            break_on_empty_lines = True
-
-    if pattern:
-        compiled_pattern = re.compile(pattern)
-
-        def should_break_on_line(line_content):
-            if break_on_empty_lines and not line_content.strip():
-                return True
-
-            return "pattern_match" if compiled_pattern.match(line_content) else False
-    else:
-        def should_break_on_line(line_content):
-            return not line_content.strip()
-
-    # Search backward until the pattern is matched
+        # When the cursor is on a line with zero indent,
+        # the selection will be delimited by blank lines
+        # (that may or may not contain whitespaces).
+        #
+        # When the cursor is on a line with a non-zero indent,
+        # the selection will be delimited by lines with
+        # an indent that is less than the original line;
+        # blank lines will be IGNORED and thus,
+        # become the delimiter if one is encountered.
+        break_on_empty_lines = True
+
+    def should_break_on_row(row):
+        if indents[row] is None:
+            return break_on_empty_lines
+
+        return indents[row] < indent
+
+    # Search backward until a line breaks the object.
     p = s.a
-    while True:
-        line = view.line(p)
-        line_content = view.substr(line)
-        if should_break_on_line(line_content):
-            break
-        elif line.begin() == 0:
-            p = 0
-            break
+    row = index.row(p)
+    if not should_break_on_row(row):
+        while row > 0 and not should_break_on_row(row - 1):
+            row -= 1
 
-        p = line.begin() - 1
+        p = index.starts[row] - 1 if row > 0 else 0
 
     begin = p + 1 if p > 0 else p
 
-    # To get the value for end, we do the same thing, this time searching forward.
-    p = s.b
-    while True:
-        line = view.line(p)
-        line_content = view.substr(line)
-        if should_break_on_line(line_content):
-            break
+    # To get the value for end, we do the same thing, this time searching
+    # forward. The search stops short of an empty last line.
+    last_row = index.last_row
+    if last_row > 0 and index.starts[last_row] == index.size:
+        last_row -= 1
 
-        p = line.end() + 1
+    p = s.b
+    row = index.row(p)
+    if not should_break_on_row(row):
+        while row < last_row and not should_break_on_row(row + 1):
+            row += 1
 
-        if p >= view.size():
-            break
+        p = index.line_end(row) + 1
 
     end = p - 1
 
@@ -742,15 +641,16 @@ def find_line_text_object(view, s):
 # TODO: Move this to units.py.
 def word_reverse(view, pt, count=1, big=False):
     # type: (...) -> int
+    text = ChunkedText(view, pt)
     t = pt
     for _ in range(count):
-        t = view.find_by_class(t, forward=False, classes=WORD_REVERSE_STOPS)
+        t = text.find_by_class(t, forward=False, classes=WORD_REVERSE_STOPS)
         if t == 0:
             break
 
         if big:
             # Skip over punctuation characters.
-            while not ((view.substr(t - 1) in '\n\t ') or (t <= 0)):
+            while not ((text.substr(t - 1) in '\n\t ') or (t <= 0)):
                 t -= 1
 
     return t
@@ -765,22 +665,23 @@ def big_word_reverse(view, pt, count=1):
 # TODO: Move this to units.py.
 def word_end_reverse(view, pt, count=1, big=False):
     # type: (...) -> int
+    text = ChunkedText(view, pt)
     t = pt
     for i in range(count):
         if big:
             # Skip over punctuation characters.
-            while not ((view.substr(t - 1) in '\n\t ') or (t <= 0)):
+            while not ((text.substr(t - 1) in '\n\t ') or (t <= 0)):
                 t -= 1
 
         # `ge` should stop at the previous word end if starting at a space
         # immediately after a word.
-        if (i == 0 and view.substr(t).isspace() and not view.substr(t - 1).isspace()):
+        if (i == 0 and text.substr(t).isspace() and not text.substr(t - 1).isspace()):
             continue
 
-        if (not view.substr(t).isalnum() and not view.substr(t).isspace() and view.substr(t - 1).isalnum() and t > 0):
+        if (not text.substr(t).isalnum() and not text.substr(t).isspace() and text.substr(t - 1).isalnum() and t > 0):
             pass
         else:
-            t = view.find_by_class(t, forward=False, classes=WORD_END_REVERSE_STOPS)
+            t = text.find_by_class(t, forward=False, classes=WORD_END_REVERSE_STOPS)
 
         if t == 0:
             break
@@ -844,18 +745,40 @@ def get_closest_tag(view, pt):
     # Returns:
     #   tuple[int, Region]
     #   tuple[None, None]
-    substr = view.substr
-    while pt > 0 and substr(pt) != '<':
-        pt -= 1
-
-    if substr(pt) != '<':
+    begins, tags = _get_tags(view)
+    i = bisect_right(begins, pt) - 1
+    if i < 0:
         return None, None
 
-    next_tag = view.find(RX_ANY_TAG, pt)
-    if next_tag.a != pt:
-        return None, None
+    begin, end = tags[i][:2]
+
+    return begin, Region(begin, end)
+
+
+# The tags of the last buffer tokenized, see _get_tags().
+_tags_cache = {}  # type: dict
+
+
+def _get_tags(view):
+    # type: (...) -> tuple
+    #
+    # Tokenize all the tags in the buffer in one pass. The tokens are cached
+    # until the buffer changes.
+    #
+    # Returns:
+    #   tuple[list[int], list[tuple[int, int, str, bool]]]: The begin point of
+    #       each tag, and the tags as (begin, end, name, is_end_tag) tuples,
+    #       with the names lowercased.
+    key = (view.buffer_id(), view.change_count())
+    if _tags_cache.get('key') != key:
+        tags = [(m.start(), m.end(), m.group(1).lower(), m.group(0).startswith('</'))
+                for m in _RXC_TAG.finditer(view.substr(Region(0, view.size())))]
 
-    return pt, next_tag
+        _tags_cache['key'] = key
+        _tags_cache['begins'] = [tag[0] for tag in tags]
+        _tags_cache['tags'] = tags
+
+    return _tags_cache['begins'], _tags_cache['tags']
 
 
 def find_containing_tag(view, start):
@@ -874,34 +797,52 @@ def find_containing_tag(view, start):
     start = closest_tag.a if ((closest_tag.contains(start)) and
                               (view.substr(closest_tag)[1] == '/')) else start
 
-    end_region, tag_name = next_unbalanced_tag(
-        view,
-        search=next_end_tag,
-        search_args={'pattern': RX_ANY_TAG, 'start': start},
-        restart_at=get_region_end
-    )
+    begins, tags = _get_tags(view)
+
+    # Find the first end tag after the start point that is not closed by a
+    # begin tag after the start point. Begin tags left open by an end tag are
+    # discarded, as in unclosed <p> or <li> tags.
+    stack = []
+    open_tags = {}  # type: dict
+    end_index = None
+    for i in range(bisect_left(begins, start), len(tags)):
+        name = tags[i][2]
+        if not tags[i][3]:
+            stack.append(name)
+            open_tags[name] = open_tags.get(name, 0) + 1
+        elif open_tags.get(name):
+            while True:
+                popped = stack.pop()
+                open_tags[popped] -= 1
+                if popped == name:
+                    break
+        else:
+            end_index = i
+            break
 
-    if not end_region:
+    if end_index is None:
         return None, None, None
 
-    begin_region, _ = next_unbalanced_tag(
-        view,
-        search=previous_begin_tag,
-        search_args={
-            'pattern': RX_ANY_TAG_NAMED_TPL.format(tag_name),
-            'start': 0,
-            'end': end_region.a
-        },
-        restart_at=get_region_begin
-    )
-
-    if not end_region:
-        return None, None, None
+    # Find the begin tag, before the end tag, that it closes.
+    tag_name = tags[end_index][2]
+    depth = 0
+    for i in range(end_index - 1, -1, -1):
+        if tags[i][2] != tag_name:
+            continue
 
-    return begin_region, end_region, tag_name
+        if tags[i][3]:
+            depth += 1
+        elif depth:
+            depth -= 1
+        else:
+            end_region = Region(tags[end_index][0], tags[end_index][1])
+
+            return Region(tags[i][0], tags[i][1]), end_region, _RXC_TAG.match(view.substr(end_region)).group(1)
+
+    return None, None, None
 
 
-def next_unbalanced_tag(view, search=None, search_args={}, restart_at=None, tags=[]):
+def next_unbalanced_tag(view, search=None, search_args=None, restart_at=None, tags=None):
     # Args:
     #   view (sublime.View)
     #   search (callable)
@@ -913,23 +854,21 @@ def next_unbalanced_tag(view, search=None, search_args={}, restart_at=None, tags
     #   tuple[Region, str]
     #   tuple[None, None]
     assert search and restart_at, 'wrong call'
-    region, tag, is_end_tag = search(view, **search_args)
-
-    if not region:
-        return None, None
+    search_args = dict(search_args or {})
+    tags = list(tags or [])
 
-    if not is_end_tag:
-        tags.append(tag)
-        search_args.update(restart_at(region))
-
-        return next_unbalanced_tag(view, search, search_args, restart_at, tags)
-
-    if not tags or (tag not in tags):
-        return region, tag
+    while True:
+        region, tag, is_end_tag = search(view, **search_args)
 
-    while tag != tags.pop():
-        continue
+        if not region:
+            return None, None
 
-    search_args.update(restart_at(region))
+        if not is_end_tag:
+            tags.append(tag)
+        elif tag not in tags:
+            return region, tag
+        else:
+            while tag != tags.pop():
+                continue
 
-    return next_unbalanced_tag(view, search, search_args, restart_at, tags)
+        search_args.update(restart_at(region))
@@ -15,8 +15,11 @@
 # You should have received a copy of the GNU General Public License
 # along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
 
+from bisect import bisect_right
+from itertools import accumulate
 import re
 
+from sublime import CLASS_EMPTY_LINE
 from sublime import CLASS_LINE_END
 from sublime import CLASS_LINE_START
 from sublime import CLASS_PUNCTUATION_END
@@ -40,6 +43,209 @@ _CLASS_VI_WORD_END = CLASS_WORD_END | CLASS_PUNCTUATION_END
 _CLASS_VI_INTERNAL_WORD_END = CLASS_WORD_END | CLASS_PUNCTUATION_END
 
 
+# The default of the 'word_separators' setting.
+_WORD_SEPARATORS = './\\()"\'-:,.;<>~!@#$%^&*|+=[]{}`~?'
+
+# The number of characters a ChunkedText first fetches from a view. The chunks
+# double in size as the text is scanned.
+_CHUNK_SIZE = 4096
+
+# Translation tables from characters to kinds, by word separators. See
+# _get_kinds_table().
+_kinds_tables = {}  # type: dict
+
+
+class _KindsTable(dict):
+
+    # A translation table from characters to kinds. Characters that aren't in
+    # it are word characters, and are added on first use so that translating
+    # text stays in C.
+
+    def __missing__(self, key):
+        self[key] = 'w'
+
+        return 'w'
+
+
+def _get_kinds_table(separators):
+    # type: (str) -> dict
+    # Get a table that translates text to the kinds of its characters: "n" for
+    # a newline, "s" for a blank, "p" for punctuation, and "w" for a word
+    # character, see _to_kinds().
+    try:
+        return _kinds_tables[separators]
+    except KeyError:
+        pass
+
+    table = _KindsTable()
+    table.update((ord(c), 'p') for c in separators)
+    table.update((ord(c), 's') for c in ' \t')
+    table[ord('\n')] = 'n'
+    _kinds_tables[separators] = table
+
+    return table
+
+
+def _to_kinds(text, table):
+    # type: (str, dict) -> str
+    return text.translate(table)
+
+
+class ChunkedText:
+
+    # The text of a view, for scanning words.
+    #
+    # The text is fetched from the view in chunks as it's scanned, and points
+    # are classified in Python, so counted word motions like "5000w" make a
+    # few API calls rather than several per word. The chunks double in size,
+    # so no more than twice the text scanned is fetched.
+    #
+    # It implements the part of the View API the word functions use: size(),
+    # substr(), line(), classify() and find_by_class(), without the sub word
+    # classes. Punctuation is told apart from words by the 'word_separators'
+    # setting, the equivalent of Vim's 'iskeyword', as Sublime Text does.
+
+    def __init__(self, view, pt):
+        self._view = view
+        self._size = view.size()
+        self._begin = self._end = max(0, min(pt, self._size))
+        self._text = ''
+        self._kinds = ''
+        self._chunk_size = _CHUNK_SIZE
+        self._table = _get_kinds_table(view.settings().get('word_separators', _WORD_SEPARATORS))
+
+    def _fetch(self, pt):
+        # type: (int) -> None
+        # Extend the text to include pt, which must be within the buffer.
+        if pt >= self._end:
+            end = min(self._size, max(pt + 1, self._end + self._chunk_size))
+            text = self._view.substr(Region(self._end, end))
+            self._text += text
+            self._kinds += _to_kinds(text, self._table)
+            self._end = end
+        elif pt < self._begin:
+            begin = max(0, min(pt, self._begin - self._chunk_size))
+            text = self._view.substr(Region(begin, self._begin))
+            self._text = text + self._text
+            self._kinds = _to_kinds(text, self._table) + self._kinds
+            self._begin = begin
+        else:
+            return
+
+        self._chunk_size *= 2
+
+    def _kind(self, pt):
+        # type: (int) -> str
+        if pt < 0 or pt >= self._size:
+            return 'n'
+
+        if not self._begin <= pt < self._end:
+            self._fetch(pt)
+
+        return self._kinds[pt - self._begin]
+
+    def size(self):
+        # type: () -> int
+        return self._size
+
+    def substr(self, x):
+        if isinstance(x, int):
+            if x < 0 or x >= self._size:
+                return '\x00'
+
+            if not self._begin <= x < self._end:
+                self._fetch(x)
+
+            return self._text[x - self._begin]
+
+        begin = max(0, x.begin())
+        end = min(self._size, x.end())
+        if begin >= end:
+            return ''
+
+        self._fetch(begin)
+        self._fetch(end - 1)
+
+        return self._text[begin - self._begin:end - self._begin]
+
+    def line(self, pt):
+        # type: (int) -> Region
+        pt = max(0, min(pt, self._size))
+
+        begin = 0
+        while pt > 0:
+            self._fetch(pt - 1)
+            i = self._text.rfind('\n', 0, pt - self._begin)
+            if i != -1:
+                begin = self._begin + i + 1
+                break
+
+            if self._begin == 0:
+                break
+
+            self._fetch(self._begin - 1)
+
+        end = self._size
+        while pt < self._size:
+            self._fetch(pt)
+            i = self._text.find('\n', pt - self._begin)
+            if i != -1:
+                end = self._begin + i
+                break
+
+            if self._end == self._size:
+                break
+
+            self._fetch(self._end)
+
+        return Region(begin, end)
+
+    def classify(self, pt):
+        # type: (int) -> int
+        return self._classify(self._kind(pt - 1), self._kind(pt))
+
+    def _classify(self, before, after):
+        # type: (str, str) -> int
+        classes = 0
+
+        if after == 'w' and before != 'w':
+            classes |= CLASS_WORD_START
+        elif before == 'w' and after != 'w':
+            classes |= CLASS_WORD_END
+
+        if after == 'p' and before != 'p':
+            classes |= CLASS_PUNCTUATION_START
+        elif before == 'p' and after != 'p':
+            classes |= CLASS_PUNCTUATION_END
+
+        if before == 'n':
+            classes |= CLASS_LINE_START
+            if after == 'n':
+                classes |= CLASS_LINE_END | CLASS_EMPTY_LINE
+        elif after == 'n':
+            classes |= CLASS_LINE_END
+
+        return classes
+
+    def find_by_class(self, pt, forward, classes, separators=''):
+        # type: (int, bool, int, str) -> int
+        # Only the 'word_separators' setting is supported, which is what the
+        # empty string default for separators means in the View API.
+        step = 1 if forward else -1
+        pt += step
+        while 0 < pt < self._size:
+            before = self._kind(pt - 1)
+            after = self._kind(pt)
+
+            # Points in a run of blanks, words, or punctuation have no class.
+            if (before != after or after == 'n') and self._classify(before, after) & classes:
+                return pt
+
+            pt += step
+
+        return self._size if forward else 0
+
+
 def at_eol(view, pt):
     return (view.classify(pt) & CLASS_LINE_END) == CLASS_LINE_END
 
@@ -117,23 +323,24 @@ def word_starts(view, start, count=1, internal=False):
     assert start >= 0
     assert count > 0
 
+    text = ChunkedText(view, start)
     pt = start
     for i in range(count):
         # On the last motion iteration, we must do some special stuff if we are still on the
         # starting line of the motion.
-        if (internal and (i == count - 1) and (view.line(start) == view.line(pt))):
-            if view.substr(pt) == '\n':
+        if (internal and (i == count - 1) and (text.line(start) == text.line(pt))):
+            if text.substr(pt) == '\n':
                 return pt + 1
-            return next_word_start(view, pt, internal=True)
+            return next_word_start(text, pt, internal=True)
 
-        pt = next_word_start(view, pt)
+        pt = next_word_start(text, pt)
         if not internal or (i != count - 1):
-            pt = next_non_blank(view, pt)
-            while not (view.size() == pt or view.line(pt).empty() or view.substr(view.line(pt)).strip()):
-                pt = next_word_start(view, pt)
-                pt = next_non_blank(view, pt)
+            pt = next_non_blank(text, pt)
+            while not (text.size() == pt or text.line(pt).empty() or text.substr(text.line(pt)).strip()):
+                pt = next_word_start(text, pt)
+                pt = next_non_blank(text, pt)
 
-    if (internal and (view.line(start) != view.line(pt)) and (start != view.line(start).a and not view.substr(view.line(pt - 1)).isspace()) and at_eol(view, pt - 1)):  # FIXME # noqa: E501
+    if (internal and (text.line(start) != text.line(pt)) and (start != text.line(start).a and not text.substr(text.line(pt - 1)).isspace()) and at_eol(text, pt - 1)):  # FIXME # noqa: E501
         pt -= 1
 
     return pt
@@ -144,23 +351,24 @@ def big_word_starts(view, start, count=1, internal=False):
     assert start >= 0
     assert count > 0
 
+    text = ChunkedText(view, start)
     pt = start
     for i in range(count):
-        if internal and i == count - 1 and view.line(start) == view.line(pt):
-            if view.substr(pt) == '\n':
+        if internal and i == count - 1 and text.line(start) == text.line(pt):
+            if text.substr(pt) == '\n':
                 return pt + 1
-            return next_big_word_start(view, pt, internal=True)
+            return next_big_word_start(text, pt, internal=True)
 
-        pt = next_big_word_start(view, pt)
+        pt = next_big_word_start(text, pt)
         if not internal or i != count - 1:
-            pt = next_non_blank(view, pt)
-            while not (view.size() == pt or
-                       view.line(pt).empty() or
-                       view.substr(view.line(pt)).strip()):
-                pt = next_big_word_start(view, pt)
-                pt = next_non_blank(view, pt)
-
-    if (internal and (view.line(start) != view.line(pt)) and (start != view.line(start).a and not view.substr(view.line(pt - 1)).isspace()) and at_eol(view, pt - 1)):  # FIXME # noqa: E501
+            pt = next_non_blank(text, pt)
+            while not (text.size() == pt or
+                       text.line(pt).empty() or
+                       text.substr(text.line(pt)).strip()):
+                pt = next_big_word_start(text, pt)
+                pt = next_non_blank(text, pt)
+
+    if (internal and (text.line(start) != text.line(pt)) and (start != text.line(start).a and not text.substr(text.line(pt - 1)).isspace()) and at_eol(text, pt - 1)):  # FIXME # noqa: E501
         pt -= 1
 
     return pt
@@ -170,20 +378,21 @@ def word_ends(view, start, count=1, big=False):
     # type: (...) -> int
     assert start >= 0 and count > 0, 'bad call'
 
+    text = ChunkedText(view, start)
     pt = start
-    if not view.substr(start).isspace():
+    if not text.substr(start).isspace():
         pt = start + 1
 
     for i in range(count):
         if big:
             while True:
-                pt = next_word_end(view, pt)
-                if pt >= view.size() or view.substr(pt).isspace():
-                    if pt > view.size():
-                        pt = view.size()
+                pt = next_word_end(text, pt)
+                if pt >= text.size() or text.substr(pt).isspace():
+                    if pt > text.size():
+                        pt = text.size()
                     break
         else:
-            pt = next_word_end(view, pt)
+            pt = next_word_end(text, pt)
 
     return pt
 
@@ -238,30 +447,198 @@ def inner_lines(view, s, count=1):
     return Region(begin, view.line(end).b)
 
 
+# The end of a sentence: a '.', '!' or '?', followed by any number of closing
+# characters, and by white space up to the start of the next sentence.
+_SENTENCE_END = re.compile('[.!?][)\\]"\']*[ \t\n]+(?=[^ \t\n])')
+_NON_WHITESPACE = re.compile('[^ \t\n]')
+
+
+# The line index of the last buffer indexed, see get_line_index().
+_line_index_cache = {}  # type: dict
+
+
+def _runs(rows):
+    # type: (list) -> tuple
+    # The runs of consecutive rows in a sorted list of rows, as two sorted
+    # lists of the first and last row of each run.
+    firsts = []
+    lasts = []
+    for row in rows:
+        if lasts and lasts[-1] == row - 1:
+            lasts[-1] = row
+        else:
+            firsts.append(row)
+            lasts.append(row)
+
+    return firsts, lasts
+
+
+class LineIndex:
+
+    # The text and lines of a buffer, for motions and text objects that move
+    # by lines and would otherwise make several API calls per line, e.g. "}"
+    # across a file with no blank lines.
+    #
+    # The empty lines, and the blank lines (empty or whitespace only), are
+    # kept as runs of consecutive rows, so the line before or after a run is a
+    # bisect lookup. The indents of the lines and the sentences are worked out
+    # on first use, see indents() and sentences().
+
+    def __init__(self, text):
+        lines = text.split('\n')
+        self.text = text
+        self._indents = {}  # type: dict
+        self._sentences = None  # type: tuple
+        self.size = len(text)
+        self.starts = [0]
+        self.starts.extend(accumulate(len(line) + 1 for line in lines[:-1]))
+        self.last_row = len(lines) - 1
+        self.empty = _runs([row for row, line in enumerate(lines) if not line])
+        self.blank = _runs([row for row, line in enumerate(lines) if not line.strip()])
+
+    def row(self, pt):
+        # type: (int) -> int
+        return max(0, bisect_right(self.starts, pt) - 1)
+
+    def line_end(self, row):
+        # type: (int) -> int
+        if row >= self.last_row:
+            return self.size
+
+        return self.starts[row + 1] - 1
+
+    def indents(self, tab_size):
+        # type: (int) -> list
+        # The indent of each line, as a width with tabs expanded to tab stops,
+        # or None for a blank line.
+        try:
+            return self._indents[tab_size]
+        except KeyError:
+            pass
+
+        indents = []
+        for line in self.text.split('\n'):
+            content = line.lstrip()
+            if content:
+                indents.append(len(line[:len(line) - len(content)].expandtabs(tab_size)))
+            else:
+                indents.append(None)
+
+        self._indents[tab_size] = indents
+
+        return indents
+
+    def sentences(self):
+        # type: () -> tuple
+        # The sentences of the buffer. A sentence ends at a '.', '!' or '?'
+        # followed by white space, with any number of closing characters in
+        # between, and an empty line is a sentence boundary. The last line of a
+        # buffer that ends in a newline doesn't count as an empty line.
+        # See https://vimhelp.org/motion.txt.html#sentence.
+        #
+        # Returns:
+        #   tuple[list, list, list]: The starts of the sentences, the ends of
+        #       their text before any trailing white space, and the starts as
+        #       seen when moving backward, i.e. with the last line of each run
+        #       of empty lines instead of the first.
+        if self._sentences is not None:
+            return self._sentences
+
+        text = self.text
+        starts = set(match.end() for match in _SENTENCE_END.finditer(text))
+        match = _NON_WHITESPACE.search(text)
+        if match:
+            starts.add(match.start())
+
+        firsts, lasts = list(self.empty[0]), list(self.empty[1])
+        if lasts and lasts[-1] == self.last_row:
+            if firsts[-1] == self.last_row:
+                del firsts[-1], lasts[-1]
+            else:
+                lasts[-1] -= 1
+
+        for row in lasts:
+            match = _NON_WHITESPACE.search(text, self.starts[row])
+            if match:
+                starts.add(match.start())
+
+        forward = sorted(starts.union(self.starts[row] for row in firsts))
+        backward = sorted(starts.union(self.starts[row] for row in lasts))
+
+        ends = []
+        for start, end in zip(forward, forward[1:] + [len(text)]):
+            ends.append(start + len(text[start:end].rstrip(' \t\n')))
+
+        self._sentences = (forward, ends, backward)
+
+        return self._sentences
+
+    def run(self, runs, row):
+        # type: (tuple, int) -> tuple
+        # The run of rows around a row that are all in, or all not in, the
+        # runs, e.g. all the blank lines or all the non-blank lines around it.
+        #
+        # Returns:
+        #   tuple[bool, int, int]: Whether the row is in the runs, and the first
+        #       and last row of the run around it.
+        firsts, lasts = runs
+        i = bisect_right(firsts, row)
+        if i > 0 and lasts[i - 1] >= row:
+            return True, firsts[i - 1], lasts[i - 1]
+
+        return (
+            False,
+            lasts[i - 1] + 1 if i > 0 else 0,
+            firsts[i] - 1 if i < len(firsts) else self.last_row
+        )
+
+
+def get_line_index(view):
+    # type: (...) -> LineIndex
+    # Get the line index of the buffer of a view. It's built from the text of
+    # the buffer in one call, and reused until the buffer changes.
+    key = (view.buffer_id(), view.change_count())
+    if _line_index_cache.get('key') != key:
+        _line_index_cache['key'] = key
+        _line_index_cache['index'] = LineIndex(view.substr(Region(0, view.size())))
+
+    return _line_index_cache['index']
+
+
+def line_index_destroy(view):
+    # type: (...) -> None
+    # Release the line index of the buffer of a view, which holds a copy of
+    # its text.
+    key = _line_index_cache.get('key')
+    if key and key[0] == view.buffer_id():
+        _line_index_cache.clear()
+
+
 def next_paragraph_start(view, pt, count=1, skip_empty=True):
-    if row_at(view, pt) == last_row(view):
-        if not view.line(view.size()).empty():
-            return view.size() - 1
+    index = get_line_index(view)
+    current_row = index.row(pt)
+    if current_row == index.last_row:
+        if not index.run(index.empty, index.last_row)[0]:
+            return index.size - 1
 
-        return view.size()
+        return index.size
 
     # skip empty rows before moving for the first time
-    current_row = row_at(view, pt)
-    if (view.line(view.text_point(current_row + 1, 0)).empty() and view.line(pt).empty()):
-        pt, _ = _next_non_empty_row(view, pt)
+    if index.run(index.empty, current_row + 1)[0] and index.run(index.empty, current_row)[0]:
+        pt, _ = _next_non_empty_row(index, pt)
 
     for i in range(count):
-        pt, eof = _next_empty_row(view, pt)
+        pt, eof = _next_empty_row(index, pt)
         if eof:
-            if view.line(pt).empty():
+            if index.run(index.empty, index.row(pt))[0]:
                 return pt
 
             return pt - 1
 
         if skip_empty and (i != (count - 1)):
-            pt, eof = _next_non_empty_row(view, pt)
+            pt, eof = _next_non_empty_row(index, pt)
             if eof:
-                if not view.line(pt).empty():
+                if not index.run(index.empty, index.row(pt))[0]:
                     return pt - 1
 
                 return pt
@@ -269,74 +646,83 @@ def next_paragraph_start(view, pt, count=1, skip_empty=True):
     return pt
 
 
-def _next_empty_row(view, pt):
-    r = row_at(view, pt)
-    while True:
-        r += 1
-        pt = view.text_point(r, 0)
-        if row_at(view, pt) == last_row(view):
-            return view.size(), True
+def _next_empty_row(index, pt):
+    # type: (LineIndex, int) -> tuple
+    r = index.row(pt) + 1
+    if r < index.last_row:
+        is_empty, _, last = index.run(index.empty, r)
+        if not is_empty:
+            r = last + 1
 
-        if view.line(pt).empty():
-            return pt, False
+        if r < index.last_row:
+            return index.starts[r], False
 
+    return index.size, True
 
-def _next_non_empty_row(view, pt):
-    r = row_at(view, pt)
-    while True:
-        r += 1
-        reg = view.line(view.text_point(r, 0))
-        if r >= last_row(view):
-            return view.size(), True
 
-        if not reg.empty():
-            return reg.a, False
+def _next_non_empty_row(index, pt):
+    # type: (LineIndex, int) -> tuple
+    r = index.row(pt) + 1
+    if r < index.last_row:
+        is_empty, _, last = index.run(index.empty, r)
+        if is_empty:
+            r = last + 1
+
+        if r < index.last_row:
+            return index.starts[r], False
+
+    return index.size, True
 
 
 def prev_paragraph_start(view, pt, count=1, skip_empty=True):
+    index = get_line_index(view)
+
     # first row?
-    if row_at(view, pt) == 0:
+    current_row = index.row(pt)
+    if current_row == 0:
         return 0
 
-    current_row = row_at(view, pt)
-    if (view.line(view.text_point(current_row - 1, 0)).empty() and view.line(view.text_point(current_row, 0)).empty()):
-        pt, bof = _prev_non_empty_row(view, pt)
+    if index.run(index.empty, current_row - 1)[0] and index.run(index.empty, current_row)[0]:
+        pt, bof = _prev_non_empty_row(index, pt)
         if bof:
             return 0
 
     for i in range(count):
-        pt, bof = _prev_empty_row(view, pt)
+        pt, bof = _prev_empty_row(index, pt)
         if bof:
             return 0
 
         if skip_empty and (count > 1) and (i != count - 1):
-            pt, bof = _prev_non_empty_row(view, pt)
+            pt, bof = _prev_non_empty_row(index, pt)
             if bof:
                 return pt
 
-    return view.text_point(row_at(view, pt), 0)
+    return index.starts[index.row(pt)]
 
 
-def _prev_empty_row(view, pt):
-    r = row_at(view, pt)
-    while True:
-        r -= 1
-        if r == 0:
-            return 0, True
+def _prev_empty_row(index, pt):
+    # type: (LineIndex, int) -> tuple
+    r = index.row(pt) - 1
+    if r > 0:
+        is_empty, first, _ = index.run(index.empty, r)
+        if not is_empty:
+            r = first - 1
 
-        pt = view.text_point(r, 0)
-        if view.line(pt).empty():
-            return pt, False
+        if r > 0:
+            return index.starts[r], False
 
+    return 0, True
 
-def _prev_non_empty_row(view, pt):
-    r = row_at(view, pt)
-    while True:
-        r -= 1
-        reg = view.line(view.text_point(r, 0))
-        # stop if we hit the first row
-        if r <= 0:
-            return 0, True
-
-        if not reg.empty():
-            return reg.a, False
+
+def _prev_non_empty_row(index, pt):
+    # type: (LineIndex, int) -> tuple
+    r = index.row(pt) - 1
+    if r > 0:
+        is_empty, first, _ = index.run(index.empty, r)
+        if is_empty:
+            r = first - 1
+
+        if r > 0:
+            return index.starts[r], False
+
+    return 0, True
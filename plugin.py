@@ -217,3 +217,10 @@ def plugin_unloaded():
     except Exception:
         import traceback
         traceback.print_exc()
+
+    try:
+        from NeoVintageous.nv.shada import shada_write
+        shada_write()
+    except Exception:
+        import traceback
+        traceback.print_exc()
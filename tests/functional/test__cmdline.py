@@ -17,7 +17,10 @@
 
 from NeoVintageous.tests import unittest
 
+from NeoVintageous.nv.commands import _nv_cmdline_feed_key
 from NeoVintageous.nv.ex.completions import reset_cmdline_completion_state
+from NeoVintageous.nv.history import _new_storage
+from NeoVintageous.nv.history import history_add
 from NeoVintageous.nv.vi.settings import set_cmdline_cwd
 
 
@@ -27,6 +30,7 @@ class TestCmdlineEditing(unittest.FunctionalTestCase):
         super().setUp()
         self.view.settings().set('_nv_ex_mode', True)
         reset_cmdline_completion_state()
+        _nv_cmdline_feed_key.reset_last_history_index()
 
     # TODO [refactor] Into usable run test command-line mode command via feed.
     def feed(self, seq):
@@ -129,6 +133,44 @@ class TestCmdlineEditing(unittest.FunctionalTestCase):
         self.feed('<C-w>')
         self.assertNormal(':|')
 
+    @unittest.mock.patch('NeoVintageous.nv.history._storage', new_callable=_new_storage)
+    def test_c_up_down_recall_history_matching_prefix(self, _storage):
+        for item in ('sort', 'set hls', 'ls', 'set list'):
+            history_add(':', item)
+
+        self.normal(':s|')
+        self.feed('<up>')
+        self.assertNormal(':set list|')
+        self.feed('<up>')
+        self.assertNormal(':set hls|')
+        self.feed('<up>')
+        self.assertNormal(':sort|')
+        self.feed('<up>')
+        self.assertNormal(':sort|')
+        self.feed('<down>')
+        self.assertNormal(':set hls|')
+        self.feed('<down>')
+        self.assertNormal(':set list|')
+        self.feed('<down>')
+        self.assertNormal(':s|')
+        self.feed('<down>')
+        self.assertNormal(':s|')
+
+    @unittest.mock.patch('NeoVintageous.nv.history._storage', new_callable=_new_storage)
+    def test_c_ctrl_p_ctrl_n_recall_history(self, _storage):
+        for item in ('sort', 'ls', 'set list'):
+            history_add(':', item)
+
+        self.normal(':s|')
+        self.feed('<C-p>')
+        self.assertNormal(':set list|')
+        self.feed('<C-p>')
+        self.assertNormal(':ls|')
+        self.feed('<C-n>')
+        self.assertNormal(':set list|')
+        self.feed('<C-n>')
+        self.assertNormal(':s|')
+
     def test_c_tab_completions(self):
         self.eq(':bl|', '<tab>', ':blast|')
         self.eq(':bN|', '<tab>', ':bNext|')
@@ -149,6 +191,8 @@ class TestCmdlineEditing(unittest.FunctionalTestCase):
     def test_c_tab_set_completions(self):
         self.eq(':set |', '<tab>', ':set autoindent|')
         self.feed('<tab>')
+        self.assertNormal(':set history|')
+        self.feed('<tab>')
         self.assertNormal(':set hlsearch|')
         self.feed('<tab>')
         self.assertNormal(':set ignorecase|')
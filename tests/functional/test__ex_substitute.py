@@ -74,6 +74,25 @@ class Test_ex_substitute(unittest.FunctionalTestCase):
         self.eq('a\n|b\n\nc\n\nd\n\n', ':%substitute/$/,/', 'a,\nb,\n,\nc,\n,\nd,\n|,\n')
         self.eq('a\n|b\n\nc\n\nd\n\n', ':%substitute/$/,/g', 'a,\nb,\n,\nc,\n,\nd,\n|,\n')
 
+    def test_cursor_is_on_last_substituted_line(self):
+        self.eq('ab\nab\n|x\n', ':%substitute/a/b/', 'bb\n|bb\nx\n')
+        self.eq('ab\n  ab\n|x\n', ':%substitute/a/b/', 'bb\n  |bb\nx\n')
+
+    @unittest.mock_status_message()
+    def test_reports_substitutions(self):
+        self.eq('|a\na\na\n', ':%substitute/a/b/', 'b\nb\n|b\n')
+        self.assertStatusMessage('3 substitutions on 3 lines')
+
+    @unittest.mock_status_message()
+    def test_reports_substitutions_on_one_line(self):
+        self.eq('|aaa\n', ':substitute/a/b/g', '|bbb\n')
+        self.assertStatusMessage('3 substitutions on 1 line')
+
+    @unittest.mock_status_message()
+    def test_n_flag_reports_matches_without_substituting(self):
+        self.eq('|aa\na\n', ':%substitute/a/b/gn', '|aa\na\n')
+        self.assertStatusMessage('3 matches on 2 lines')
+
     @unittest.mock.patch('NeoVintageous.nv.vi.settings._session', {})
     @unittest.mock_status_message()
     def test_repeat_no_previous(self):
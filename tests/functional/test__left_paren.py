@@ -29,6 +29,7 @@ class Test_left_paren(unittest.FunctionalTestCase):
         self.eq('one! tw|o', 'n_(', 'one! |two')
         self.eq('one.  tw|o', 'n_(', 'one.  |two')
         self.eq('one.   tw|o', 'n_(', 'one.   |two')
+        self.eq('one. two. th|ree.', 'n_2(', 'one. |two. three.')
 
     def test_n_section_boundary(self):
         self.normal('one.\ntwo.\n\nthree.\n\n\nfour.\n\n\n\nfi|ve.')
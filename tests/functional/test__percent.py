@@ -39,6 +39,16 @@ class Test_percent(unittest.FunctionalTestCase):
         self.eq('|1\n2\n3\n4\n5\n6\n7\n8\n9\n0', 'n_30%', '1\n2\n|3\n4\n5\n6\n7\n8\n9\n0')
         self.eq('|1\n2\n3\n4\n5\n6', 'n_80%', '1\n2\n3\n4\n|5\n6')
 
+    def test_n_escaped_brackets(self):
+        self.eq('|(a \\) b)', 'n_%', '(a \\) b|)')
+        self.eq('(a \\) b|)', 'n_%', '|(a \\) b)')
+        self.eq('\\|(a ) b\\)', 'n_%', '\\(a ) b\\|)')
+        self.eq('\\(a ) b\\|)', 'n_%', '\\|(a ) b\\)')
+
+    def test_n_deeply_nested(self):
+        self.eq('|' + '(' * 2000 + ')' * 2000, 'n_%', '(' * 2000 + ')' * 1999 + '|)')
+        self.eq('(' * 2000 + ')' * 1999 + '|)', 'n_%', '|' + '(' * 2000 + ')' * 2000)
+
     def test_percent_mutiple_selection(self):
         self.eq('1|{ab}2|{cd}3|{ef}x', 'n_%', '1{ab|}2{cd|}3{ef|}x')
         self.eq('1|{ab}2{cd}3|{ef}x', 'n_%', '1{ab|}2{cd}3{ef|}x')
@@ -49,7 +49,9 @@ class TestTextObjectSelection(unittest.FunctionalTestCase):
         self.eq('fi|zz|', 'v_iW', 'fi|zz|')
 
     def test_v_as(self):
-        self.eq('x.  x  Fi|zz buzz.  y', 'v_as', 'x.  |x  Fizz buzz.|  y')
+        self.eq('x.  x  Fi|zz buzz.  y', 'v_as', 'x.  |x  Fizz buzz.  |y')
+        self.eq('x.  x  Fi|zz buzz.', 'v_as', 'x.  |x  Fizz buzz.|')
+        self.eq('x.  x  Fi|zz buzz.  y.  z', 'v_2as', 'x.  |x  Fizz buzz.  y.  |z')
 
     def test_v_is(self):
         self.eq('x.  x   Fi|zz buzz.yy.  xx', 'v_is', 'x.  |x   Fizz buzz.yy.|  xx')
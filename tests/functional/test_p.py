@@ -60,6 +60,14 @@ class Test_p(unittest.ResetRegisters, unittest.FunctionalTestCase):
         self.register('"', 'buzz')
         self.eq('fizz\n|\na\nb', 'p', 'fizz\nbuz|z\na\nb')
 
+    @unittest.mock.patch('NeoVintageous.nv.commands._PASTE_CHUNK_SIZE', 8)
+    def test_n_count_is_inserted_in_chunks(self):
+        self.register('"', 'fizz')
+        self.eq('a|bc', '5p', 'abfizzfizzfizzfizzfiz|zc')
+        self.eq('a|bc', '1p', 'abfiz|zc')
+        self.registerLinewise('"', 'fizz buzz\n')
+        self.eq('x\na|bc\ny', '3p', 'x\nabc\n|fizz buzz\nfizz buzz\nfizz buzz\ny')
+
     def test_n_multi_cursor(self):
         self.register('"', ['fizz', 'buzz'])
         self.eq('a|bc\nd|ef', 'p', 'abfiz|zc\ndebuz|zf')
@@ -19,6 +19,8 @@ import unittest
 
 from NeoVintageous.nv.ex.parser import _ParserState
 from NeoVintageous.nv.ex.parser import parse_command_line
+from NeoVintageous.nv.ex.parser import parse_command_line_cache_clear
+from NeoVintageous.nv.ex.parser import parse_command_line_cache_info
 from NeoVintageous.nv.ex.parser import TokenComma
 from NeoVintageous.nv.ex.parser import TokenDigits
 from NeoVintageous.nv.ex.parser import TokenDollar
@@ -38,6 +40,67 @@ class TestParserState(unittest.TestCase):
         self.assertEqual(parser_state.scanner.state.source, "foobar")
 
 
+class TestParseCommandLineCache(unittest.TestCase):
+
+    def setUp(self):
+        parse_command_line_cache_clear()
+
+    def tearDown(self):
+        parse_command_line_cache_clear()
+
+    def test_counts_hits_and_misses(self):
+        parse_command_line('3,5delete')
+        parse_command_line('3,5delete')
+        parse_command_line('print')
+        info = parse_command_line_cache_info()
+        self.assertEqual(info['hits'], 1)
+        self.assertEqual(info['misses'], 2)
+        self.assertEqual(info['size'], 2)
+
+    def test_cached_result_is_equal_to_parsed_result(self):
+        first = parse_command_line('%s/a/b/g')
+        second = parse_command_line('%s/a/b/g')
+        self.assertEqual(str(first), str(second))
+        self.assertEqual(first.line_range, second.line_range)
+
+    def test_returns_copies_with_params_that_can_be_mutated(self):
+        first = parse_command_line('.,$print')
+        first.command.params['global_lines'] = [1, 2]
+        first.command.params.update(forceit=True)
+        second = parse_command_line('.,$print')
+        self.assertIsNot(first, second)
+        self.assertIsNot(first.command, second.command)
+        self.assertEqual(second.command.params, {})
+        self.assertEqual(second.line_range.start, [TokenDot()])
+
+    def test_copies_commandless_lines(self):
+        first = parse_command_line('3')
+        second = parse_command_line('3')
+        self.assertIsNot(first, second)
+        self.assertIsNone(second.command)
+
+    def test_does_not_cache_errors(self):
+        for i in range(2):
+            with self.assertRaises(Exception):
+                parse_command_line('3registers')
+
+        self.assertEqual(parse_command_line_cache_info()['size'], 0)
+        self.assertEqual(parse_command_line_cache_info()['misses'], 2)
+
+    def test_evicts_least_recently_used(self):
+        maxsize = parse_command_line_cache_info()['maxsize']
+        for i in range(maxsize):
+            parse_command_line(str(i + 1))
+
+        parse_command_line('1')
+        parse_command_line(str(maxsize + 1))
+        self.assertEqual(parse_command_line_cache_info()['size'], maxsize)
+        parse_command_line('1')
+        self.assertEqual(parse_command_line_cache_info()['hits'], 2)
+        parse_command_line('2')
+        self.assertEqual(parse_command_line_cache_info()['hits'], 2)
+
+
 class TestParseLineRef(unittest.TestCase):
 
     def test_can_parse_empty(self):
@@ -47,6 +47,18 @@ class TestFeedKey(unittest.ResetRegisters, unittest.FunctionalTestCase):
             self.feedkey(key)
             self.assertNormal('fizz |buzz')
 
+    @unittest.mock.patch('NeoVintageous.nv.commands.filter_cancel')
+    def test_esc_cancels_a_filter(self, filter_cancel):
+        self.normal('fi|zz buzz')
+        self.feedkey('<Esc>')
+        filter_cancel.assert_called_once_with(self.view)
+
+    @unittest.mock.patch('NeoVintageous.nv.commands.filter_cancel')
+    def test_other_keys_do_not_cancel_a_filter(self, filter_cancel):
+        self.normal('fi|zz buzz')
+        self.feedkeys('wyw')
+        self.assertFalse(filter_cancel.called)
+
     def test_motion(self):
         self.normal('fi|zz buzz')
         self.feedkey('w')
@@ -493,3 +505,14 @@ class TestFeedKey(unittest.ResetRegisters, unittest.FunctionalTestCase):
         self.feedkeys('""')
         self.assertNormal('fizz |buzz')
         self.assertNoBell()
+
+    @unittest.mock_mappings(
+        (unittest.NORMAL, ',a', 'l' * 100),
+    )
+    def test_process_notation_does_not_dispatch_a_command_per_key(self):
+        from NeoVintageous.nv.commands import _nv_feed_key
+        self.normal('|' + 'x' * 200)
+        with unittest.mock.patch.object(_nv_feed_key, 'run', autospec=True, side_effect=_nv_feed_key.run) as run:
+            self.feedkeys(',a')
+            self.assertNormal('x' * 100 + '|' + 'x' * 100)
+            self.assertEqual(run.call_count, 2)
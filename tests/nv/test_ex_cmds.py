@@ -23,6 +23,7 @@ from NeoVintageous.nv.ex.nodes import RangeNode
 from NeoVintageous.nv.ex.tokens import TokenComma
 from NeoVintageous.nv.ex.tokens import TokenDigits
 from NeoVintageous.nv.ex.tokens import TokenDollar
+from NeoVintageous.nv.ex_cmds import _find_global_lines
 from NeoVintageous.nv.ex_cmds import _parse_user_cmdline
 from NeoVintageous.nv.ex_cmds import do_ex_cmdline
 from NeoVintageous.nv.ex_cmds import do_ex_command
@@ -669,3 +670,30 @@ class Test_parse_user_cmdline(unittest.TestCase):
         self.assert_parsed(':Name foo=', None)
         self.assert_parsed(':Name foo=<', None)
         self.assert_parsed(':Name$', None)
+
+
+class Test_find_global_lines(unittest.ViewTestCase):
+
+    def test_finds_each_matching_line_once(self):
+        self.write('ab\nx\nbab\nx\nb')
+        self.assertEqual([self.Region(0, 3), self.Region(5, 9), self.Region(11, 12)],
+                         _find_global_lines(self.view, 'b', self.Region(0, self.view.size())))
+
+    def test_matches_are_clipped_to_the_region(self):
+        self.write('ab\nx\nbab\nx\nb')
+        self.assertEqual([self.Region(5, 9)], _find_global_lines(self.view, 'b', self.Region(3, 11)))
+        self.assertEqual([], _find_global_lines(self.view, 'b', self.Region(3, 5)))
+
+    def test_searches_a_small_region_once_per_matching_line(self):
+        self.write('ab\nbb\nx\nbb\nb\n' + 'x\n' * 10)
+        with unittest.mock.patch.object(self.view, 'find', wraps=self.view.find) as find:
+            lines = _find_global_lines(self.view, 'b', self.Region(0, 8))
+            self.assertEqual([self.Region(0, 3), self.Region(3, 6)], lines)
+            self.assertEqual(find.call_count, 3)
+
+    def test_searches_a_large_region_at_once(self):
+        self.write('ab\nbb\nx\nbb\nb')
+        with unittest.mock.patch.object(self.view, 'find_all', wraps=self.view.find_all) as find_all:
+            lines = _find_global_lines(self.view, 'b', self.Region(3, 12))
+            self.assertEqual([self.Region(3, 6), self.Region(8, 11), self.Region(11, 12)], lines)
+            self.assertEqual(find_all.call_count, 1)
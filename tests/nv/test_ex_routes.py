@@ -31,6 +31,7 @@ from NeoVintageous.nv.ex_routes import _ex_route_onoremap
 from NeoVintageous.nv.ex_routes import _ex_route_substitute
 from NeoVintageous.nv.ex_routes import _ex_route_tabnext
 from NeoVintageous.nv.ex_routes import ex_routes
+from NeoVintageous.nv.ex_routes import match_ex_route
 from NeoVintageous.nv.ex_routes import TokenCommand
 
 
@@ -304,3 +305,37 @@ class TestRoutes(unittest.TestCase):
         self.assertRoute('_ex_route_wqall', ['wqall', 'wqa', 'xall', 'xa'])
         self.assertRoute('_ex_route_write', ['write', 'w'])
         self.assertRoute('_ex_route_yank', ['yank', 'y'])
+
+
+class TestMatchExRoute(unittest.TestCase):
+
+    def _matchRoute(self, string):
+        for route, command in ex_routes.items():
+            match = re.compile(route).match(string)
+            if match:
+                return (command, match.end())
+
+        return None
+
+    def assertMatchesRouteOrder(self, string):
+        state = _ScannerState(string)
+        command = match_ex_route(state)
+        actual = (command, state.position) if command else None
+        self.assertEqual(actual, self._matchRoute(string), 'failed at "{}"'.format(string))
+
+    def test_no_match(self):
+        state = _ScannerState('zfoobar')
+        self.assertIsNone(match_ex_route(state))
+        self.assertEqual(state.position, 0)
+
+    def test_advances_position(self):
+        state = _ScannerState('wq!')
+        match_ex_route(state)
+        self.assertEqual(state.position, 2)
+
+    def test_matches_in_route_order(self):
+        for string in ('', ' ', '!ls', '&&', '&', 'ls!', 'bN', 'br', 'bro', 'e', 'e foo', 'g/x/d', 'let x=1', 'm0',
+                       'ma', 'no', 'noh', 'ou', 'ounmap', 'q', 'qa', 'r', 'reg', 's/a/b/', 'se', 'set ts=1', 'setl',
+                       'sil', 'silent!', 'sor', 'sort u', 'tabN', 'tabn', 'w', 'w!', 'w>>', 'wq', 'wqa', 'write', 'x',
+                       'xa', 'y a'):
+            self.assertMatchesRouteOrder(string)
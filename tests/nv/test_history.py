@@ -15,6 +15,9 @@
 # You should have received a copy of the GNU General Public License
 # along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
 
+import os
+import tempfile
+
 from NeoVintageous.tests import unittest
 
 from NeoVintageous.nv.history import _char2type
@@ -25,27 +28,31 @@ from NeoVintageous.nv.history import _HIST_INPUT
 from NeoVintageous.nv.history import _HIST_INVALID
 from NeoVintageous.nv.history import _HIST_SEARCH
 from NeoVintageous.nv.history import _name2type
+from NeoVintageous.nv.history import _new_storage
 from NeoVintageous.nv.history import history
 from NeoVintageous.nv.history import history_add
 from NeoVintageous.nv.history import history_clear
 from NeoVintageous.nv.history import history_del
+from NeoVintageous.nv.history import history_find
 from NeoVintageous.nv.history import history_get
 from NeoVintageous.nv.history import history_get_type
 from NeoVintageous.nv.history import history_len
 from NeoVintageous.nv.history import history_nr
 from NeoVintageous.nv.history import history_update
+from NeoVintageous.nv.shada import shada_write
+
 
+# Reusable mappings test patcher (also passes a clean storage structure to tests).
 # We need to patch the entries storage dictionary so that out tests don't mess
 # up our userland entries, which would obviously be bad.
-from NeoVintageous.nv.history import _storage as _storage_struct_
+_patch_storage = unittest.mock.patch('NeoVintageous.nv.history._storage', new_callable=_new_storage)
 
 
-# Reusable mappings test patcher (also passes a clean storage structure to tests).
-_patch_storage = unittest.mock.patch('NeoVintageous.nv.history._storage',
-                                     new_callable=lambda: {k: {'num': 0, 'items': {}} for k in _storage_struct_})
+_patch_max_items = lambda n: unittest.mock.patch('NeoVintageous.nv.history._get_max_items', lambda: n)  # noqa: E731
 
 
-_patch_max_items = lambda n: unittest.mock.patch('NeoVintageous.nv.history._MAX_ITEMS', n)  # noqa: E731
+def _items(storage):
+    return {k: (v['num'], dict(v['items'])) for k, v in storage.items()}
 
 
 class TestHistory(unittest.TestCase):
@@ -169,9 +176,13 @@ class TestHistory(unittest.TestCase):
 
     @_patch_storage
     def test_history_del(self, _storage):
-        _storage[_HIST_SEARCH]['num'] = 9
-        _storage[_HIST_SEARCH]['items'] = {1: 'a', 2: 'b', 3: 'c', 7: 'g', 9: 'i'}
+        for item in 'abcdefghi':
+            history_add('/', item)
+
+        for item in (4, 5, 6, 8):
+            history_del('/', item)
 
+        self.assertEqual({1: 'a', 2: 'b', 3: 'c', 7: 'g', 9: 'i'}, dict(_storage[_HIST_SEARCH]['items']))
         self.assertEqual(9, history_nr('/'))
         self.assertTrue(history_del('/', 2))
         self.assertEqual(9, history_nr('/'))
@@ -212,6 +223,45 @@ class TestHistory(unittest.TestCase):
         self.assertEqual(3, history_nr('/'))
         self.assertEqual('o', history_get('/'))
 
+    @_patch_storage
+    def test_history_find(self, _storage):
+        for item in ('sort', 'set hls', 'ls', 'set list', 'sort', 'set'):
+            history_add(':', item)
+
+        self.assertEqual(6, history_find(':', 's', 7))
+        self.assertEqual(5, history_find(':', 's', 6))
+        self.assertEqual(4, history_find(':', 's', 5))
+        self.assertEqual(2, history_find(':', 's', 4))
+        self.assertEqual(-1, history_find(':', 's', 2))
+        self.assertEqual(4, history_find(':', 'set', 5))
+        self.assertEqual(6, history_find(':', 'set', 4, backwards=False))
+        self.assertEqual(-1, history_find(':', 'set', 6, backwards=False))
+        self.assertEqual(4, history_find(':', 'set ', 5))
+        self.assertEqual(-1, history_find(':', 'set l', 4))
+        self.assertEqual(3, history_find(':', 'l', 7))
+        self.assertEqual(3, history_find(':', '', 4))
+        self.assertEqual(4, history_find(':', '', 3, backwards=False))
+        self.assertEqual(-1, history_find(':', 'x', 7))
+        self.assertEqual(-1, history_find('/', 's', 7))
+        self.assertEqual(-1, history_find('foobar', 's', 7))
+        history_add(':', 'sx')
+        self.assertEqual(7, history_find(':', 's', 8))
+
+    @_patch_storage
+    def test_recalls_the_newest_entries_without_listing_the_entries(self, _storage):
+        for item in ('a', 'b', 'c', 'd', 'b'):
+            history_add(':', item)
+
+        self.assertEqual('b', history_get(':', -1))
+        self.assertEqual('d', history_get(':', -2))
+        self.assertEqual('a', history_get(':', -4))
+        self.assertEqual('', history_get(':', -5))
+        self.assertEqual(5, history_find(':', '', 6))
+        self.assertEqual(-1, history_find(':', '', 6, backwards=False))
+        self.assertTrue(history_del(':', -2))
+        self.assertEqual('c', history_get(':', -2))
+        self.assertNotIn('keys', _storage[_HIST_CMD]['cache'])
+
     @_patch_storage
     def test_history_nr_defaults(self, _storage):
         for name in self.histories:
@@ -219,34 +269,27 @@ class TestHistory(unittest.TestCase):
 
     @_patch_storage
     def test_history_clear(self, _storage):
-        _storage[_HIST_CMD]['items'][1] = 'a'
-        _storage[_HIST_CMD]['items'][2] = 'b'
-        _storage[_HIST_CMD]['num'] = 7
+        history_add(':', 'a')
+        history_add(':', 'b')
+        history_add('/', 'c')
 
         history_clear()
 
-        self.assertEqual(_storage, {
-            _HIST_CMD: {'num': 0, 'items': {}},
-            _HIST_SEARCH: {'num': 0, 'items': {}},
-            _HIST_EXPR: {'num': 0, 'items': {}},
-            _HIST_INPUT: {'num': 0, 'items': {}},
-            _HIST_DEBUG: {'num': 0, 'items': {}}
-        })
+        self.assertEqual(_storage, _new_storage())
 
     @_patch_storage
     def test_history_len(self, _storage):
-        _storage[_HIST_CMD]['items'][1] = 'a'
-        _storage[_HIST_CMD]['items'][2] = 'b'
-        _storage[_HIST_CMD]['items'][3] = 'c'
-        _storage[_HIST_CMD]['num'] = 7
+        history_add(':', 'a')
+        history_add(':', 'b')
+        history_add(':', 'c')
 
         self.assertEqual(history_len(':'), 3)
 
-        _storage[_HIST_CMD]['items'][4] = 'd'
-        _storage[_HIST_CMD]['items'][5] = 'd'
-        _storage[_HIST_CMD]['num'] = 10
+        history_add(':', 'd')
+        history_add(':', 'd')
+        history_add(':', 'a')
 
-        self.assertEqual(history_len(':'), 5)
+        self.assertEqual(history_len(':'), 4)
 
     @_patch_storage
     def test_history_update(self, _storage):
@@ -320,13 +363,8 @@ class TestHistory(unittest.TestCase):
     @_patch_storage
     def test_history_option_size_0(self, _storage):
         self.assertFalse(history_add(':', 'c1'))
-        self.assertEqual(_storage, {
-            _HIST_CMD: {'num': 0, 'items': {}},
-            _HIST_SEARCH: {'num': 0, 'items': {}},
-            _HIST_EXPR: {'num': 0, 'items': {}},
-            _HIST_INPUT: {'num': 0, 'items': {}},
-            _HIST_DEBUG: {'num': 0, 'items': {}}
-        })
+        self.assertEqual(_storage, _new_storage())
+        self.assertEqual("'history' option is zero", history(':'))
 
     @_patch_max_items(1)
     @_patch_storage
@@ -338,12 +376,12 @@ class TestHistory(unittest.TestCase):
         self.assertTrue(history_add('/', 's1'))
         self.assertTrue(history_add('/', 's2'))
         self.assertTrue(history_add('/', 's3'))
-        self.assertEqual(_storage, {
-            _HIST_CMD: {'num': 4, 'items': {4: 'c4'}},
-            _HIST_SEARCH: {'num': 3, 'items': {3: 's3'}},
-            _HIST_EXPR: {'num': 0, 'items': {}},
-            _HIST_INPUT: {'num': 0, 'items': {}},
-            _HIST_DEBUG: {'num': 0, 'items': {}}
+        self.assertEqual(_items(_storage), {
+            _HIST_CMD: (4, {4: 'c4'}),
+            _HIST_SEARCH: (3, {3: 's3'}),
+            _HIST_EXPR: (0, {}),
+            _HIST_INPUT: (0, {}),
+            _HIST_DEBUG: (0, {})
         })
 
     @_patch_max_items(2)
@@ -356,13 +394,15 @@ class TestHistory(unittest.TestCase):
         self.assertTrue(history_add('?', 's1'))
         self.assertTrue(history_add('?', 's2'))
         self.assertTrue(history_add('?', 's3'))
-        self.assertEqual(_storage, {
-            _HIST_CMD: {'num': 4, 'items': {3: 'c3', 4: 'c4'}},
-            _HIST_SEARCH: {'num': 3, 'items': {2: 's2', 3: 's3'}},
-            _HIST_EXPR: {'num': 0, 'items': {}},
-            _HIST_INPUT: {'num': 0, 'items': {}},
-            _HIST_DEBUG: {'num': 0, 'items': {}}
+        self.assertEqual(_items(_storage), {
+            _HIST_CMD: (4, {3: 'c3', 4: 'c4'}),
+            _HIST_SEARCH: (3, {2: 's2', 3: 's3'}),
+            _HIST_EXPR: (0, {}),
+            _HIST_INPUT: (0, {}),
+            _HIST_DEBUG: (0, {})
         })
+        self.assertTrue(history_add(':', 'c3'))
+        self.assertEqual(_items(_storage)[_HIST_CMD], (5, {4: 'c4', 5: 'c3'}))
 
     @_patch_storage
     def test_history(self, _storage):
@@ -423,3 +463,77 @@ class TestHistory(unittest.TestCase):
         ), history('all'))
 
         self.assertEqual('', history('foobar'))
+
+
+class TestHistoryPersistence(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.tmp.name, 'shada')
+        for target, new in (
+                ('nv.shada._file_path', lambda: self.file),
+                ('nv.shada._data', None),
+                ('nv.shada._pending', []),
+                ('nv.shada._timer', None),
+                ('nv.history._storage', None),
+                ('nv.history._disk_storage', None)):
+            patcher = unittest.mock.patch('NeoVintageous.' + target, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def reload(self):
+        for target in ('nv.shada._data', 'nv.history._storage', 'nv.history._disk_storage'):
+            patcher = unittest.mock.patch('NeoVintageous.' + target, None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @unittest.mock.patch('NeoVintageous.nv.shada.Timer')
+    def test_writes_after_an_interval_and_loads_on_first_use(self, timer):
+        history_add(':', 'ls')
+        history_add(':', 'buffers')
+        history_add('/', 'fizz')
+        history_add(':', 'ls')
+        self.assertEqual(1, timer.call_count)
+        self.assertFalse(os.path.exists(self.file))
+        timer.call_args[0][1]()
+        self.assertTrue(os.path.exists(self.file))
+
+        self.reload()
+        self.assertEqual('ls', history_get(':'))
+        self.assertEqual('buffers', history_get(':', -2))
+        self.assertEqual(2, history_nr(':'))
+        self.assertEqual('fizz', history_get('/'))
+        self.assertEqual('', history_get('@'))
+
+    @unittest.mock.patch('NeoVintageous.nv.shada.Timer')
+    def test_writes_deletes(self, timer):
+        history_add(':', 'ls')
+        history_add(':', 'buffers')
+        history_add('/', 'fizz')
+        shada_write()
+        history_del(':', -1)
+        history_del('/')
+        shada_write()
+
+        self.reload()
+        self.assertEqual('ls', history_get(':'))
+        self.assertEqual(1, history_len(':'))
+        self.assertEqual(0, history_len('/'))
+
+    @unittest.mock.patch('NeoVintageous.nv.shada.Timer')
+    def test_does_not_write_replaced_storage(self, timer):
+        with unittest.mock.patch('NeoVintageous.nv.history._storage', _new_storage()):
+            history_add(':', 'ls')
+            shada_write()
+
+        self.assertFalse(os.path.exists(self.file))
+        self.assertEqual(0, timer.call_count)
+
+    def test_invalid_file_is_ignored(self):
+        with open(self.file, 'w') as f:
+            f.write('{')
+
+        self.assertEqual('', history_get(':'))
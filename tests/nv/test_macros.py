@@ -0,0 +1,105 @@
+# Copyright (C) 2018 The NeoVintageous Team (NeoVintageous).
+#
+# This file is part of NeoVintageous.
+#
+# NeoVintageous is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# NeoVintageous is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
+
+from NeoVintageous.tests import unittest
+
+from NeoVintageous.nv import macros
+
+
+class Window():
+
+    def id(self):
+        return 1
+
+
+@unittest.mock.patch('NeoVintageous.nv.macros.set_window_status', unittest.mock.Mock())
+@unittest.mock.patch('NeoVintageous.nv.macros.erase_window_status', unittest.mock.Mock())
+@unittest.mock.patch('NeoVintageous.nv.macros.shada_set', unittest.mock.Mock())
+@unittest.mock.patch('NeoVintageous.nv.macros.shada_get', unittest.mock.Mock(return_value={}))
+@unittest.mock.patch('NeoVintageous.nv.macros._state', new_callable=dict)
+class TestReplayPlan(unittest.TestCase):
+
+    def record(self, window, name, steps):
+        macros.start_recording(window, name)
+        macros._get(window)['recording_steps'] = steps
+        macros.stop_recording(window)
+
+    def test_compile(self, state):
+        x = {'mode': 'normal', 'xpos': 0}
+        motion = {'mode': 'normal', 'motion': {'motion': '_vi_j', 'motion_args': {'xpos': 0}}}
+        plan = macros._compile([
+            ('_vi_w', {'mode': 'normal'}),
+            ('_vi_j', x),
+            ('_vi_d', motion),
+            ('_vi_d', {'motion': {'motion': '_vi_w', 'motion_args': {}}}),
+        ])
+        self.assertEqual((
+            ('_vi_w', {'mode': 'normal'}, None),
+            ('_vi_j', x, macros._with_xpos),
+            ('_vi_d', motion, macros._with_motion_xpos),
+            ('_vi_d', {'motion': {'motion': '_vi_w', 'motion_args': {}}}, None),
+        ), plan)
+
+        self.assertEqual({'mode': 'normal', 'xpos': 3}, plan[1][2](x, 3))
+        self.assertEqual(
+            {'mode': 'normal', 'motion': {'motion': '_vi_j', 'motion_args': {'xpos': 3}}},
+            plan[2][2](motion, 3))
+
+        # The recorded steps are not mutated.
+        self.assertEqual({'mode': 'normal', 'xpos': 0}, x)
+        self.assertEqual({'mode': 'normal', 'motion': {'motion': '_vi_j', 'motion_args': {'xpos': 0}}}, motion)
+
+    def test_plan_is_compiled_once_until_recorded_again(self, state):
+        window = Window()
+        self.assertIsNone(macros.get_replay_plan(window, 'q'))
+        self.record(window, 'q', [('_vi_w', {})])
+        plan = macros.get_replay_plan(window, 'q')
+        self.assertEqual((('_vi_w', {}, None),), plan)
+        self.assertIs(plan, macros.get_replay_plan(window, 'q'))
+        self.record(window, 'q', [('_vi_b', {})])
+        self.assertEqual((('_vi_b', {}, None),), macros.get_replay_plan(window, 'q'))
+
+
+@unittest.mock.patch('NeoVintageous.nv.macros.set_window_status', unittest.mock.Mock())
+@unittest.mock.patch('NeoVintageous.nv.macros.erase_window_status', unittest.mock.Mock())
+@unittest.mock.patch('NeoVintageous.nv.macros._state', new_callable=dict)
+class TestPersistence(unittest.TestCase):
+
+    def record(self, window, name, steps):
+        macros.start_recording(window, name)
+        macros._get(window)['recording_steps'] = steps
+        macros.stop_recording(window)
+
+    @unittest.mock.patch('NeoVintageous.nv.macros._persistent', True)
+    @unittest.mock.patch('NeoVintageous.nv.macros.shada_get', return_value={'a': [['_vi_w', {}]]})
+    @unittest.mock.patch('NeoVintageous.nv.macros.shada_set')
+    def test_persistent(self, shada_set, shada_get, state):
+        window = Window()
+        self.assertEqual([('_vi_w', {})], macros.get_recorded(window, 'a'))
+        self.record(window, 'q', [('_vi_b', {})])
+        shada_set.assert_called_once_with('macro', 'q', [('_vi_b', {})])
+
+    @unittest.mock.patch('NeoVintageous.nv.macros._persistent', True)
+    @unittest.mock.patch('NeoVintageous.nv.macros.shada_get', return_value={'a': [['_vi_w', {}]]})
+    @unittest.mock.patch('NeoVintageous.nv.macros.shada_set')
+    def test_not_persistent_after_reset(self, shada_set, shada_get, state):
+        window = Window()
+        macros._reset_data()
+        self.assertIsNone(macros.get_recorded(window, 'a'))
+        self.record(window, 'q', [('_vi_b', {})])
+        self.assertFalse(shada_set.called)
+        self.assertFalse(shada_get.called)
@@ -19,10 +19,12 @@ from NeoVintageous.tests import unittest
 
 from NeoVintageous.nv.mappings import _find_full_match
 from NeoVintageous.nv.mappings import _find_partial_matches
+from NeoVintageous.nv.mappings import _new_mappings_index
 from NeoVintageous.nv.mappings import _seq_to_mapping
 from NeoVintageous.nv.mappings import INSERT
 from NeoVintageous.nv.mappings import Mapping
 from NeoVintageous.nv.mappings import mappings_add
+from NeoVintageous.nv.mappings import mappings_can_resolve
 from NeoVintageous.nv.mappings import mappings_clear
 from NeoVintageous.nv.mappings import mappings_is_incomplete
 from NeoVintageous.nv.mappings import mappings_remove
@@ -44,8 +46,12 @@ from NeoVintageous.nv.mappings import _mappings as _mappings_struct_
 
 
 # Reusable mappings test patcher (also passes a clean mappings structure to tests).
-_patch_mappings = unittest.mock.patch('NeoVintageous.nv.mappings._mappings',
-                                      new_callable=lambda: {k: {} for k in _mappings_struct_})
+def _patch_mappings(f):
+    @unittest.mock.patch('NeoVintageous.nv.mappings._mappings_index', new_callable=_new_mappings_index)
+    @unittest.mock.patch('NeoVintageous.nv.mappings._mappings', new_callable=lambda: {k: {} for k in _mappings_struct_})
+    def wrapped(self, _mappings, _mappings_index):
+        return f(self, _mappings)
+    return wrapped
 
 
 class TestMapping(unittest.TestCase):
@@ -346,6 +352,41 @@ class TestMappings(unittest.TestCase):
 
         self.assertFalse(mappings_is_incomplete(NORMAL, 'f'))
 
+    @_patch_mappings
+    def test_find_partial_match_after_remove(self, _mappings):
+        mappings_add(unittest.NORMAL, ',a', 'x')
+        mappings_add(unittest.NORMAL, ',ab', 'x')
+        mappings_add(unittest.NORMAL, ',b', 'x')
+        mappings_add(unittest.NORMAL, ',b', 'y')  # Redefinition should not be indexed twice.
+        self.assertEqual(sorted(_find_partial_matches(unittest.NORMAL, ',')), [',a', ',ab', ',b'])
+        mappings_remove(unittest.NORMAL, ',ab')
+        self.assertEqual(sorted(_find_partial_matches(unittest.NORMAL, ',')), [',a', ',b'])
+        self.assertEqual(_find_partial_matches(unittest.NORMAL, ',ab'), [])
+        mappings_remove(unittest.NORMAL, ',b')
+        self.assertEqual(_find_partial_matches(unittest.NORMAL, ',b'), [])
+        self.assertEqual(_find_partial_matches(unittest.NORMAL, ','), [',a'])
+        mappings_remove(unittest.NORMAL, ',a')
+        self.assertEqual(_find_partial_matches(unittest.NORMAL, ''), [])
+        self.assertFalse(mappings_is_incomplete(unittest.NORMAL, ','))
+
+    @_patch_mappings
+    def test_find_partial_match_after_clear(self, _mappings):
+        mappings_add(unittest.NORMAL, ',a', 'x')
+        mappings_clear()
+        self.assertEqual(_find_partial_matches(unittest.NORMAL, ','), [])
+        self.assertFalse(mappings_can_resolve(unittest.NORMAL, ','))
+
+    @_patch_mappings
+    def test_can_resolve(self, _mappings):
+        self.assertFalse(mappings_can_resolve(unittest.NORMAL, ','))
+        mappings_add(unittest.NORMAL, ',ab', 'x')
+        self.assertTrue(mappings_can_resolve(unittest.NORMAL, ','))
+        self.assertTrue(mappings_can_resolve(unittest.NORMAL, ',a'))
+        self.assertTrue(mappings_can_resolve(unittest.NORMAL, ',ab'))
+        self.assertFalse(mappings_can_resolve(unittest.NORMAL, ',abc'))
+        self.assertFalse(mappings_can_resolve(unittest.NORMAL, ',b'))
+        self.assertFalse(mappings_can_resolve(unittest.VISUAL, ','))
+
 
 class TestResolve(unittest.ViewTestCase):
 
@@ -0,0 +1,209 @@
+# Copyright (C) 2018 The NeoVintageous Team (NeoVintageous).
+#
+# This file is part of NeoVintageous.
+#
+# NeoVintageous is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# NeoVintageous is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
+
+import json
+import os
+import tempfile
+
+from NeoVintageous.tests import unittest
+
+from NeoVintageous.nv.shada import shada_append
+from NeoVintageous.nv.shada import shada_fits
+from NeoVintageous.nv.shada import shada_get
+from NeoVintageous.nv.shada import shada_remove
+from NeoVintageous.nv.shada import shada_set
+from NeoVintageous.nv.shada import shada_write
+
+
+class TestShada(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.tmp.name, 'shada')
+        for target, new in (
+                ('_file_path', lambda: self.file),
+                ('_get_max_item_size', lambda: 1024),
+                ('_data', None),
+                ('_pending', []),
+                ('_timer', None),
+                ('_file_size', 0),
+                ('_rewrite_size', 0)):
+            patcher = unittest.mock.patch('NeoVintageous.nv.shada.' + target, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        patcher = unittest.mock.patch('NeoVintageous.nv.shada.Timer')
+        self.timer = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def reload(self):
+        patcher = unittest.mock.patch('NeoVintageous.nv.shada._data', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def lines(self):
+        with open(self.file, encoding='utf-8') as f:
+            return f.read().splitlines()
+
+    def test_get_is_empty_without_a_file(self):
+        self.assertEqual({}, shada_get('register'))
+
+    def test_set_and_delete(self):
+        shada_set('register', 'a', {'values': ['fizz'], 'linewise': False})
+        shada_set('mark', 'A', ['/tmp/fizz', 1, 2])
+        self.assertEqual({'a': {'values': ['fizz'], 'linewise': False}}, shada_get('register'))
+        shada_set('register', 'a', None)
+        self.assertEqual({}, shada_get('register'))
+        self.assertEqual({'A': ['/tmp/fizz', 1, 2]}, shada_get('mark'))
+
+    def test_append_and_remove(self):
+        shada_append('history', 'cmd', 'ls')
+        shada_append('history', 'cmd', 'buffers')
+        shada_append('history', 'cmd', 'ls')
+        self.assertEqual({'cmd': ['buffers', 'ls']}, shada_get('history'))
+        shada_append('history', 'cmd', 'x', max_entries=2)
+        self.assertEqual({'cmd': ['ls', 'x']}, shada_get('history'))
+        shada_remove('history', 'cmd', 'ls')
+        self.assertEqual({'cmd': ['x']}, shada_get('history'))
+
+    def test_writes_after_an_interval(self):
+        shada_set('register', 'a', {'values': ['fizz'], 'linewise': False})
+        shada_set('register', 'b', {'values': ['buzz'], 'linewise': True})
+        self.assertEqual(1, self.timer.call_count)
+        self.assertFalse(os.path.exists(self.file))
+        self.timer.call_args[0][1]()
+        self.reload()
+        self.assertEqual({
+            'a': {'values': ['fizz'], 'linewise': False},
+            'b': {'values': ['buzz'], 'linewise': True}
+        }, shada_get('register'))
+
+    def test_coalesces_changes_to_the_same_value(self):
+        shada_set('register', 'a', {'values': ['fizz'], 'linewise': False})
+        shada_set('register', 'a', {'values': ['buzz'], 'linewise': False})
+        shada_write()
+        self.assertEqual([
+            '{"version": 1}',
+            '["=","register","a",{"values":["buzz"],"linewise":false}]'
+        ], self.lines())
+
+    def test_appends_changes_to_the_file(self):
+        shada_set('register', 'a', {'values': ['fizz'], 'linewise': False})
+        shada_write()
+        shada_append('history', 'cmd', 'ls')
+        shada_set('register', 'a', None)
+        shada_write()
+        self.assertEqual([
+            '{"version": 1}',
+            '["=","register","a",{"values":["fizz"],"linewise":false}]',
+            '["+","history","cmd","ls"]',
+            '["=","register","a",null]'
+        ], self.lines())
+
+        self.reload()
+        self.assertEqual({}, shada_get('register'))
+        self.assertEqual({'cmd': ['ls']}, shada_get('history'))
+
+    @unittest.mock.patch('NeoVintageous.nv.shada._MIN_REWRITE_SIZE', 0)
+    def test_rewrites_the_file_without_superseded_records_when_it_doubles_in_size(self):
+        for value in ('fizz', 'buzz', 'fizzbuzz'):
+            shada_set('register', 'a', {'values': [value], 'linewise': False})
+            shada_write()
+
+        self.assertEqual(4, len(self.lines()))
+        shada_set('register', 'a', {'values': ['fizz buzz'], 'linewise': False})
+        shada_write()
+        self.assertEqual([
+            '{"version": 1}',
+            '["=","register","a",{"values":["fizz buzz"],"linewise":false}]'
+        ], self.lines())
+
+    def test_does_not_write_values_over_the_size_cap(self):
+        shada_set('register', 'a', {'values': ['fizz'], 'linewise': False})
+        shada_write()
+        shada_set('register', 'a', {'values': ['x' * 2048], 'linewise': False})
+        shada_append('history', 'cmd', 'y' * 2048)
+        shada_write()
+        self.assertEqual([
+            '{"version": 1}',
+            '["=","register","a",{"values":["fizz"],"linewise":false}]',
+            '["=","register","a",null]'
+        ], self.lines())
+
+    def test_does_not_encode_values_over_the_size_cap(self):
+        with unittest.mock.patch('NeoVintageous.nv.shada.json.dumps', side_effect=json.dumps) as dumps:
+            shada_set('register', 'a', {'values': ['x' * 2048], 'linewise': False})
+            shada_write()
+
+        self.assertEqual([unittest.mock.call(['=', 'register', 'a', None], ensure_ascii=False, separators=(',', ':'))],
+                         [c for c in dumps.call_args_list if c[0][0] != {'version': 1}])
+
+    def test_fits(self):
+        self.assertTrue(shada_fits(['fizz']))
+        self.assertTrue(shada_fits({'values': ['x' * 900], 'linewise': False}))
+        self.assertFalse(shada_fits({'values': ['x' * 900, 'y' * 200], 'linewise': False}))
+
+    def test_a_zero_size_cap_disables_the_file(self):
+        with open(self.file, 'w', encoding='utf-8') as f:
+            f.write('{"version": 1}\n')
+            f.write('["=","register","b",{"values":["fizz"],"linewise":false}]\n')
+
+        with unittest.mock.patch('NeoVintageous.nv.shada._get_max_item_size', lambda: 0):
+            self.assertEqual({}, shada_get('register'))
+            shada_set('register', 'a', {'values': ['buzz'], 'linewise': False})
+            shada_append('history', 'cmd', 'ls')
+            self.assertEqual({'a': {'values': ['buzz'], 'linewise': False}}, shada_get('register'))
+            self.assertFalse(self.timer.called)
+            shada_write()
+
+        self.assertEqual([
+            '{"version": 1}',
+            '["=","register","b",{"values":["fizz"],"linewise":false}]'
+        ], self.lines())
+
+    def test_skips_records_over_the_size_cap_on_load(self):
+        with open(self.file, 'w', encoding='utf-8') as f:
+            f.write('{"version": 1}\n')
+            f.write('["=","register","a",{"values":["%s"],"linewise":false}]\n' % ('x' * 2048))
+            f.write('["=","register","b",{"values":["fizz"],"linewise":false}]\n')
+
+        self.assertEqual({'b': {'values': ['fizz'], 'linewise': False}}, shada_get('register'))
+
+    def test_ignores_invalid_records(self):
+        with open(self.file, 'w', encoding='utf-8') as f:
+            f.write('{"version": 1}\n')
+            f.write('["=","register"]\n')
+            f.write('["=","register","b",{"values":["fizz"],"linewise":false}]\n')
+            f.write('["=","register","c",{"val')
+
+        self.assertEqual({'b': {'values': ['fizz'], 'linewise': False}}, shada_get('register'))
+
+        # The partial last line is not appended to.
+        shada_set('register', 'd', {'values': ['buzz'], 'linewise': False})
+        shada_write()
+        self.reload()
+        self.assertEqual(['b', 'd'], sorted(shada_get('register')))
+
+    def test_ignores_unsupported_versions(self):
+        with open(self.file, 'w', encoding='utf-8') as f:
+            f.write('{"version": 999}\n')
+            f.write('["=","register","b",{"values":["fizz"],"linewise":false}]\n')
+
+        self.assertEqual({}, shada_get('register'))
@@ -0,0 +1,188 @@
+# Copyright (C) 2018 The NeoVintageous Team (NeoVintageous).
+#
+# This file is part of NeoVintageous.
+#
+# NeoVintageous is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# NeoVintageous is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
+import threading
+
+from sublime import Region
+
+from NeoVintageous.tests import unittest
+
+from NeoVintageous.nv import shell
+
+
+class Selection(list):
+
+    def clear(self):
+        del self[:]
+
+    def add_all(self, points):
+        self.extend(points)
+
+
+class View():
+
+    def __init__(self, text):
+        self.text = text
+        self.changes = 0
+        self.commands = []
+        self._sel = Selection()
+
+    def id(self):
+        return 1
+
+    def settings(self):
+        return {}
+
+    def change_count(self):
+        return self.changes
+
+    def substr(self, region):
+        return self.text[region.begin():region.end()]
+
+    def replace(self, edit, region, text):
+        self.text = self.text[:region.begin()] + text + self.text[region.end():]
+        self.changes += 1
+
+    def run_command(self, name, args=None):
+        self.commands.append(name)
+        if name == '_nv_filter_apply':
+            shell.filter_apply(self, None)
+
+    def sel(self):
+        return self._sel
+
+    def set_status(self, key, value):
+        pass
+
+    def erase_status(self, key):
+        pass
+
+
+class Process():
+
+    def __init__(self):
+        self.killed = threading.Event()
+
+    def poll(self):
+        return 0 if self.killed.is_set() else None
+
+    def kill(self):
+        self.killed.set()
+
+
+def _upper(view, text, command, on_start=None):
+    return text.upper()
+
+
+@unittest.mock.patch('NeoVintageous.nv.shell.status_message')
+@unittest.mock.patch.object(shell._shell, 'kill_process', Process.kill)
+@unittest.mock.patch('NeoVintageous.nv.shell.set_timeout', lambda f, d=0: f())
+@unittest.mock.patch('NeoVintageous.nv.shell._filters', new_callable=dict)
+class TestFilterThruShell(unittest.TestCase):
+
+    def filter(self, view, regions, filter_region=_upper):
+        with unittest.mock.patch.object(shell._shell, 'filter_region', filter_region):
+            shell.filter_thru_shell(view, None, regions, 'cmd')
+
+    def test_applies_all_replacements(self, filters, status_message):
+        view = View('aa\nbb\ncc\n')
+        self.filter(view, [Region(0, 3), Region(6, 9)])
+        self.assertEqual('AA\nbb\nCC\n', view.text)
+        self.assertEqual([0, 6], view.sel())
+        self.assertEqual(['_enter_normal_mode'], view.commands)
+
+    def test_regions_are_filtered_concurrently(self, filters, status_message):
+        barrier = threading.Barrier(2, timeout=5)
+
+        def filter_region(view, text, command, on_start=None):
+            barrier.wait()
+            return text.upper()
+
+        view = View('aa\nbb\n')
+        self.filter(view, [Region(0, 3), Region(3, 6)], filter_region)
+        self.assertEqual('AA\nBB\n', view.text)
+
+    @unittest.mock.patch('NeoVintageous.nv.shell._SYNC_TIMEOUT', 0)
+    def test_slow_filter_is_applied_when_it_finishes(self, filters, status_message):
+        release = threading.Event()
+
+        def filter_region(view, text, command, on_start=None):
+            release.wait(5)
+            return text.upper()
+
+        view = View('aa\nbb\n')
+        with unittest.mock.patch('NeoVintageous.nv.shell.set_timeout'):
+            self.filter(view, [Region(0, 3)], filter_region)
+
+        self.assertEqual('aa\nbb\n', view.text)
+        self.assertIn(1, filters)
+        release.set()
+        filters[1].wait(5)
+        shell._poll(view, filters[1])
+        self.assertEqual('AA\nbb\n', view.text)
+        self.assertEqual({}, filters)
+
+    @unittest.mock.patch('NeoVintageous.nv.shell._SYNC_TIMEOUT', 0)
+    def test_cancel_kills_the_process(self, filters, status_message):
+        process = Process()
+
+        def filter_region(view, text, command, on_start=None):
+            on_start(process)
+            process.killed.wait(5)
+            return ''
+
+        view = View('aa\nbb\n')
+        with unittest.mock.patch('NeoVintageous.nv.shell.set_timeout'):
+            self.filter(view, [Region(0, 3)], filter_region)
+
+        shell.filter_cancel(view)
+        self.assertTrue(process.killed.is_set())
+        self.assertEqual({}, filters)
+        self.assertEqual('aa\nbb\n', view.text)
+        status_message.assert_called_with('filter cancelled: %s', 'cmd')
+
+    @unittest.mock.patch('NeoVintageous.nv.shell._TIMEOUT', 0.01)
+    def test_timeout_kills_the_process(self, filters, status_message):
+        process = Process()
+
+        def filter_region(view, text, command, on_start=None):
+            on_start(process)
+            process.killed.wait(5)
+            return ''
+
+        view = View('aa\nbb\n')
+        self.filter(view, [Region(0, 3)], filter_region)
+        self.assertTrue(process.killed.is_set())
+        self.assertEqual('aa\nbb\n', view.text)
+        status_message.assert_called_with('filter %s: %s', 'timed out', 'cmd')
+
+    @unittest.mock.patch('NeoVintageous.nv.shell._SYNC_TIMEOUT', 0)
+    def test_is_discarded_if_the_buffer_changes(self, filters, status_message):
+        release = threading.Event()
+
+        def filter_region(view, text, command, on_start=None):
+            release.wait(5)
+            return text.upper()
+
+        view = View('aa\nbb\n')
+        with unittest.mock.patch('NeoVintageous.nv.shell.set_timeout'):
+            self.filter(view, [Region(0, 3)], filter_region)
+
+        view.replace(None, Region(0), 'x')
+        release.set()
+        filters[1].wait(5)
+        shell._poll(view, filters[1])
+        self.assertEqual('xaa\nbb\n', view.text)
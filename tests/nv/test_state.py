@@ -276,3 +276,44 @@ class TestStateSetCommand(unittest.ViewTestCase):
         self.state.set_command(operator)
 
         self.assertEqual(self.state.mode, unittest.OPERATOR_PENDING)
+
+
+class TestStateCommandCache(unittest.ViewTestCase):
+
+    def test_state_holds_a_copy_of_shared_command_definitions(self):
+        shared = cmd_defs.ViReplaceCharacters()
+        self.state.action = shared
+        self.state.action.accept('x')
+        self.assertEqual(self.state.action.inp, 'x')
+        self.assertEqual(shared.inp, '')
+
+    def test_accepted_input_is_kept(self):
+        motion = cmd_defs.ViSearchCharForward()
+        self.state.motion = motion
+        self.state.process_input('x')
+        self.assertEqual(self.state.motion.inp, 'x')
+        self.assertEqual(motion.inp, '')
+
+    def test_loads_persisted_command_definitions(self):
+        self.state.action = cmd_defs.ViDeleteLine()
+        self.state.motion = cmd_defs.ViMoveRightByChars()
+        self.state.settings.vi['action'] = self.state.action.serialize()
+        self.state.settings.vi['motion'] = self.state.motion.serialize()
+        self.assertIsInstance(self.state.action, cmd_defs.ViDeleteLine)
+        self.assertIsInstance(self.state.motion, cmd_defs.ViMoveRightByChars)
+
+    def test_deserializes_command_definitions_once_per_keystroke(self):
+        # A keystroke reads the action and motion many times (runnable(),
+        # must_collect_input, eval(), etc.) These reads used to allocate a
+        # new command definition each. They are now only allocated when set.
+        from_json = cmd_defs.ViDeleteByChars.from_json
+        with unittest.mock.patch.object(cmd_defs.ViDeleteByChars, 'from_json', side_effect=from_json) as f:
+            self.state.mode = unittest.NORMAL
+            self.state.set_command(cmd_defs.ViDeleteByChars())
+            for i in range(50):
+                self.state.runnable()
+                self.state.must_collect_input
+                self.state.must_update_xpos
+                self.state.must_scroll_into_view()
+
+            self.assertEqual(f.call_count, 1)
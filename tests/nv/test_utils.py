@@ -23,7 +23,9 @@ from NeoVintageous.nv.utils import extract_file_name
 from NeoVintageous.nv.utils import extract_url
 from NeoVintageous.nv.utils import resolve_visual_line_target
 from NeoVintageous.nv.utils import resolve_visual_target
+from NeoVintageous.nv.utils import regions_transformer_batched
 from NeoVintageous.nv.utils import translate_char
+from NeoVintageous.nv.utils import ViewSnapshot
 from NeoVintageous.nv.utils import VisualBlockSelection
 from NeoVintageous.nv.vim import DIRECTION_DOWN
 from NeoVintageous.nv.vim import DIRECTION_UP
@@ -125,6 +127,63 @@ class TestExtractUrl(unittest.ViewTestCase):
         self.assertExtractUrl('http://api-v1.example.com', 'http://api-v1.example.com.')
 
 
+class TestViewSnapshot(unittest.ViewTestCase):
+
+    def test_matches_the_view(self):
+        self.write('fizz\n\n\tbuzz é\nx\n')
+        snapshot = ViewSnapshot(self.view)
+        size = self.view.size()
+        self.assertEqual(size, snapshot.size())
+        self.assertEqual(self.view.substr(-1), snapshot.substr(-1))
+        for a in range(size + 1):
+            self.assertEqual(self.view.substr(a), snapshot.substr(a), a)
+            self.assertEqual(self.view.rowcol(a), snapshot.rowcol(a), a)
+            for b in range(a, size + 1):
+                region = Region(a, b)
+                self.assertEqual(self.view.substr(region), snapshot.substr(region), region)
+                self.assertEqual(self.view.line(region), snapshot.line(region), region)
+                self.assertEqual(self.view.full_line(region), snapshot.full_line(region), region)
+
+        for row in range(4):
+            for col in range(3):
+                self.assertEqual(self.view.text_point(row, col), snapshot.text_point(row, col), (row, col))
+
+        self.assertEqual(size, snapshot.text_point(4, 0))
+
+    def test_settings(self):
+        snapshot = ViewSnapshot(self.view)
+        self.settings().set('tab_size', 2)
+        self.assertEqual(2, snapshot.settings().get('tab_size'))
+        self.settings().set('tab_size', 8)
+        self.assertEqual(2, snapshot.settings().get('tab_size'))
+        snapshot.settings().set('tab_size', 4)
+        self.assertEqual(4, snapshot.settings().get('tab_size'))
+        self.assertEqual(4, self.settings().get('tab_size'))
+        self.assertEqual('x', snapshot.settings().get('__nv_test_unset', 'x'))
+
+    @unittest.mock.patch('NeoVintageous.nv.utils._BATCH_MIN_SELECTIONS', 3)
+    def test_regions_transformer_batched(self):
+        self.normal('|fizz\n|buzz\n|x')
+
+        def f(view, s):
+            self.assertIsInstance(view, ViewSnapshot)
+            return Region(view.line(s.b).b)
+
+        regions_transformer_batched(self.view, f)
+        self.assertNormal('fizz|\nbuzz|\nx|')
+
+    @unittest.mock.patch('NeoVintageous.nv.utils._BATCH_MIN_SELECTIONS', 3)
+    def test_regions_transformer_batched_uses_the_view_for_a_few_selections(self):
+        self.normal('|fizz\n|buzz')
+
+        def f(view, s):
+            self.assertIs(view, self.view)
+            return Region(view.line(s.b).b)
+
+        regions_transformer_batched(self.view, f)
+        self.assertNormal('fizz|\nbuzz|')
+
+
 class TestResolveVisualTarget(unittest.TestCase):
 
     def assertResolveVisualTarget(self, s, target, expected):
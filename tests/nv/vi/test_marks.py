@@ -14,79 +14,118 @@
 #
 # You should have received a copy of the GNU General Public License
 # along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
-
 from NeoVintageous.tests import unittest
 
 from NeoVintageous.nv.state import State
 from NeoVintageous.nv.vi import marks
 
 
-class View():
-    def __init__(self, id_, fname, buffer_id=0):
-        self.view_id = id_
-        self.fname = fname
-        self._buffer_id = buffer_id
+class MarksTests(unittest.ViewTestCase):
 
-    def file_name(self):
-        return self.fname
+    def setUp(self):
+        super().setUp()
+        for target, new in (('_global', {}), ('_global_by_view', {})):
+            patcher = unittest.mock.patch('NeoVintageous.nv.vi.marks.' + target, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
 
-    def buffer_id(self):
-        return self._buffer_id
+        patcher = unittest.mock.patch('NeoVintageous.nv.vi.marks.shada_set')
+        self.shada_set = patcher.start()
+        self.addCleanup(patcher.stop)
 
+        patcher = unittest.mock.patch('NeoVintageous.nv.vi.marks.shada_get', return_value={})
+        self.shada_get = patcher.start()
+        self.addCleanup(patcher.stop)
 
-class Window():
-    pass
+        self.write(''.join(('foo bar\n') * 10))
+        self.select(0)
+        self.marks = State(self.view).marks
 
+    def newView(self, text, fname=None):
+        view = self.view.window().new_file()
+        self.addCleanup(view.close)
+        view.set_scratch(True)
+        view.run_command('_nv_test_write', {'text': text})
+        if fname:
+            view.file_name = lambda: fname
 
-class MarksTests(unittest.ViewTestCase):
-
-    def setUp(self):
-        super().setUp()
-        marks._MARKS = {}
-        self.view.sel().clear()
-        self.view.sel().add(self.Region(0, 0))
-        self.marks = State(self.view).marks
+        return view
 
     def test_can_set_mark(self):
         self.marks.add('a', self.view)
-        expected_win, expected_view, expected_region = (self.view.window(), self.view, (0, 0))
-        actual_win, actual_view, actual_region = marks._MARKS['a']
-        self.assertEqual((actual_win.id(), actual_view.view_id, actual_region),
-                         (expected_win.id(), expected_view.view_id, expected_region))
+        self.assertEqual([self.Region(0)], self.view.get_regions('vi_mark_a'))
 
-    def test_can_retrieve_mark_in_the_current_buffer_as_tuple(self):
+    def test_can_retrieve_mark_in_the_current_buffer(self):
+        self.select(30)
         self.marks.add('a', self.view)
-        # The caret's at the beginning of the buffer.
-        self.assertEqual(self.marks.get_as_encoded_address('a'), self.Region(0, 0))
-
-    def test_can_retrieve_mark_in_the_current_buffer_as_tuple2(self):
-        self.write(''.join(('foo bar\n') * 10))
-        self.view.sel().clear()
-        self.view.sel().add(self.Region(30, 30))
-        self.marks.add('a', self.view)
-        self.assertEqual(self.marks.get_as_encoded_address('a'), self.Region(24, 24))
-
-    def test_can_retrieve_mark_in_a_different_buffer_as_encoded_mark(self):
-        view = View(id_=self.view.view_id + 1, fname=r'C:\foo.txt')
+        self.assertEqual(self.marks.get_as_encoded_address('a'), self.Region(24))
+        self.assertEqual(self.marks.get_as_encoded_address('a', exact=True), self.Region(30))
 
-        marks._MARKS['a'] = (Window(), view, (0, 0))
-        expected = "{0}:{1}".format(r'C:\foo.txt', "0:0")
-        self.assertEqual(self.marks.get_as_encoded_address('a'), expected)
+    def test_unset_mark_is_none(self):
+        self.assertIsNone(self.marks.get_as_encoded_address('a'))
+        self.assertIsNone(self.marks.get_as_encoded_address('A'))
 
-    def test_can_retrieve_mark_in_an_untitled_buffer_as_encoded_mark(self):
-        view = View(id_=self.view.view_id + 1, fname='', buffer_id=999)
+    def test_mark_moves_with_edits(self):
+        self.select(30)
+        self.marks.add('a', self.view)
+        self.select(0)
+        self.view.run_command('insert', {'characters': 'fizz\nbuzz\n'})
+        self.assertEqual(self.marks.get_as_encoded_address('a'), self.Region(34))
+        self.assertEqual(self.marks.get_as_encoded_address('a', exact=True), self.Region(40))
 
-        marks._MARKS['a'] = (Window(), view, (0, 0))
-        expected = "<untitled {0}>:{1}".format(999, "0:0")
-        self.assertEqual(self.marks.get_as_encoded_address('a'), expected)
+    def test_lowercase_marks_are_local_to_the_view(self):
+        self.marks.add('a', self.view)
+        view = self.newView('fizz')
+        self.assertIsNone(State(view).marks.get_as_encoded_address('a'))
+
+    def test_can_retrieve_uppercase_mark_in_a_different_buffer_as_encoded_mark(self):
+        self.select(30)
+        self.marks.add('A', self.view)
+        view = self.newView('fizz')
+        expected = '<untitled {0}>:{1}'.format(self.view.buffer_id(), '3:0')
+        self.assertEqual(State(view).marks.get_as_encoded_address('A'), expected)
+        expected = '<untitled {0}>:{1}'.format(self.view.buffer_id(), '3:6')
+        self.assertEqual(State(view).marks.get_as_encoded_address('A', exact=True), expected)
+
+    def test_setting_uppercase_mark_in_another_view_moves_it(self):
+        self.marks.add('A', self.view)
+        view = self.newView('fizz')
+        view.sel().clear()
+        view.sel().add(0)
+        State(view).marks.add('A', view)
+        self.assertEqual([], self.view.get_regions('vi_mark_A'))
+        self.assertEqual(self.marks.get_as_encoded_address('A'), '<untitled {0}>:0:0'.format(view.buffer_id()))
+
+    def test_uppercase_marks_in_files_are_persisted(self):
+        view = self.newView('fizz\nbuzz', fname='/tmp/fizz.txt')
+        view.sel().clear()
+        view.sel().add(7)
+        State(view).marks.add('A', view)
+        self.shada_set.assert_called_once_with('mark', 'A', ['/tmp/fizz.txt', 1, 2])
+
+    def test_closed_views_leave_file_marks_behind(self):
+        view = self.newView('fizz\nbuzz', fname='/tmp/fizz.txt')
+        view.sel().clear()
+        view.sel().add(7)
+        State(view).marks.add('A', view)
+        view.sel().clear()
+        view.sel().add(0)
+        view.run_command('insert', {'characters': 'x\n'})
+        marks.marks_destroy(view)
+        self.shada_set.assert_called_with('mark', 'A', ['/tmp/fizz.txt', 2, 2])
+        self.assertEqual({}, marks._global)
+        self.assertEqual({}, marks._global_by_view)
+
+        self.shada_get.return_value = {'A': ['/tmp/fizz.txt', 2, 2]}
+        self.assertEqual(self.marks.get_as_encoded_address('A'), '/tmp/fizz.txt:2:0')
+        self.assertEqual(self.marks.get_as_encoded_address('A', exact=True), '/tmp/fizz.txt:2:2')
 
     @unittest.mock.patch('NeoVintageous.nv.vi.marks.jumplist_back')
     def test_can_retrieve_quote_mark(self, mock_jumplist_back):
         # Single quote mark should call jumplist_back for its region ignoring
         # any mark set for "'".
-        marks._MARKS['\''] = (Window(), self.view, (0, 0))
+        self.marks.add('\'', self.view)
         mock_jumplist_back.return_value = (self.view, [self.Region(30, 30)])
-        self.write(''.join(('foo bar\n') * 10))
 
         location = self.marks.get_as_encoded_address("'")
         self.assertEqual(location, self.Region(24, 24))
@@ -95,9 +134,8 @@ class MarksTests(unittest.ViewTestCase):
     def test_can_retrieve_backtick_mark(self, mock_jumplist_back):
         # Backtick mark should call jumplist_back for its region ignoring any
         # mark set for "`". Here we set exact to true, emulating ``.
-        marks._MARKS['`'] = (Window(), self.view, (0, 0))
+        self.marks.add('`', self.view)
         mock_jumplist_back.return_value = (self.view, [self.Region(30, 30)])
-        self.write(''.join(('foo bar\n') * 10))
 
         location = self.marks.get_as_encoded_address("`", exact=True)
         self.assertEqual(location, self.Region(30, 30))
@@ -223,6 +223,7 @@ class TestRegister(RegistersTestCase):
     def test_setting_register_sets_clipboard_if_needed(self):
         self.settings().set('vintageous_use_sys_clipboard', True)
         self.registers['a'] = [100]
+        registers._sync_clipboard()
         self.assertEqual(get_clipboard(), '100')
 
     def test_can_append_to_single_value(self):
@@ -254,6 +255,7 @@ class TestRegister(RegistersTestCase):
         self.settings().set('vintageous_use_sys_clipboard', True)
         self.registers['a'] = ['foo']
         self.registers['A'] = ['bar']
+        registers._sync_clipboard()
         self.assertEqual(get_clipboard(), 'foobar')
 
     def test_get_default_to_unnamed_register(self):
@@ -577,3 +579,98 @@ class Test_op_yank(RegistersTestCase):
         self.assertEqual(self.registers['7'], None)
         self.assertEqual(self.registers['8'], None)
         self.assertEqual(self.registers['9'], None)
+
+
+class TestPersistence(RegistersTestCase):
+
+    @unittest.mock.patch('NeoVintageous.nv.vi.registers._loaded', False)
+    @unittest.mock.patch('NeoVintageous.nv.vi.registers.shada_get')
+    def test_loads_registers_on_first_use(self, shada_get):
+        shada_get.return_value = {
+            'a': {'values': ['fizz'], 'linewise': True},
+            '2': {'values': ['buzz'], 'linewise': False},
+            '%': {'values': ['x'], 'linewise': False},
+            'b': 'invalid'
+        }
+
+        registers._load_data()
+        registers._load_data()
+        self.assertEqual(1, shada_get.call_count)
+        self.assertEqual(self.registers['a'], ['fizz'])
+        self.assertTrue(_is_register_linewise('a'))
+        self.assertEqual(self.registers['2'], ['buzz'])
+        self.assertEqual(self.registers['b'], None)
+        self.assertNotIn('%', registers._data)
+
+    @unittest.mock.patch('NeoVintageous.nv.vi.registers._persistent', True)
+    @unittest.mock.patch('NeoVintageous.nv.vi.registers.shada_set')
+    def test_persists_changes(self, shada_set):
+        self.registers['a'] = ['fizz']
+        shada_set.assert_any_call('register', 'a', {'values': ['fizz'], 'linewise': False})
+        shada_set.assert_any_call('register', '"', {'values': ['fizz'], 'linewise': False})
+        shada_set.reset_mock()
+        self.registers['='] = ['buzz']
+        shada_set.assert_not_called()
+        registers._shift_numbered_register(['x'])
+        shada_set.assert_any_call('register', '1', {'values': ['x'], 'linewise': False})
+        shada_set.assert_any_call('register', '2', None)
+
+    def test_reset_registers_are_not_persisted(self):
+        self.assertFalse(registers._persistent)
+
+
+class TestValues(RegistersTestCase):
+
+    def test_values_are_shared_between_registers(self):
+        self.registers['a'] = ['fizz']
+        self.assertIs(self.registers['a'], self.registers[_UNNAMED])
+        self.visual('fi|zz bu|zz')
+        self.registers.op_delete(register=None, linewise=True)
+        self.assertIs(self.registers['1'], self.registers[_UNNAMED])
+
+    def test_values_are_immutable(self):
+        self.registers['a'] = ['fizz']
+        with self.assertRaises(TypeError):
+            self.registers['a'].append('buzz')
+
+        with self.assertRaises(TypeError):
+            self.registers['a'][0] = 'buzz'
+
+        self.assertEqual(self.registers['a'], ['fizz'])
+
+
+@mock.patch('NeoVintageous.nv.vi.registers.set_timeout')
+class TestSysClipboard(RegistersTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.settings().set('vintageous_use_sys_clipboard', True)
+
+    def test_clipboard_is_set_after_the_command(self, set_timeout):
+        self.registers['a'] = ['fizz']
+        self.registers['b'] = ['buzz']
+        self.assertEqual(get_clipboard(), '')
+        self.assertEqual(1, set_timeout.call_count)
+        set_timeout.call_args[0][0]()
+        self.assertEqual(get_clipboard(), 'buzz')
+
+    def test_getting_unnamed_register_sets_pending_clipboard(self, set_timeout):
+        self.registers['a'] = ['fizz']
+        self.assertEqual(self.registers[_UNNAMED], ['fizz'])
+        self.assertEqual(get_clipboard(), 'fizz')
+
+    def test_clipboard_registers_are_set_immediately(self, set_timeout):
+        self.registers[_CLIPBOARD_PLUS] = ['fizz']
+        self.assertEqual(get_clipboard(), 'fizz')
+        set_timeout.assert_not_called()
+
+    @mock.patch('NeoVintageous.nv.vi.registers._MAX_CLIPBOARD_SYNC_SIZE', 4)
+    def test_large_values_are_not_copied_to_the_clipboard(self, set_timeout):
+        set_clipboard('x')
+        self.registers['a'] = ['fizz', 'buzz']
+        set_timeout.assert_not_called()
+        self.assertEqual(get_clipboard(), 'x')
+        self.assertEqual(self.registers[_UNNAMED], ['fizz', 'buzz'])
+        set_clipboard('y')
+        self.assertEqual(self.registers[_UNNAMED], ['y'])
+        self.assertEqual(self.registers['a'], ['fizz', 'buzz'])
@@ -15,12 +15,15 @@
 # You should have received a copy of the GNU General Public License
 # along with NeoVintageous.  If not, see <https://www.gnu.org/licenses/>.
 
+from sublime import IGNORECASE
 from sublime import LITERAL
 
 from NeoVintageous.tests import unittest
 
 from NeoVintageous.nv.vi.search import find_all_in_range
 from NeoVintageous.nv.vi.search import find_wrapping
+from NeoVintageous.nv.vi.search import get_search_count
+from NeoVintageous.nv.vi.search import hilite_search
 from NeoVintageous.nv.vi.search import reverse_find_wrapping
 from NeoVintageous.nv.vi.search import reverse_search
 from NeoVintageous.nv.vi.search import reverse_search_by_pt
@@ -43,6 +46,104 @@ class TestFindWrapping(unittest.ViewTestCase):
         self.select(4)
         self.assertEqual(self.Region(12, 15), find_wrapping(self.view, 'xxx', 4, self.view.size()))
 
+    def test_can_find_count_occurrence(self):
+        self.write('xxx\naaa aaa xxx aaa xxx')
+        self.select(4)
+        self.assertEqual(self.Region(20, 23), find_wrapping(self.view, 'xxx', 4, self.view.size(), times=2))
+        self.assertEqual(self.Region(0, 3), find_wrapping(self.view, 'xxx', 4, self.view.size(), times=3))
+        self.assertEqual(self.Region(12, 15), find_wrapping(self.view, 'xxx', 4, self.view.size(), times=4))
+
+    def test_searches_buffer_once_until_it_changes(self):
+        self.write('xxx\naaa aaa xxx aaa')
+        self.select(4)
+        with unittest.mock.patch.object(self.view, 'find_all', wraps=self.view.find_all) as find_all:
+            for i in range(5):
+                self.assertEqual(self.Region(0, 3), find_wrapping(self.view, 'xxx', 4, self.view.size(), times=2))
+
+            self.assertEqual(1, find_all.call_count)
+            self.write('aaa xxx aaa xxx')
+            self.select(4)
+            self.assertEqual(self.Region(12, 15), find_wrapping(self.view, 'xxx', 4, self.view.size(), times=2))
+            self.assertEqual(2, find_all.call_count)
+
+    def test_single_search_does_not_index_the_buffer(self):
+        self.write('xxx\naaa aaa xxx aaa')
+        self.select(4)
+        with unittest.mock.patch.object(self.view, 'find_all', wraps=self.view.find_all) as find_all:
+            self.assertEqual(self.Region(12, 15), find_wrapping(self.view, 'xxx', 4, self.view.size()))
+            self.assertEqual(self.Region(0, 3), find_wrapping(self.view, 'xxx', 13, self.view.size()))
+            self.assertEqual(self.Region(0, 3), reverse_find_wrapping(self.view, 'xxx', 0, 4))
+            self.assertEqual(0, find_all.call_count)
+
+
+class TestGetSearchCount(unittest.ViewTestCase):
+
+    def test_get_search_count(self):
+        self.write('xxx\naaa aaa xxx aaa xxx')
+        self.assertEqual((1, 3), get_search_count(self.view, 'xxx', self.Region(0, 3)))
+        self.assertEqual((2, 3), get_search_count(self.view, 'xxx', self.Region(12, 15)))
+        self.assertEqual((3, 3), get_search_count(self.view, 'xxx', self.Region(20, 23)))
+        self.assertEqual((1, 4), get_search_count(self.view, 'aaa', self.Region(4, 7)))
+
+
+class TestHiliteSearch(unittest.ViewTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.settings().set('vintageous_hlsearch', True)
+
+    def runSlices(self, set_timeout):
+        while set_timeout.call_count:
+            callback = set_timeout.call_args[0][0]
+            set_timeout.reset_mock()
+            callback()
+
+    @unittest.mock.patch('NeoVintageous.nv.vi.search.set_timeout')
+    def test_indexes_the_buffer_in_slices(self, set_timeout):
+        self.normal('abc\nx\n|abc\nx\nabc')
+        hilite_search(self.view, 'abc')
+        self.assertSearch('|abc|\nx\n|abc|\nx\n|abc|')
+        self.assertSearchCurrent('abc\nx\n|abc|\nx\nabc')
+        self.assertEqual(1, set_timeout.call_count)
+        with unittest.mock.patch('NeoVintageous.nv.vi.search._HILITE_SLICE_TIME', -1):
+            self.runSlices(set_timeout)
+
+        self.assertSearch('|abc|\nx\n|abc|\nx\n|abc|')
+        with unittest.mock.patch.object(self.view, 'find_all') as find_all:
+            self.assertEqual((2, 3), get_search_count(self.view, 'abc', self.Region(6, 9)))
+            self.assertEqual(0, find_all.call_count)
+
+        hilite_search(self.view, 'abc')
+        self.assertEqual(0, set_timeout.call_count)
+
+    @unittest.mock.patch('NeoVintageous.nv.vi.search.set_timeout')
+    def test_new_search_cancels_pending_search(self, set_timeout):
+        self.normal('|abc\nx\nabc')
+        hilite_search(self.view, 'abc')
+        callback = set_timeout.call_args[0][0]
+        set_timeout.reset_mock()
+        hilite_search(self.view, 'x')
+        self.assertEqual(1, set_timeout.call_count)
+        callback()
+        self.assertEqual(1, set_timeout.call_count)
+        self.assertSearch('abc\n|x|\nabc')
+
+    @unittest.mock.patch('NeoVintageous.nv.vi.search.set_timeout')
+    def test_current_matches(self, set_timeout):
+        self.normal('a|b x ab x a|b')
+        hilite_search(self.view, 'ab')
+        self.assertSearchCurrent('|ab| x ab x |ab|')
+        self.runSlices(set_timeout)
+        self.assertSearchCurrent('|ab| x ab x |ab|')
+
+    @unittest.mock.patch('NeoVintageous.nv.vi.search.set_timeout')
+    def test_nohlsearch(self, set_timeout):
+        self.settings().set('vintageous_hlsearch', False)
+        self.normal('|abc\nx\nabc')
+        hilite_search(self.view, 'abc')
+        self.assertSearch('abc\nx\nabc')
+        self.assertEqual(0, set_timeout.call_count)
+
 
 class TestReverseFindWrapping(unittest.ViewTestCase):
 
@@ -53,6 +154,12 @@ class TestReverseFindWrapping(unittest.ViewTestCase):
         self.assertEqual(reverse_find_wrapping(self.view, 'buzz', 10, self.view.size()), self.Region(5, 9))
         self.assertEqual(reverse_find_wrapping(self.view, 'zz', 10, self.view.size()), self.Region(7, 9))
 
+    def test_reverse_find_wrapping_count(self):
+        self.normal('fizz buzz | one buzz two fizz')
+        self.assertEqual(reverse_find_wrapping(self.view, 'zz', 0, 10, times=2), self.Region(2, 4))
+        self.assertEqual(reverse_find_wrapping(self.view, 'zz', 0, 10, times=3), self.Region(27, 29))
+        self.assertEqual(reverse_find_wrapping(self.view, 'zz', 0, 10, times=4), self.Region(18, 20))
+
 
 class TestReverseSearchByPt(unittest.ViewTestCase):
 
@@ -103,6 +210,48 @@ class TestReverseSearchByPt(unittest.ViewTestCase):
         self.assertEqual(reverse_search_by_pt(self.view, 'a', -4, self.view.size()), None)
         self.assertEqual(reverse_search_by_pt(self.view, 'a', 5, self.view.size() + 1), None)
 
+    @unittest.mock.patch('NeoVintageous.nv.vi.search._REVERSE_FIND_CHUNK_SIZE', 4)
+    def test_scans_backwards_across_chunks(self):
+        self.write('ab\nxxx\nxxab\nxxxx\nxxxxx\nxx')
+        self.assertEqual(reverse_search_by_pt(self.view, 'ab', 0, self.view.size()), self.Region(9, 11))
+        self.assertEqual(reverse_search_by_pt(self.view, 'ab', 0, 10), self.Region(0, 2))
+        self.assertEqual(reverse_search_by_pt(self.view, 'ab', 1, 10), None)
+        self.assertEqual(reverse_search_by_pt(self.view, 'x\nxxa', 0, self.view.size()), self.Region(5, 10))
+
+    @unittest.mock.patch('NeoVintageous.nv.vi.search._REVERSE_FIND_CHUNK_SIZE', 4)
+    def test_stops_at_the_first_chunk_with_a_match(self):
+        self.write('ab\nxxxx\nxxxx\nxxxx\nab\nxx')
+        with unittest.mock.patch.object(self.view, 'find', wraps=self.view.find) as find:
+            self.assertEqual(reverse_search_by_pt(self.view, 'ab', 0, self.view.size()), self.Region(18, 20))
+            self.assertEqual(find.call_count, 2)
+
+    def test_bisects_the_matches_in_a_chunk(self):
+        self.write('x' * 1000)
+        with unittest.mock.patch.object(self.view, 'find', wraps=self.view.find) as find:
+            self.assertEqual(reverse_search_by_pt(self.view, 'x', 0, self.view.size()), self.Region(999, 1000))
+            self.assertLess(find.call_count, 25)
+
+    def test_patterns_that_match_the_empty_string(self):
+        self.write('xbxxbx')
+        self.assertEqual(reverse_search_by_pt(self.view, 'b?', 0, self.view.size()), self.Region(4, 5))
+        self.assertEqual(reverse_search_by_pt(self.view, 'b?', 0, 4), self.Region(1, 2))
+        self.assertEqual(reverse_search_by_pt(self.view, 'b?', 2, 4), None)
+
+    def test_ignorecase_and_lookbehind(self):
+        self.write('xAx\\ax\nxax')
+        self.assertEqual(reverse_search_by_pt(self.view, 'a', 0, self.view.size(), IGNORECASE), self.Region(8, 9))
+        self.assertEqual(reverse_search_by_pt(self.view, '(?<!\\\\)a', 0, 7), None)
+        self.assertEqual(reverse_search_by_pt(self.view, '(?<!\\\\)a', 0, 7, IGNORECASE), self.Region(1, 2))
+
+    def test_overlapping_matches(self):
+        self.write('x\nx\nx\nab')
+        self.assertEqual(reverse_search_by_pt(self.view, 'x\nx', 0, self.view.size()), self.Region(2, 5))
+        self.assertEqual(reverse_search_by_pt(self.view, 'x\nx', 0, 4), self.Region(0, 3))
+
+    def test_posix_character_classes(self):
+        self.write('a1b22c')
+        self.assertEqual(reverse_search_by_pt(self.view, '[[:digit:]]+', 0, self.view.size()), self.Region(3, 5))
+
 
 class TestReverseSearch(unittest.ViewTestCase):
 
@@ -24,9 +24,11 @@ from NeoVintageous.nv.vi.settings import _SublimeSettings
 from NeoVintageous.nv.vi.settings import _VI_OPTIONS
 from NeoVintageous.nv.vi.settings import _vi_user_setting
 from NeoVintageous.nv.vi.settings import _VintageSettings
+from NeoVintageous.nv.vi.settings import destroy
 from NeoVintageous.nv.vi.settings import get_cmdline_cwd
 from NeoVintageous.nv.vi.settings import set_cmdline_cwd
 from NeoVintageous.nv.vi.settings import SettingsManager
+from NeoVintageous.nv.vi.settings import sync_vintage_settings
 
 
 class TestSublimeSettings(unittest.ViewTestCase):
@@ -56,18 +58,40 @@ class TestVintageSettings(unittest.ViewTestCase):
     def setUp(self):
         super().setUp()
         self.view.settings().erase('vintage')
+        destroy(self.view)
         self.setts = _VintageSettings(view=self.view)
 
     def test_can_initialize_class(self):
         self.assertEqual(self.setts.view, self.view)
+        self.assertEqual(self.setts['foo'], None)
         self.assertEqual(self.view.settings().get('vintage'), {})
 
     def test_can_set_setting(self):
         self.assertEqual(self.setts['foo'], None)
 
         self.setts['foo'] = 100
+        sync_vintage_settings(self.view)
         self.assertEqual(self.view.settings().get('vintage')['foo'], 100)
 
+    def test_set_setting_is_deferred_until_sync(self):
+        self.setts['foo'] = 100
+        self.setts['bar'] = 200
+        self.assertEqual(self.view.settings().get('vintage'), {})
+        self.assertEqual(self.setts['foo'], 100)
+        self.assertEqual(_VintageSettings(view=self.view)['bar'], 200)
+
+        sync_vintage_settings(self.view)
+        self.assertEqual(self.view.settings().get('vintage'), {'foo': 100, 'bar': 200})
+
+    def test_loads_setting_from_view_settings(self):
+        self.view.settings().set('vintage', {'foo': 100})
+        self.assertEqual(self.setts['foo'], 100)
+
+    def test_destroy_discards_state(self):
+        self.setts['foo'] = 100
+        destroy(self.view)
+        self.assertEqual(self.setts['foo'], None)
+
     def test_can_get_setting(self):
         self.setts['foo'] = 100
         self.assertEqual(self.setts['foo'], 100)
@@ -81,6 +105,7 @@ class TestSettingsManager(unittest.ViewTestCase):
     def setUp(self):
         super().setUp()
         self.view.settings().erase('vintage')
+        destroy(self.view)
         self.manager = SettingsManager(self.view)
 
     def test_can_access_vi_ssettings(self):
@@ -97,6 +122,7 @@ class TestViEditorSettings(unittest.ViewTestCase):
     def setUp(self):
         super().setUp()
         self.view.settings().erase('vintage')
+        destroy(self.view)
         self.view.settings().erase('vintageous_hlsearch')
         self.view.settings().erase('vintageous_foo')
         self.view.window().settings().erase('vintageous_foo')
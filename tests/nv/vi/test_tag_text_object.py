@@ -57,6 +57,10 @@ TESTS_CONTAINING_TAG = (
     test_data(content='<div>foo</div>', args={'start': 13}, expected=(unittest.Region(0, 5), unittest.Region(8, 14), 'div'), msg='find tag from within end tag'),  # noqa: E501
     test_data(content='<div>foo <p>bar</p></div>', args={'start': 12}, expected=(unittest.Region(9, 12), unittest.Region(15, 19), 'p'), msg='find nested tag from inside'),  # noqa: E501
     test_data(content='<head><link rel="shortcut icon" href="favicon.png"></head>', args={'start': 16}, expected=(unittest.Region(0, 6), unittest.Region(51, 58), 'head'), msg='find head'),  # noqa: E501
+    test_data(content='<b>x<br/></b>', args={'start': 4}, expected=(unittest.Region(0, 3), unittest.Region(9, 13), 'b'), msg='should not confuse tags with the same prefix'),  # noqa: E501
+    test_data(content='<b><br>x</b>', args={'start': 7}, expected=(unittest.Region(0, 3), unittest.Region(8, 12), 'b'), msg='should discard unclosed tags'),  # noqa: E501
+    test_data(content='<B>x</b>', args={'start': 3}, expected=(unittest.Region(0, 3), unittest.Region(4, 8), 'b'), msg='should ignore case'),  # noqa: E501
+    test_data(content='x</b>', args={'start': 0}, expected=(None, None, None), msg='should not find unbalanced end tag'),  # noqa: E501
 )
 
 
@@ -80,6 +84,20 @@ class TestTextObjects(unittest.ViewTestCase):
         self.assertEqual((4, self.Region(4, 7)), get_closest_tag(self.view, 8))
         self.assertEqual((9, self.Region(9, 13)), get_closest_tag(self.view, 9))
 
+    def test_get_closest_tag_skips_text_that_is_not_a_tag(self):
+        self.normal('<p>\na < b\n</p>')
+        self.assertEqual((0, self.Region(0, 3)), get_closest_tag(self.view, 7))
+        self.assertEqual((0, self.Region(0, 3)), get_closest_tag(self.view, 9))
+        self.assertEqual((10, self.Region(10, 14)), get_closest_tag(self.view, 11))
+
+    def test_get_closest_tag_reads_the_buffer_once_until_it_changes(self):
+        self.normal('<p>x<i>ab</i></p>')
+        get_closest_tag(self.view, 9)
+        with unittest.mock.patch.object(self.view, 'substr') as substr:
+            self.assertEqual((4, self.Region(4, 7)), get_closest_tag(self.view, 5))
+            self.assertEqual((9, self.Region(9, 13)), get_closest_tag(self.view, 12))
+            substr.assert_not_called()
+
 
 class Test_next_unbalanced_end_tag(unittest.ViewTestCase):
 
@@ -92,6 +110,13 @@ class Test_next_unbalanced_end_tag(unittest.ViewTestCase):
             msg = "failed at test index {0}: {1}".format(i, data.msg)
             self.assertEqual(data.expected, actual, msg)
 
+    def test_does_not_leak_tags_between_calls(self):
+        self.write('<p><b>x</p> y</b>')
+        actual = next_unbalanced_tag(self.view, next_end_tag, {'start': 3}, get_region_end)
+        self.assertEqual((self.Region(7, 11), 'p'), actual)
+        actual = next_unbalanced_tag(self.view, next_end_tag, {'start': 11}, get_region_end)
+        self.assertEqual((self.Region(13, 17), 'b'), actual)
+
 
 class Test_TagSearch(unittest.ViewTestCase):
 
@@ -124,3 +149,16 @@ class Test_FindContainingTag(unittest.ViewTestCase):
 
             msg = "failed at test index {0}: {1}".format(i, data.msg)
             self.assertEqual(data.expected, actual, msg)
+
+    def test_find_containing_tag_deeply_nested(self):
+        self.write('<div>' * 3000 + 'x' + '</div>' * 3000)
+        actual = find_containing_tag(self.view, 15000)
+        self.assertEqual((self.Region(14995, 15000), self.Region(15001, 15007), 'div'), actual)
+        actual = find_containing_tag(self.view, 5)
+        self.assertEqual((self.Region(0, 5), self.Region(32995, 33001), 'div'), actual)
+
+    def test_find_containing_tag_after_buffer_change(self):
+        self.write('<a>foo</a>')
+        self.assertEqual((self.Region(0, 3), self.Region(6, 10), 'a'), find_containing_tag(self.view, 4))
+        self.write('<i><a>foo</a></i>')
+        self.assertEqual((self.Region(3, 6), self.Region(9, 13), 'a'), find_containing_tag(self.view, 7))
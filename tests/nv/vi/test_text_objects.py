@@ -59,6 +59,8 @@ TESTS_NEXT_BRACKET = (
     test(content='a\\}bc', start=2, brackets=('\\{', '\\}'), expected=None, msg='should not find escaped bracket at caret position'),  # noqa: E501
     test(content='a\\}bc', start=0, brackets=('\\{', '\\}'), expected=None, msg='should not find escaped bracket'),
     test(content='foo {bar foo bar}', start=16, brackets=('\\{', '\\}'), expected=unittest.Region(16, 17), msg='should find next bracket at caret position'),  # noqa: E501
+    test(content='foo {bar \\{ foo} bar', start=5, brackets=('\\{', '\\}'), expected=unittest.Region(16, 17), msg='should ignore escaped opening bracket'),  # noqa: E501
+    test(content='a {b} {c} d}', start=0, brackets=('\\{', '\\}'), expected=unittest.Region(11, 12), msg='should skip balanced brackets'),  # noqa: E501
 )
 
 
@@ -86,6 +88,19 @@ class Test_next_bracket(unittest.ViewTestCase):
             self.assertEqual(data.expected, actual, "failed at test index {0}: {1}".format(i, data.msg))
 
 
+class Test_lone_bracket_deeply_nested(unittest.ViewTestCase):
+
+    def test_next_bracket(self):
+        self.write('{' * 5000 + 'x' + '}' * 5000)
+        self.assertEqual(find_next_lone_bracket(self.view, 1, ('\\{', '\\}')), unittest.Region(9999, 10000))
+        self.assertEqual(find_next_lone_bracket(self.view, 5000, ('\\{', '\\}')), unittest.Region(5001, 5002))
+
+    def test_prev_bracket(self):
+        self.write('{' * 5000 + 'x' + '}' * 5000)
+        self.assertEqual(find_prev_lone_bracket(self.view, 10000, ('\\{', '\\}')), unittest.Region(0, 1))
+        self.assertEqual(find_prev_lone_bracket(self.view, 5000, ('\\{', '\\}')), unittest.Region(4999, 5000))
+
+
 class TestIsAtSpace(unittest.ViewTestCase):
 
     def test_basic(self):
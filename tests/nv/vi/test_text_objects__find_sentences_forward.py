@@ -57,3 +57,10 @@ class TestFindSentencesForward(unittest.ViewTestCase):
             self.assertEqual(find_sentences_forward(self.view, 0, count=4), self.Region(34))
             self.assertEqual(find_sentences_forward(self.view, 0, count=5), self.Region(41))
             self.assertEqual(find_sentences_forward(self.view, 0, count=6), self.Region(41))
+
+    def test_find_sentences_forward_empty_lines(self):
+        self.normal('|fizz\n\n\nbuzz.\n\n')
+        self.assertEqual(find_sentences_forward(self.view, 0), self.Region(5))
+        self.assertEqual(find_sentences_forward(self.view, 5), self.Region(7))
+        self.assertEqual(find_sentences_forward(self.view, 0, count=3), self.Region(13))
+        self.assertIsNone(find_sentences_forward(self.view, 13))
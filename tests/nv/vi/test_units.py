@@ -17,6 +17,10 @@
 
 from NeoVintageous.tests import unittest
 
+from NeoVintageous.nv.vi.units import ChunkedText
+from NeoVintageous.nv.vi.units import get_line_index
+from NeoVintageous.nv.vi.units import line_index_destroy
+from NeoVintageous.nv.vi.units import LineIndex
 from NeoVintageous.nv.vi.units import next_paragraph_start
 from NeoVintageous.nv.vi.units import prev_paragraph_start
 
@@ -76,3 +80,85 @@ class TestPrevParagraphStart(unittest.ViewTestCase):
         self.normal('1\n\n4\n\n7\n\n0\n\n3\n')
         self.assertEqual(5, prev_paragraph_start(self.view, 14, count=3))
         self.assertEqual(0, prev_paragraph_start(self.view, 5, count=3))
+
+
+class TestLineIndex(unittest.TestCase):
+
+    def test_rows(self):
+        index = LineIndex('ab\n\ncd\n')
+        self.assertEqual([0, 3, 4, 7], index.starts)
+        self.assertEqual(3, index.last_row)
+        self.assertEqual([0, 0, 0, 1, 2, 2, 2, 3, 3], [index.row(pt) for pt in range(9)])
+        self.assertEqual([2, 3, 6, 7], [index.line_end(row) for row in range(4)])
+
+    def test_empty_buffer(self):
+        index = LineIndex('')
+        self.assertEqual([0], index.starts)
+        self.assertEqual(0, index.row(0))
+        self.assertEqual((True, 0, 0), index.run(index.empty, 0))
+
+    def test_runs(self):
+        index = LineIndex('a\n\n \n\t\nb\nc\n\n')
+        self.assertEqual(([1, 6], [1, 7]), index.empty)
+        self.assertEqual(([1, 6], [3, 7]), index.blank)
+        self.assertEqual((False, 0, 0), index.run(index.blank, 0))
+        self.assertEqual((True, 1, 3), index.run(index.blank, 2))
+        self.assertEqual((False, 4, 5), index.run(index.blank, 4))
+        self.assertEqual((True, 6, 7), index.run(index.blank, 7))
+        self.assertEqual((False, 2, 5), index.run(index.empty, 3))
+
+    def test_indents(self):
+        index = LineIndex('a\n  b\n\tc\n \t d\n \n')
+        self.assertEqual([0, 2, 4, 5, None, None], index.indents(4))
+        self.assertEqual([0, 2, 2, 3, None, None], index.indents(2))
+
+    def test_sentences(self):
+        index = LineIndex('  a. b!) c.d?\n\n\ne. "f"\n\n')
+        self.assertEqual((
+            [2, 5, 9, 14, 16, 19, 23],
+            [4, 8, 13, 14, 18, 22, 23],
+            [2, 5, 9, 15, 16, 19, 23]
+        ), index.sentences())
+        self.assertEqual(([], [], []), LineIndex('').sentences())
+        self.assertEqual(([0], [5], [0]), LineIndex('fizz. ').sentences())
+
+
+@unittest.mock.patch.dict('NeoVintageous.nv.vi.units._line_index_cache', {})
+class TestGetLineIndex(unittest.ViewTestCase):
+
+    def test_is_reused_until_the_buffer_changes(self):
+        self.write('fizz\nbuzz')
+        index = get_line_index(self.view)
+        self.assertEqual('fizz\nbuzz', index.text)
+        self.assertIs(index, get_line_index(self.view))
+        self.write('fizz')
+        self.assertEqual('fizz', get_line_index(self.view).text)
+
+    def test_destroy(self):
+        self.write('fizz')
+        index = get_line_index(self.view)
+        line_index_destroy(self.view)
+        self.assertIsNot(index, get_line_index(self.view))
+
+
+@unittest.mock.patch('NeoVintageous.nv.vi.units._CHUNK_SIZE', 2)
+class TestChunkedText(unittest.ViewTestCase):
+
+    def test_matches_the_view(self):
+        self.write('fizz.buzz  (x_y)\n\n\t\n  é-1 \nend')
+        size = self.view.size()
+        for start in (0, 9, size):
+            text = ChunkedText(self.view, start)
+            self.assertEqual(size, text.size())
+            self.assertEqual(self.content(), text.substr(self.Region(-1, size + 1)))
+            for pt in range(size + 1):
+                self.assertEqual(self.view.substr(pt), text.substr(pt), pt)
+                self.assertEqual(self.view.line(pt), text.line(pt), pt)
+                # Sub word classes are not supported.
+                self.assertEqual(self.view.classify(pt) & 0x1cf, text.classify(pt), pt)
+                for classes in (0x3, 0xc, 0x40, 0x80, 0x100, 0x1c5):
+                    for forward in (True, False):
+                        self.assertEqual(
+                            self.view.find_by_class(pt, forward, classes),
+                            text.find_by_class(pt, forward, classes),
+                            (pt, forward, classes))
@@ -51,6 +51,21 @@ from NeoVintageous.nv.vim import VISUAL_LINE  # noqa: F401
 class ViewTestCase(unittest.TestCase):
 
     def setUp(self):
+        # Don't read or write the shada file of the user.
+        for target, new in (
+                ('NeoVintageous.nv.shada._file_path', lambda: ''),
+                ('NeoVintageous.nv.shada._data', None),
+                ('NeoVintageous.nv.shada._pending', []),
+                ('NeoVintageous.nv.shada._timer', None),
+                ('NeoVintageous.nv.shada._file_size', 0),
+                ('NeoVintageous.nv.shada._rewrite_size', 0),
+                ('NeoVintageous.nv.shada.Timer', mock.Mock()),
+                ('NeoVintageous.nv.history._storage', None),
+                ('NeoVintageous.nv.history._disk_storage', None)):
+            patcher = mock.patch(target, new)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
         self.view = _active_window().new_file()
 
     def tearDown(self):
@@ -260,7 +275,7 @@ class ViewTestCase(unittest.TestCase):
         registers._reset_data()
 
     def resetMacros(self):
-        _macros._state.clear()
+        _macros._reset_data()
 
     def assertContent(self, expected, msg=None):
         self.assertEqual(self.content(), expected, msg)
@@ -960,13 +975,15 @@ def mock_mappings(*mappings):
     def wrapper(f):
 
         from NeoVintageous.nv.mappings import _mappings
+        from NeoVintageous.nv.mappings import _new_mappings_index
         from NeoVintageous.nv.mappings import mappings_add
 
+        @unittest.mock.patch('NeoVintageous.nv.mappings._mappings_index', new_callable=_new_mappings_index)
         @unittest.mock.patch('NeoVintageous.nv.mappings._mappings', new_callable=lambda: {k: {} for k in _mappings})
         def wrapped(self, *args, **kwargs):
             for mapping in mappings:
                 mappings_add(*mapping)
-            return f(self, *args[:-1], **kwargs)
+            return f(self, *args[:-2], **kwargs)
         return wrapped
     return wrapper
 